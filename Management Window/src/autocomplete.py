@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Craftbot Autocomplete
+Item name completion popup for the JSON recipe editor
+"""
+
+import re
+import tkinter as tk
+
+# Recipe keys whose string values are item names
+ITEM_KEYS = {"ProcessableItems", "RequiredTools", "Tool", "InputItem", "OutputItem", "AlternativeTools"}
+# Characters typed before suggestions are shown
+MIN_PREFIX = 2
+# Text before the cursor searched for the key of the string being typed
+KEY_LOOKBACK = 2000
+
+# The key a string value belongs to: "Key": "... or "Key": ["a", "b", "...
+_KEY_PATTERN = re.compile(r'"(\w+)"\s*:\s*\[?[^\[\]{}:]*$')
+
+
+class ItemAutocomplete:
+    """Suggests item names while typing a string value of an item field
+
+    complete(prefix) must return the suggestions quickly since it runs on
+    every key press; it is called on the Tk thread.
+    """
+
+    def __init__(self, text, complete):
+        self.text = text
+        self.complete = complete
+        self.popup = None
+        self.listbox = None
+        # Text index where the string being completed starts (after its quote)
+        self.string_start = None
+
+        self.text.bind("<KeyRelease>", self.on_key_release, add="+")
+        self.text.bind("<Down>", lambda e: self.move(1), add="+")
+        self.text.bind("<Up>", lambda e: self.move(-1), add="+")
+        self.text.bind("<Tab>", lambda e: self.accept(), add="+")
+        self.text.bind("<Return>", lambda e: self.accept(), add="+")
+        self.text.bind("<Escape>", lambda e: self.hide(), add="+")
+        self.text.bind("<FocusOut>", lambda e: self.hide(), add="+")
+        self.text.bind("<Button-1>", lambda e: self.hide(), add="+")
+
+    def current_prefix(self):
+        """(string start index, typed prefix) if the cursor is in an item field's string, else None"""
+        before = self.text.get("insert linestart", "insert")
+        quotes = [match.start() for match in re.finditer(r'(?<!\\)"', before)]
+        if len(quotes) % 2 == 0:
+            return None
+        column = quotes[-1]
+        start = self.text.index(f"insert linestart + {column} chars")
+        context = self.text.get(f"{start} - {KEY_LOOKBACK} chars", start)
+        match = _KEY_PATTERN.search(context)
+        if match is None or match.group(1) not in ITEM_KEYS:
+            return None
+        return self.text.index(f"{start} + 1 chars"), before[column + 1:]
+
+    def on_key_release(self, event):
+        if event.keysym in ("Up", "Down", "Tab", "Return", "Escape"):
+            return
+        current = self.current_prefix()
+        if current is None or len(current[1]) < MIN_PREFIX:
+            self.hide()
+            return
+        self.string_start, prefix = current
+        suggestions = [name for name in self.complete(prefix) if name != prefix]
+        if suggestions:
+            self.show(suggestions)
+        else:
+            self.hide()
+
+    def show(self, suggestions):
+        if self.popup is None:
+            self.popup = tk.Toplevel(self.text)
+            self.popup.wm_overrideredirect(True)
+            self.listbox = tk.Listbox(self.popup, height=8, exportselection=False)
+            self.listbox.pack(fill=tk.BOTH, expand=True)
+            self.listbox.bind("<ButtonRelease-1>", lambda e: self.accept())
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *suggestions)
+        self.listbox.config(height=min(len(suggestions), 8), width=max(len(name) for name in suggestions) + 2)
+        self.listbox.selection_set(0)
+
+        bbox = self.text.bbox("insert")
+        if bbox is not None:
+            x, y, width, height = bbox
+            self.popup.wm_geometry(f"+{self.text.winfo_rootx() + x}+{self.text.winfo_rooty() + y + height}")
+
+    def hide(self):
+        if self.popup is not None:
+            self.popup.destroy()
+            self.popup = None
+            self.listbox = None
+
+    def move(self, delta):
+        if self.popup is None:
+            return None
+        selection = self.listbox.curselection()
+        position = max(0, min((selection[0] if selection else -1) + delta, self.listbox.size() - 1))
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(position)
+        self.listbox.see(position)
+        return "break"
+
+    def accept(self):
+        """Replace the typed prefix with the selected suggestion"""
+        if self.popup is None:
+            return None
+        selection = self.listbox.curselection()
+        if selection:
+            name = self.listbox.get(selection[0])
+            self.text.delete(self.string_start, "insert")
+            self.text.insert(self.string_start, name)
+        self.hide()
+        self.text.focus_set()
+        return "break"
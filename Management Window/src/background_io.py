@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Craftbot Background I/O
+Runs file work on worker threads and hands the results back to the Tk thread
+"""
+
+import itertools
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import tracer
+
+# How often finished work is collected on the Tk thread (ms)
+POLL_INTERVAL = 25
+# Threads used for reads; writes always go through a single thread so they stay ordered
+READ_WORKERS = 4
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundIO:
+    """Worker pool whose callbacks always run on the Tk thread
+
+    Reads are submitted on a named channel (for example "recipes_list"). A newer
+    request on the same channel supersedes the older one: if the older one has
+    not started it is cancelled, otherwise its result is dropped when it
+    arrives. This is what lets a handler ignore clicks the user has already
+    moved past.
+
+    While tracing, a request belongs to the operation that submitted it: its
+    work is timed as that operation's I/O and its callbacks as its render
+    phase.
+
+    A failure submitted without an on_error goes to on_error(exception) given
+    here, on the Tk thread, or is logged if there is none.
+    """
+
+    def __init__(self, widget, on_status=None, on_error=None):
+        self.widget = widget
+        self.on_status = on_status
+        self.on_error = on_error
+        self._readers = ThreadPoolExecutor(max_workers=READ_WORKERS, thread_name_prefix="craftbot-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="craftbot-write")
+        self._results = queue.Queue()
+        self._ids = itertools.count(1)
+        # channel -> (request id, future) of the request whose result is still wanted
+        self._latest = {}
+        # channel -> ids of its requests not yet finished, superseded ones included
+        self._running = {}
+        # request id -> loading message shown while the request runs
+        self._loading = {}
+        # Ids of started requests whose results are no longer wanted
+        self._superseded = set()
+        self._poll_job = self.widget.after(POLL_INTERVAL, self._drain)
+
+    def submit(self, channel, func, *args, on_done=None, on_error=None, on_cancel=None, on_progress=None,
+               loading=None):
+        """Run func(*args) on a reader thread
+
+        on_done(result) or on_error(exception) runs on the Tk thread unless a
+        newer request on the same channel came in first; in that case
+        on_cancel(result) runs instead, so the caller can release whatever the
+        dropped result holds. A channel of None is never superseded.
+
+        With on_progress, func is also passed a progress(value) keyword argument
+        for streaming partial results: each value is handed to on_progress on
+        the Tk thread, and progress returns False once the request has been
+        superseded so long-running work can stop early.
+        """
+        return self._submit(self._readers, channel, func, args, on_done, on_error, on_cancel, loading, on_progress)
+
+    def submit_write(self, func, *args, on_done=None, on_error=None, loading=None):
+        """Run func(*args) on the writer thread, after every earlier write"""
+        return self._submit(self._writer, None, func, args, on_done, on_error, None, loading)
+
+    def _submit(self, executor, channel, func, args, on_done, on_error, on_cancel, loading, on_progress=None):
+        request_id = next(self._ids)
+        if channel is not None:
+            self.cancel(channel)
+        if loading:
+            self._loading[request_id] = loading
+            self._update_status()
+
+        operation = tracer.hold()
+        if operation is not None:
+            func = _traced_call(func, operation)
+        kwargs = {}
+        if on_progress is not None:
+            kwargs["progress"] = lambda value: self._progress(channel, request_id, on_progress, value, operation)
+        future = executor.submit(func, *args, **kwargs)
+        if channel is not None:
+            self._latest[channel] = (request_id, future)
+            self._running.setdefault(channel, set()).add(request_id)
+        future.add_done_callback(lambda f: self._results.put(
+            (self._deliver, (channel, request_id, f, on_done, on_error, on_cancel, operation))))
+        return request_id
+
+    def post(self, func, *args):
+        """Run func(*args) on the Tk thread; may be called from any thread"""
+        self._results.put((func, args))
+
+    def _progress(self, channel, request_id, on_progress, value, operation):
+        """Queue a partial result for the Tk thread (worker thread)"""
+        if request_id in self._superseded:
+            return False
+        self._results.put((self._deliver_progress, (channel, request_id, on_progress, value, operation)))
+        return True
+
+    def _deliver_progress(self, channel, request_id, on_progress, value, operation):
+        if request_id in self._superseded:
+            return
+        if operation is None:
+            on_progress(value)
+        else:
+            with tracer.resume(operation, "render", _call_name(on_progress)):
+                on_progress(value)
+
+    def cancel(self, channel):
+        """Drop the pending request on a channel
+
+        Returns True if the request had already started, in which case its
+        on_cancel callback will still run once it finishes.
+        """
+        latest = self._latest.pop(channel, None)
+        if latest is None:
+            return False
+        request_id, future = latest
+        if future.cancel():
+            self._finish(request_id, channel)
+            return False
+        self._superseded.add(request_id)
+        return True
+
+    def is_busy(self, channel):
+        """Whether any request on channel is still running, including ones already superseded"""
+        return bool(self._running.get(channel))
+
+    def _finish(self, request_id, channel):
+        if channel is not None:
+            running = self._running.get(channel)
+            if running is not None:
+                running.discard(request_id)
+                if not running:
+                    del self._running[channel]
+        if self._loading.pop(request_id, None) is not None:
+            self._update_status()
+
+    def _update_status(self):
+        if self.on_status is not None:
+            # Show the most recent request that is still loading
+            message = self._loading[max(self._loading)] if self._loading else ""
+            self.on_status(message)
+
+    def _drain(self):
+        """Deliver finished results on the Tk thread"""
+        try:
+            while True:
+                try:
+                    item = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                handler, args = item
+                handler(*args)
+        finally:
+            self._poll_job = self.widget.after(POLL_INTERVAL, self._drain)
+
+    def _deliver(self, channel, request_id, future, on_done, on_error, on_cancel, operation):
+        if operation is None:
+            self._deliver_result(channel, request_id, future, on_done, on_error, on_cancel)
+            return
+        try:
+            with tracer.resume(operation, "render", _call_name(on_done)):
+                self._deliver_result(channel, request_id, future, on_done, on_error, on_cancel)
+        finally:
+            tracer.release(operation)
+
+    def _deliver_result(self, channel, request_id, future, on_done, on_error, on_cancel):
+        if future.cancelled():
+            return
+        self._finish(request_id, channel)
+        self._superseded.discard(request_id)
+
+        error = future.exception()
+        stale = channel is not None and self._latest.get(channel, (None,))[0] != request_id
+        if stale:
+            if on_cancel is not None:
+                on_cancel(future.result() if error is None else None)
+            return
+        if channel is not None:
+            del self._latest[channel]
+
+        if error is not None:
+            if on_error is not None:
+                on_error(error)
+            elif self.on_error is not None:
+                self.on_error(error)
+            else:
+                logger.error("Background task failed: %r", error, exc_info=error)
+        elif on_done is not None:
+            on_done(future.result())
+
+    def shutdown(self):
+        """Stop polling and let queued writes finish"""
+        if self._poll_job is not None:
+            self.widget.after_cancel(self._poll_job)
+            self._poll_job = None
+        self._readers.shutdown(wait=False)
+        self._writer.shutdown(wait=True)
+
+
+def _call_name(func):
+    return getattr(func, "__qualname__", None) or repr(func)
+
+
+def _traced_call(func, operation):
+    """func timed as I/O of operation on whichever thread runs it"""
+    name = _call_name(func)
+
+    def call(*args, **kwargs):
+        with tracer.resume(operation, "io", name):
+            return func(*args, **kwargs)
+    return call
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Craftbot Config Cache
+Keeps parsed config files and directory listings until they change on disk
+"""
+
+import json
+import threading
+from pathlib import Path
+
+from instrumentation import tracer
+
+
+def file_signature(path):
+    """(mtime, size) of a file, or None if it does not exist"""
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class CommandTable:
+    """commands.json parsed once: names in display order plus a name lookup"""
+
+    def __init__(self, data):
+        commands = data.get("Commands", []) if isinstance(data, dict) else []
+        # Sort commands alphabetically by name
+        sorted_commands = sorted(commands, key=lambda x: x.get("Name", "").lower())
+        self.names = [cmd.get("Name", "Unknown") for cmd in sorted_commands]
+        self.by_name = {}
+        for cmd in commands:
+            # Keep the first command with a given name, like the old linear search did
+            self.by_name.setdefault(cmd.get("Name"), cmd)
+
+
+def parse_commands(text):
+    return CommandTable(json.loads(text))
+
+
+class ConfigCache:
+    """Parsed files and directory listings keyed by path and validated by stat
+
+    A cached entry is reused as long as the file's mtime and size are unchanged,
+    so repeated tab switches cost one stat per file instead of a read and a
+    parse. Cached values are shared, so callers must not modify them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (kind, path, parser) -> (signature, value)
+        self._entries = {}
+
+    def _lookup(self, key, signature):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] == signature:
+            return True, entry[1]
+        return False, None
+
+    def _store(self, key, signature, value):
+        with self._lock:
+            self._entries[key] = (signature, value)
+
+    def load(self, path, parse=json.loads):
+        """Return parse(file text), reusing the last result while the file is unchanged
+
+        Returns None if the file does not exist. Parse errors are raised and
+        not cached.
+        """
+        path = Path(path)
+        key = ("file", path, parse)
+        signature = file_signature(path)
+        if signature is None:
+            self.invalidate(path)
+            return None
+        found, value = self._lookup(key, signature)
+        if found:
+            return value
+        text = path.read_text(encoding="utf-8-sig")
+        with tracer.phase("parse", f"parse {path.name}"):
+            value = parse(text)
+        self._store(key, signature, value)
+        return value
+
+    def read_text(self, path):
+        """File text, reusing the last read while the file is unchanged"""
+        return self.load(path, parse=str)
+
+    def list_files(self, directory, pattern="*"):
+        """Sorted files in a directory matching pattern, relisted only when the directory changes
+
+        Adding, removing or renaming entries updates a directory's mtime, so
+        the listing is only rebuilt then. Hidden files, such as the temporary
+        files of a save in progress, are left out.
+        """
+        directory = Path(directory)
+        key = ("listing", directory, pattern)
+        signature = file_signature(directory)
+        if signature is None:
+            return []
+        found, value = self._lookup(key, signature)
+        if found:
+            return value
+        value = [entry for entry in sorted(directory.glob(pattern))
+                 if not entry.name.startswith(".") and entry.is_file()]
+        self._store(key, signature, value)
+        return value
+
+    def invalidate(self, path):
+        """Forget everything cached for a file, and the listing of its directory"""
+        path = Path(path)
+        with self._lock:
+            for key in list(self._entries):
+                if key[1] == path or key[1] == path.parent:
+                    del self._entries[key]
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Craftbot Config Files
+Atomic config file writes and bulk player list parsing
+"""
+
+import csv
+import io
+import os
+import stat
+import tempfile
+import time
+from pathlib import Path
+
+# Windows refuses to replace a file another process has open; retry briefly
+REPLACE_ATTEMPTS = 10
+REPLACE_RETRY_DELAY = 0.05
+
+# Column names recognised as the player column of a CSV header row
+PLAYER_COLUMNS = ("player", "players", "name", "player name", "playername")
+
+
+def atomic_write_text(path, text):
+    """Write text to path so that readers see either the old or the new file, never a partial one
+
+    The text goes to a temporary file in the same directory, which is flushed
+    to disk and then renamed over the target.
+    """
+    _atomic_write(path, text, "w", encoding="utf-8")
+
+
+def atomic_write_bytes(path, data):
+    """atomic_write_text for bytes, written exactly as given"""
+    _atomic_write(path, data, "wb")
+
+
+def _atomic_write(path, content, mode, **kwargs):
+    path = Path(path)
+    handle, temp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(handle, mode, **kwargs) as temp_file:
+            temp_file.write(content)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        # mkstemp creates the file owner-only; keep the permissions of the file being replaced
+        if path.exists():
+            os.chmod(temp_name, stat.S_IMODE(path.stat().st_mode))
+        for attempt in range(REPLACE_ATTEMPTS):
+            try:
+                os.replace(temp_name, str(path))
+                break
+            except PermissionError:
+                if attempt == REPLACE_ATTEMPTS - 1:
+                    raise
+                time.sleep(REPLACE_RETRY_DELAY)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+        raise
+
+
+def parse_player_names(text):
+    """Player names from a CSV or newline/comma separated list, deduplicated in order
+
+    Blank lines and lines starting with # are skipped. If the first row is a
+    header naming a player column, only that column is used; otherwise every
+    non-empty field is a name. Names differing only in case are the same
+    player to the bot, so only the first spelling is kept.
+    """
+    rows = [[field.strip() for field in row] for row in csv.reader(io.StringIO(text))]
+    rows = [row for row in rows if any(row) and not row[0].startswith("#")]
+    column = None
+    if rows:
+        header = [field.casefold() for field in rows[0]]
+        column = next((i for i, field in enumerate(header) if field in PLAYER_COLUMNS), None)
+        if column is not None:
+            rows = rows[1:]
+
+    names = []
+    for row in rows:
+        names.extend(([row[column]] if column < len(row) else []) if column is not None else row)
+    return unique_player_names(names)
+
+
+def unique_player_names(names):
+    """Non-empty names in order, keeping the first spelling of names differing only in case"""
+    unique = []
+    seen = set()
+    for name in names:
+        if name and name.casefold() not in seen:
+            seen.add(name.casefold())
+            unique.append(name)
+    return unique
+
+
+def format_player_names(names, as_csv=False):
+    """Player names as a newline list, or as a one-column CSV with a header"""
+    if not as_csv:
+        return "".join(f"{name}\n" for name in names)
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(["player"])
+    writer.writerows([name] for name in names)
+    return output.getvalue()
+
+
+def apply_player_changes(players, add=(), remove=()):
+    """Return (new player list, added, removed) for one batched change to a rank
+
+    Names are matched ignoring case, as the bot's IsPlayerInRank does.
+    Existing order and spelling are kept, duplicates are never added, and
+    removals win over additions of the same name.
+    """
+    remove = {player.casefold() for player in remove}
+    kept = [player for player in players if player.casefold() not in remove]
+    removed = [player for player in dict.fromkeys(players) if player.casefold() in remove]
+    present = {player.casefold() for player in kept}
+    added = []
+    for player in add:
+        if player.casefold() not in present and player.casefold() not in remove:
+            present.add(player.casefold())
+            added.append(player)
+    return kept + added, added, removed
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Craftbot Config Schema
+Recipe and command schemas taken from the bot's config classes, and a
+validator that rechecks only the part of a document that was edited
+"""
+
+import json
+import re
+import threading
+
+
+class Schema:
+    """Fields of one of the bot's config classes and what its loader insists on
+
+    A field type is "string", "bool", "int", "strings" (List<string>),
+    "properties" (Dictionary<string, object>), another Schema (a nested
+    object) or [Schema] (a list of objects). The bot reads JSON with
+    Newtonsoft.Json, which matches field names case-insensitively and
+    ignores fields it does not know.
+    """
+
+    def __init__(self, name, fields, required=()):
+        self.name = name
+        self.fields = fields
+        # Fields that must be present and not empty, or the loader rejects the object
+        self.required = set(required)
+        self._names = {field.casefold(): field for field in fields}
+
+    def lookup(self, key):
+        return self._names.get(key.casefold())
+
+
+# Core/RecipeConfiguration.cs - RecipeStep; DynamicRecipeLoader.ValidateRecipe
+# rejects a step without a tool, input or output
+STEP_SCHEMA = Schema("RecipeStep", {
+    "StepNumber": "int", "Description": "string", "Tool": "string", "InputItem": "string",
+    "OutputItem": "string", "ProcessingTime": "int", "ToolConsumed": "bool",
+    "AlternativeTools": "strings", "StepProperties": "properties",
+}, required=["Tool", "InputItem", "OutputItem"])
+
+# Core/RecipeConfiguration.cs - ConfigurableRecipe; a recipe needs a name and a step
+RECIPE_SCHEMA = Schema("ConfigurableRecipe", {
+    "Name": "string", "Description": "string", "Enabled": "bool", "Type": "string",
+    "Steps": [STEP_SCHEMA], "ProcessableItems": "strings", "RequiredTools": "strings",
+    "HelpText": "string", "SupportsMultipleSets": "bool", "MaxSetsPerTrade": "int",
+    "Categories": "strings", "CustomProperties": "properties",
+}, required=["Name", "Steps"])
+
+# Core/CommandConfiguration.cs - ConfigurableCommand
+COMMAND_SCHEMA = Schema("ConfigurableCommand", {
+    "Name": "string", "Aliases": "strings", "Description": "string", "Response": "string",
+    "Enabled": "bool", "RequiresParameters": "bool", "Category": "string", "Cooldown": "int",
+    "Rank": "string", "RequiredPermissions": "strings", "CustomProperties": "properties",
+    "ActionType": "string", "CustomAction": "string",
+}, required=["Name"])
+
+COMMAND_SETTINGS_SCHEMA = Schema("CommandSettings", {
+    "EnableHotReload": "bool", "CaseSensitive": "bool", "CommandPrefix": "string", "LogCommandUsage": "bool",
+    "GlobalCooldown": "int", "AllowCustomCommands": "bool", "AdminUsers": "strings", "EnableAliases": "bool",
+    "MaxCommandsPerMinute": "int", "EnableFunnyResponses": "bool",
+})
+
+# commands.json as a whole - CommandConfiguration
+COMMAND_FILE_SCHEMA = Schema("CommandConfiguration", {
+    "Commands": [COMMAND_SCHEMA], "Settings": COMMAND_SETTINGS_SCHEMA,
+})
+
+INT32_RANGE = (-2 ** 31, 2 ** 31 - 1)
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _skip(text, position):
+    return _WHITESPACE.match(text, position).end()
+
+
+def iter_children(text, start):
+    """Yield (key or index, key start, key end, value start, value end, value) for the object or array at start
+
+    Each value is parsed with the C JSON scanner, so walking a container
+    costs about as much as parsing it once. The text must be valid JSON.
+    """
+    is_object = text[start] == "{"
+    position = _skip(text, start + 1)
+    if text[position] in "}]":
+        return
+    index = 0
+    while True:
+        key_start = key_end = position
+        if is_object:
+            key, key_end = _decoder.raw_decode(text, position)
+            # Past the colon
+            position = _skip(text, _skip(text, key_end) + 1)
+        else:
+            key = index
+        value, end = _decoder.raw_decode(text, position)
+        yield key, key_start, key_end, position, end, value
+        index += 1
+        position = _skip(text, end)
+        if text[position] != ",":
+            return
+        position = _skip(text, position + 1)
+
+
+def _type_problem(value, kind):
+    """Why value cannot be read as kind, or None if it can (the way Newtonsoft.Json converts)"""
+    if kind == "string":
+        if isinstance(value, (dict, list)):
+            return "should be text"
+    elif kind == "bool":
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+            return None
+        if isinstance(value, int) and not isinstance(value, bool):
+            return None
+        return "should be true or false"
+    elif kind == "int":
+        number = value
+        if isinstance(value, str):
+            try:
+                number = int(value.strip())
+            except ValueError:
+                return "should be a whole number"
+        if isinstance(number, float) and number.is_integer():
+            number = int(number)
+        if isinstance(number, bool) or not isinstance(number, int):
+            return "should be a whole number"
+        if not INT32_RANGE[0] <= number <= INT32_RANGE[1]:
+            return "is too large for a whole number"
+    elif kind == "strings":
+        if value is not None and not isinstance(value, list):
+            return 'should be a list like ["a", "b"]'
+        if value and any(isinstance(element, (dict, list)) for element in value):
+            return "should only contain text"
+    elif kind == "properties":
+        if value is not None and not isinstance(value, dict):
+            return "should be an object"
+    return None
+
+
+def _is_empty(value):
+    return value is None or value == "" or value == []
+
+
+def check_member(text, value, start, end, kind, path, required, problems):
+    """Check one field's value, appending (start, end, severity, path, message) problems"""
+    if required and _is_empty(value):
+        problems.append((start, end, "error", path, "is required - the bot skips this without it"))
+        return
+    if isinstance(kind, Schema):
+        if value is not None:
+            if isinstance(value, dict):
+                check_object(text, start, kind, path + ".", problems)
+            else:
+                problems.append((start, end, "error", path, f"should be an object ({kind.name})"))
+    elif isinstance(kind, list):
+        if value is not None:
+            if isinstance(value, list):
+                for index, _, _, element_start, element_end, element in iter_children(text, start):
+                    check_member(text, element, element_start, element_end, kind[0], f"{path}[{index}]", False,
+                                 problems)
+            else:
+                problems.append((start, end, "error", path, f"should be a list of {kind[0].name} objects"))
+    else:
+        problem = _type_problem(value, kind)
+        if problem:
+            problems.append((start, end, "error", path, problem))
+
+
+def check_object(text, start, schema, prefix, problems, units=None):
+    """Check the object at start against schema
+
+    With units, the fields (and the elements of lists of objects) are not
+    checked here but appended to units as [start, end, kind, path, required,
+    value] for the caller to check one at a time; the caller replaces the
+    value with the unit's problems.
+    """
+    seen = set()
+    for key, key_start, key_end, value_start, value_end, value in iter_children(text, start):
+        field = schema.lookup(key)
+        if field is None:
+            problems.append((key_start, key_end, "warning", prefix + key,
+                             f"is not a {schema.name} field - the bot ignores it"))
+            continue
+        seen.add(field)
+        kind = schema.fields[field]
+        required = field in schema.required
+        if units is None:
+            check_member(text, value, value_start, value_end, kind, prefix + field, required, problems)
+        elif isinstance(kind, list) and isinstance(value, list) and value:
+            for index, _, _, element_start, element_end, element in iter_children(text, value_start):
+                units.append([element_start, element_end, kind[0], f"{prefix}{field}[{index}]", False, element])
+        else:
+            units.append([value_start, value_end, kind, prefix + field, required, value])
+    for field in sorted(schema.required - seen):
+        problems.append((start, start + 1, "error", prefix.rstrip(".") or schema.name,
+                         f"has no {field} - the bot skips it without one"))
+
+
+def check_document(text, schema):
+    """Every problem in a JSON document, as (start, end, severity, path, message) sorted by position"""
+    return DocumentValidator(schema).check(text)
+
+
+def _common_prefix(a, b):
+    """Length of the common start of two strings, by bisection on C-speed slice comparisons"""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix(a, b, limit):
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:] == b[len(b) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class DocumentValidator:
+    """Checks successive versions of one document, reusing what an edit did not touch
+
+    The top-level fields of the document, and each element of a top-level
+    list of objects (recipe steps, commands), are checked separately. When
+    an edit stays inside one of them and it still parses, only that part is
+    parsed and checked again; anything else is checked in full. check()
+    may be called from any thread.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self._lock = threading.Lock()
+        # The last document checked, its units and the problems found outside them
+        self._text = None
+        self._units = None
+        self._other_problems = None
+
+    def check(self, text):
+        with self._lock:
+            if self._units is None or not self._check_edit(text):
+                self._check_all(text)
+            self._text = text
+            problems = list(self._other_problems)
+            for unit in self._units or ():
+                problems.extend(unit[5])
+            problems.sort()
+            return problems
+
+    def _check_all(self, text):
+        self._units = None
+        try:
+            json.loads(text)
+        except ValueError as e:
+            position = getattr(e, "pos", 0)
+            column = getattr(e, "colno", 1)
+            message = getattr(e, "msg", str(e))
+            self._other_problems = [(position, position + 1, "error", "JSON",
+                                     f"is invalid at column {column}: {message}")]
+            return
+        start = _skip(text, 0)
+        if text[start] != "{":
+            self._other_problems = [(start, len(text), "error", self.schema.name,
+                                     f"should be a JSON object ({self.schema.name})")]
+            return
+        self._other_problems = []
+        self._units = []
+        check_object(text, start, self.schema, "", self._other_problems, self._units)
+        for unit in self._units:
+            self._check_unit(text, unit, unit[5])
+
+    def _check_unit(self, text, unit, value):
+        start, end, kind, path, required, _ = unit
+        unit[5] = []
+        check_member(text, value, start, end, kind, path, required, unit[5])
+
+    def _check_edit(self, text):
+        """Recheck only the unit an edit falls in; returns False if the whole document must be checked"""
+        old = self._text
+        if text == old:
+            return True
+        prefix = _common_prefix(old, text)
+        suffix = _common_suffix(old, text, min(len(old), len(text)) - prefix)
+        edit_end = len(old) - suffix
+        delta = len(text) - len(old)
+
+        for position, unit in enumerate(self._units):
+            if unit[0] <= prefix and edit_end <= unit[1]:
+                break
+        else:
+            return False
+        start, end = unit[0], unit[1] + delta
+        try:
+            value, value_end = _decoder.raw_decode(text, start)
+            if value_end != end:
+                return False
+        except ValueError:
+            return False
+
+        # Everything after the edit moves by delta
+        for later in self._units[position + 1:]:
+            later[0] += delta
+            later[1] += delta
+            later[5] = [_shift(problem, delta) for problem in later[5]]
+        self._other_problems = [_shift(problem, delta) if problem[0] >= edit_end else problem
+                                for problem in self._other_problems]
+        unit[1] = end
+        self._check_unit(text, unit, value)
+        return True
+
+
+def _shift(problem, delta):
+    return (problem[0] + delta, problem[1] + delta) + problem[2:]
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Craftbot Config Snapshots
+Content-addressed history of the config/ tree: every file version is stored
+once by its hash and a snapshot is a manifest of hashes
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from config_files import atomic_write_bytes, atomic_write_text
+
+# Kept next to (not in) config/ - the bot loads every config/*.json
+SNAPSHOTS_DIR = "config_snapshots"
+OBJECTS_DIR = "objects"
+MANIFESTS_DIR = "manifests"
+INDEX_NAME = "index.json"
+STAT_CACHE_NAME = "stat_cache.json"
+SETTINGS_NAME = "settings.json"
+COMPRESS_LEVEL = 6
+# A file changed this recently is hashed again even if its (mtime, size) is cached:
+# a second write within the timestamp granularity would not change either
+RACY_SECONDS = 2
+# Manifests kept parsed in memory, for repeated diffs
+MANIFEST_CACHE_SIZE = 16
+# Length of the snapshot ids shown and accepted (full ids work too)
+SHORT_ID = 12
+# Length of a full snapshot id (a SHA-256 hex digest)
+ID_LENGTH = 64
+
+
+def _hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _now_ns():
+    return int(time.time() * 10 ** 9)
+
+
+def scan_tree(root):
+    """{path relative to root with / separators: (mtime ns, size)} for every file under root
+
+    Dot files (the temporary files of atomic writes) are skipped.
+    """
+    found = {}
+    pending = [(Path(root), "")]
+    while pending:
+        directory, prefix = pending.pop()
+        try:
+            iterator = os.scandir(str(directory))
+        except OSError:
+            continue
+        with iterator:
+            for entry in iterator:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append((Path(entry.path), f"{prefix}{entry.name}/"))
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat()
+                    found[prefix + entry.name] = (stat.st_mtime_ns, stat.st_size)
+    return found
+
+
+def tree_id(files):
+    """Snapshot id of a {path: hash} manifest; equal trees get equal ids"""
+    return _hash("".join(f"{path}\0{digest}\n" for path, digest in sorted(files.items())).encode("utf-8"))
+
+
+def diff_manifests(old, new):
+    """(added, removed, changed) paths between two {path: hash} manifests, each sorted"""
+    added = sorted(path for path in new if path not in old)
+    removed = sorted(path for path in old if path not in new)
+    changed = sorted(path for path, digest in new.items() if path in old and old[path] != digest)
+    return added, removed, changed
+
+
+class SnapshotStore:
+    """Snapshots of one config folder, stored under path
+
+    objects/ab/cdef... holds each file version once, zlib-compressed and
+    named by the SHA-256 of its contents. manifests/<id>.json maps every
+    file to its hash, and index.json lists the snapshots in order with
+    their labels, so listing stays fast however many there are. Taking a
+    snapshot only hashes files whose (mtime, size) changed since the last
+    one.
+
+    Methods may be called from several threads; writes are serialised.
+    """
+
+    def __init__(self, path, config_path):
+        self.path = Path(path)
+        self.config_path = Path(config_path)
+        self.objects_path = self.path / OBJECTS_DIR
+        self.manifests_path = self.path / MANIFESTS_DIR
+        self.index_path = self.path / INDEX_NAME
+        self.stat_cache_path = self.path / STAT_CACHE_NAME
+        self.settings_path = self.path / SETTINGS_NAME
+        self._lock = threading.RLock()
+        self._stat_cache = None
+        self._manifests = {}
+
+    # Reading
+
+    def snapshots(self):
+        """Every snapshot, oldest first, as {"number", "id", "created", "label", "files", "bytes"} dicts
+
+        number is unique within the history. id names the tree, so a config
+        that returns to an earlier state (after a restore, or an edit undone
+        by hand) gets a new entry with the id it had then.
+        """
+        try:
+            return json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return []
+
+    def snapshot_before_write(self):
+        """Whether the config is snapshotted before each save (off until turned on)"""
+        try:
+            return bool(json.loads(self.settings_path.read_text(encoding="utf-8")).get("snapshot_before_write"))
+        except (OSError, ValueError, AttributeError):
+            return False
+
+    def find(self, snapshot_id):
+        """The snapshot numbered snapshot_id, or the newest one whose id starts with it; raises KeyError if there is none
+
+        Digits name a snapshot number, as listed, and are never read as an id
+        prefix (a full id still is). A prefix is ambiguous only if it matches
+        different trees.
+        """
+        if snapshot_id.isdigit() and len(snapshot_id) < ID_LENGTH:
+            for entry in self.snapshots():
+                if entry["number"] == int(snapshot_id):
+                    return entry
+            raise KeyError(f"No snapshot number {snapshot_id}")
+        if snapshot_id:
+            ids = {entry["id"] for entry in self.snapshots() if entry["id"].startswith(snapshot_id)}
+            if len(ids) > 1:
+                raise KeyError(f"Snapshot id '{snapshot_id}' is ambiguous")
+            for entry in reversed(self.snapshots()):
+                if entry["id"] in ids:
+                    return entry
+        raise KeyError(f"No snapshot '{snapshot_id}'")
+
+    def manifest(self, snapshot_id):
+        """{path: hash} of a snapshot"""
+        with self._lock:
+            files = self._manifests.get(snapshot_id)
+            if files is None:
+                data = json.loads((self.manifests_path / f"{snapshot_id}.json").read_text(encoding="utf-8"))
+                files = {path: digest for path, (digest, size) in data["files"].items()}
+                if len(self._manifests) >= MANIFEST_CACHE_SIZE:
+                    self._manifests.pop(next(iter(self._manifests)))
+                self._manifests[snapshot_id] = files
+            return files
+
+    def current(self):
+        """({path: hash}, {path: size}) of the config folder as it is now
+
+        Files whose (mtime, size) match the last scan reuse its hash; the
+        others are read, hashed and stored as objects, so every hash in the
+        scan cache has its object.
+        """
+        with self._lock:
+            cache = self._load_stat_cache()
+            racy = _now_ns() - RACY_SECONDS * 10 ** 9
+            files, sizes, new_cache = {}, {}, {}
+            for path, (mtime, size) in scan_tree(self.config_path).items():
+                cached = cache.get(path)
+                if cached is not None and cached[0] == mtime and cached[1] == size and mtime < racy:
+                    digest = cached[2]
+                else:
+                    data = (self.config_path / path).read_bytes()
+                    digest = _hash(data)
+                    size = len(data)
+                    self._store_object(digest, data)
+                files[path] = digest
+                sizes[path] = size
+                new_cache[path] = [mtime, size, digest]
+            if new_cache != cache:
+                self._stat_cache = new_cache
+                self.path.mkdir(parents=True, exist_ok=True)
+                atomic_write_text(self.stat_cache_path, json.dumps(new_cache))
+            return files, sizes
+
+    def read_object(self, digest):
+        """The contents of a stored file version, checked against its hash"""
+        data = zlib.decompress(self._object_path(digest).read_bytes())
+        if _hash(data) != digest:
+            raise ValueError(f"Snapshot object {digest[:SHORT_ID]} is corrupt")
+        return data
+
+    def diff(self, old_id, new_id=None):
+        """(added, removed, changed) from snapshot old_id to snapshot new_id, or to the config folder now"""
+        new = self.manifest(new_id) if new_id else self.current()[0]
+        return diff_manifests(self.manifest(old_id), new)
+
+    # Writing
+
+    def create(self, label="", only_if_changed=True):
+        """Snapshot the config folder; returns (index entry, whether a new snapshot was added)
+
+        With only_if_changed, nothing is added when the folder still matches
+        the newest snapshot.
+        """
+        with self._lock:
+            files, sizes = self.current()
+            snapshot_id = tree_id(files)
+            snapshots = self.snapshots()
+            if only_if_changed and snapshots and snapshots[-1]["id"] == snapshot_id:
+                return snapshots[-1], False
+
+            manifest_path = self.manifests_path / f"{snapshot_id}.json"
+            if not manifest_path.exists():
+                self.manifests_path.mkdir(parents=True, exist_ok=True)
+                atomic_write_text(manifest_path, json.dumps(
+                    {"id": snapshot_id, "files": {path: [digest, sizes[path]] for path, digest in files.items()}}))
+            entry = {
+                "number": snapshots[-1]["number"] + 1 if snapshots else 1,
+                "id": snapshot_id,
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "label": label,
+                "files": len(files),
+                "bytes": sum(sizes.values()),
+            }
+            snapshots.append(entry)
+            atomic_write_text(self.index_path, json.dumps(snapshots, indent=1))
+            return entry, True
+
+    def set_snapshot_before_write(self, enabled):
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self.settings_path, json.dumps({"snapshot_before_write": bool(enabled)}, indent=2))
+
+    def restore(self, snapshot_id, delete_extra=True):
+        """Make the config folder match a snapshot, writing only the files that differ
+
+        Each file is replaced atomically, so the bot never reads a partial
+        one. Files the snapshot does not have are deleted if delete_extra.
+        Returns (paths written, paths deleted).
+        """
+        with self._lock:
+            target = self.manifest(snapshot_id)
+            current = self.current()[0]
+            added, removed, changed = diff_manifests(current, target)
+            # Read every object first, so a missing or corrupt one aborts before anything is written
+            contents = {path: self.read_object(target[path]) for path in added + changed}
+            written = []
+            for path in added + changed:
+                file_path = self.config_path / path
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                atomic_write_bytes(file_path, contents[path])
+                written.append(path)
+            deleted = []
+            if delete_extra:
+                for path in removed:
+                    try:
+                        os.remove(self.config_path / path)
+                        deleted.append(path)
+                    except FileNotFoundError:
+                        pass
+            return written, deleted
+
+    def prune(self, keep):
+        """Drop all but the newest keep snapshots and the objects only they used; returns (snapshots, objects) removed"""
+        with self._lock:
+            snapshots = self.snapshots()
+            if len(snapshots) <= keep:
+                return 0, 0
+            kept = snapshots[-keep:] if keep else []
+            atomic_write_text(self.index_path, json.dumps(kept, indent=1))
+            kept_ids = {entry["id"] for entry in kept}
+            for snapshot_id in {entry["id"] for entry in snapshots} - kept_ids:
+                self._manifests.pop(snapshot_id, None)
+                try:
+                    os.remove(self.manifests_path / f"{snapshot_id}.json")
+                except FileNotFoundError:
+                    pass
+
+            used = set()
+            for snapshot_id in kept_ids:
+                used.update(self.manifest(snapshot_id).values())
+            used.update(entry[2] for entry in self._load_stat_cache().values())
+            removed_objects = 0
+            for directory in self.objects_path.glob("*"):
+                for object_path in directory.glob("*"):
+                    if directory.name + object_path.name not in used:
+                        object_path.unlink()
+                        removed_objects += 1
+            return len(snapshots) - len(kept), removed_objects
+
+    def _object_path(self, digest):
+        return self.objects_path / digest[:2] / digest[2:]
+
+    def _store_object(self, digest, data):
+        object_path = self._object_path(digest)
+        if object_path.exists():
+            return
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        # Objects are named by their contents, so a plain rename is enough: a torn
+        # write is caught by the hash check when the object is read
+        handle, temp_name = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=str(object_path.parent))
+        try:
+            with os.fdopen(handle, "wb") as temp_file:
+                temp_file.write(zlib.compress(data, COMPRESS_LEVEL))
+            os.replace(temp_name, str(object_path))
+        except BaseException:
+            try:
+                os.unlink(temp_name)
+            except OSError:
+                pass
+            raise
+
+    def _load_stat_cache(self):
+        if self._stat_cache is None:
+            try:
+                self._stat_cache = json.loads(self.stat_cache_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._stat_cache = {}
+        return self._stat_cache
@@ -0,0 +1,557 @@
+#!/usr/bin/env python3
+"""
+Craftbot Benchmark
+Times the management window's file paths headlessly against generated
+Control Panel trees of several sizes, and compares the timings with a
+saved baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from config_files import atomic_write_text
+from craftbot_core import DEFAULT_RANKS, CraftbotCore
+from item_names import CACHE_NAME
+from log_file import LogFile, index_path_for
+from log_search import INDEX_NAME
+from log_stats import STATS_NAME
+from trade_store import DATABASE_NAME
+
+# Bumped whenever generated trees change, so trees left from an older version are rebuilt
+GENERATOR_VERSION = 2
+MANIFEST_NAME = "benchmark_tree.json"
+RESULTS_VERSION = 1
+
+# Tree sizes; log sizes are in MB. "large" is the scale the window has to cope with in practice
+PROFILES = {
+    "small": {"recipes": 500, "commands": 500, "players": 5000, "debug_mb": 16, "trade_mb": 8},
+    "medium": {"recipes": 2000, "commands": 2000, "players": 20000, "debug_mb": 128, "trade_mb": 64},
+    "large": {"recipes": 10000, "commands": 5000, "players": 50000, "debug_mb": 1024, "trade_mb": 1024},
+    "huge": {"recipes": 10000, "commands": 5000, "players": 50000, "debug_mb": 5120, "trade_mb": 2048},
+}
+DEFAULT_PROFILES = ["small"]
+DEFAULT_RUNS = 3
+# A benchmark regresses when its median exceeds the baseline median by this fraction...
+DEFAULT_TOLERANCE = 0.25
+# ...and by at least this many seconds, so timer noise on fast paths is not reported
+NOISE_FLOOR = 0.005
+
+# Text searched for: RARE_WORD is on about one line in RARE_EVERY, COMMON_WORD on a fifth of them
+RARE_WORD = "Xylophone"
+RARE_EVERY = 50000
+COMMON_WORD = "queue"
+REGEX_QUERY = r"Duration: 1\d\.\ds"
+# Lines of the last page shown when a log is opened
+PAGE_LINES = 50
+# Bytes of log written at a time while generating
+WRITE_CHUNK_SIZE = 4 * 1024 * 1024
+
+_ITEM_WORDS = ["Ancient", "Bright", "Carbon", "Dark", "Enhanced", "Faded", "Glowing", "Heavy", "Inert", "Jagged",
+               "Kyr'Ozch", "Lush", "Mantis", "Nano", "Omni", "Pure", "Quantum", "Rough", "Soul", "Tarasque"]
+_ITEM_NOUNS = ["Gem", "Fragment", "Crystal", "Hide", "Plate", "Circuit", "Bolt", "Pearl", "Egg", "Shard",
+               "Weave", "Core", "Fang", "Bracer", "Helmet", "Sleeve", "Boots", "Gloves", "Ring", "Tube"]
+_TOOLS = ["Screwdriver", "Jensen Gem Cutter", "Nano Programming Interface", "Clean-Up Kit", "Bio-Comminutor",
+          "Ancient Novictum Refiner", "Hacker ICE-Breaker Source", "Mass Relocating Robot"]
+
+
+# Tree generation
+
+def item_names(rng, count=2000):
+    """A fixed vocabulary of item names, like the ones trades and recipes use"""
+    names = set()
+    while len(names) < count:
+        names.add(f"{rng.choice(_ITEM_WORDS)} {rng.choice(_ITEM_WORDS)} {rng.choice(_ITEM_NOUNS)}")
+    return sorted(names)
+
+
+def player_name(rng):
+    return rng.choice("BCDFGHJKLMNPRSTVZ") + "".join(rng.choice("aeiouyrnlst") for _ in range(rng.randint(4, 10)))
+
+
+def write_recipes(recipes_path, count, rng, items):
+    recipes_path.mkdir(parents=True, exist_ok=True)
+    for number in range(count):
+        steps = []
+        for step_number in range(1, rng.randint(1, 4) + 1):
+            steps.append({
+                "StepNumber": step_number,
+                "Description": f"Step {step_number}",
+                "Tool": rng.choice(_TOOLS),
+                "InputItem": rng.choice(items),
+                "OutputItem": rng.choice(items),
+                "ToolConsumed": False,
+            })
+        recipe = {
+            "Name": f"Recipe {number:05d}",
+            "Description": f"Synthetic recipe {number}",
+            "Enabled": rng.random() < 0.9,
+            "Type": "MultiStep" if len(steps) > 1 else "Simple",
+            "Steps": steps,
+            "ProcessableItems": [steps[0]["InputItem"]],
+            "RequiredTools": sorted({step["Tool"] for step in steps}),
+            "Categories": ["Synthetic"],
+        }
+        (recipes_path / f"recipe_{number:05d}.json").write_text(json.dumps(recipe, indent=2), encoding="utf-8")
+
+
+def write_commands(commands_path, count, rng):
+    commands = [{
+        "Name": f"cmd{number:05d}",
+        "Aliases": [f"c{number}"],
+        "Description": f"Synthetic command {number}",
+        "Response": "Lorem ipsum dolor sit amet, " * rng.randint(1, 6),
+        "Enabled": True,
+        "RequiresParameters": False,
+        "Category": rng.choice(["General", "Trade", "Admin", "Fun"]),
+        "Cooldown": rng.randint(0, 30),
+        "Rank": rng.choice(DEFAULT_RANKS),
+        "ActionType": "Response",
+    } for number in range(count)]
+    settings = {"EnableHotReload": True, "CommandPrefix": "!", "GlobalCooldown": 1}
+    commands_path.write_text(json.dumps({"Commands": commands, "Settings": settings}, indent=2), encoding="utf-8")
+
+
+def write_ranks(ranks_path, players, rng):
+    """The default ranks; User holds most of the players"""
+    ranks_path.mkdir(parents=True, exist_ok=True)
+    names = set()
+    while len(names) < players:
+        names.add(f"{player_name(rng)}{len(names)}")
+    names = list(names)
+    sizes = {"Admin": 5, "Moderator": 50, "VIP": players // 10}
+    for rank in DEFAULT_RANKS:
+        size = sizes.get(rank, players)
+        (ranks_path / f"{rank}.json").write_text(json.dumps({"rank": rank, "players": names[:size]}, indent=2),
+                                                 encoding="utf-8")
+
+
+def _debug_lines(rng, items, players, clock):
+    """About a chunk of debug log lines in the bot's format, starting at clock (seconds)"""
+    lines = []
+    size = 0
+    while size < WRITE_CHUNK_SIZE:
+        clock += rng.randint(0, 2)
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(clock)) + f".{rng.randint(0, 999):03d}"
+        player = rng.choice(players)
+        kind = rng.random()
+        if kind < 0.1:
+            message = f"[DEBUG] [TRADE LOGGER] Completed trade session for {player} (Duration: {rng.uniform(1, 30):.1f}s)"
+        elif kind < 0.3:
+            message = f"[DEBUG] [QUEUE] Added {player} to trade {COMMON_WORD} (position {rng.randint(1, 9)})"
+        elif kind < 0.5:
+            message = (f"[INFO] [RECIPE] [RECIPE MANAGER UNIFIED] Processing loose item {rng.choice(items)} "
+                       f"with Recipe {rng.randint(0, 9999):05d}")
+        else:
+            message = f"[DEBUG] [NETWORK] Heartbeat from {player}, latency {rng.randint(5, 400)} ms"
+        if rng.randrange(RARE_EVERY) == 0:
+            message += f" {RARE_WORD}"
+        line = f"{stamp} {message}\n"
+        lines.append(line)
+        size += len(line)
+    return "".join(lines), clock
+
+
+def _item_section(rng, items, direction, bags, loose):
+    """Bag and loose item lines of one side of a trade, as WriteTradeLogToFile lists them"""
+    lines = []
+    if bags:
+        lines.append(f"Bags {direction} ({len(bags)}):")
+        for bag_name, contents in bags:
+            lines.append(f"  \U0001F4E6 {bag_name}")
+            lines.append(f"     Contents ({len(contents)} items):")
+            lines.extend(f"       - {item}" for item in contents)
+            lines.append("")
+    else:
+        lines.append(f"Bags {direction}: None")
+    if loose:
+        lines.append(f"Loose Items {direction} ({len(loose)}):")
+        lines.extend(f"  - {item}" for item in loose)
+    else:
+        lines.append(f"Loose Items {direction}: None")
+    return lines
+
+
+def _trade_blocks(rng, items, players, clock):
+    """About a chunk of trade log blocks, starting at clock (seconds)
+
+    The layout is exactly what PrivateMessageModule.WriteTradeLogToFile
+    appends with File.AppendAllLines (CRLF line ends on Windows).
+    """
+    blocks = []
+    size = 0
+    while size < WRITE_CHUNK_SIZE:
+        clock += rng.randint(5, 120)
+        player = rng.choice(players)
+        bags = [(f"Backpack {number}", rng.sample(items, rng.randint(1, 6)))
+                for number in range(rng.choice((0, 0, 1, 2)))]
+        loose = rng.sample(items, rng.randint(0, 3))
+        processed = [item for _, contents in bags for item in contents] + loose
+        failed = [rng.choice(processed)] if processed and rng.random() < 0.05 else []
+        block = [
+            "=" * 47,
+            "=== DETAILED TRADE LOG ===",
+            "Date: " + time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(clock)),
+            f"Player: {player} (ID: {rng.randint(1, 2 ** 31 - 1)})",
+            f"Duration: {rng.uniform(1, 60):.1f} seconds",
+            "Status: " + ("Incomplete" if rng.random() < 0.03 else "Completed"),
+            "",
+            "--- ITEMS RECEIVED FROM PLAYER ---",
+        ]
+        block.extend(_item_section(rng, items, "Received", bags, loose))
+        block.append("")
+        block.append("--- ITEMS RETURNED TO PLAYER ---")
+        block.extend(_item_section(rng, items, "Returned", bags, [rng.choice(items) for _ in loose]))
+        if processed:
+            block.append("")
+            block.append("--- PROCESSING DETAILS ---")
+            block.append(f"Items Processed ({len(processed)}):")
+            block.extend(f"  - {item} -> {rng.choice(items)}" for item in processed)
+            if failed:
+                block.append(f"Failed Items ({len(failed)}):")
+                block.extend(f"  - {item}" for item in failed)
+        block.extend(["", "=" * 47, ""])
+        text = "".join(line + "\r\n" for line in block)
+        blocks.append(text)
+        size += len(text)
+    return "".join(blocks), clock
+
+
+def write_log(path, megabytes, generate, rng, items, players):
+    clock = time.mktime((2026, 1, 1, 0, 0, 0, 0, 0, -1))
+    target = int(megabytes * 1024 * 1024)
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as log:
+        while written < target:
+            text, clock = generate(rng, items, players, clock)
+            log.write(text)
+            written += len(text)
+
+
+def generate_tree(root, sizes, seed=0):
+    """Write a synthetic Control Panel tree (config/ and logs/) under root"""
+    rng = random.Random(seed)
+    root = Path(root)
+    if root.exists():
+        shutil.rmtree(root)
+    config_path = root / "config"
+    logs_path = root / "logs"
+    config_path.mkdir(parents=True)
+    logs_path.mkdir()
+    (config_path / "help-templates").mkdir()
+
+    items = item_names(rng)
+    players = [player_name(rng) for _ in range(500)]
+    write_recipes(config_path / "recipes", sizes["recipes"], rng, items)
+    write_commands(config_path / "commands.json", sizes["commands"], rng)
+    write_ranks(config_path / "ranks", sizes["players"], rng)
+    write_log(logs_path / "craftbot_debug.log", sizes["debug_mb"], _debug_lines, rng, items, players)
+    write_log(logs_path / "trade_logs.txt", sizes["trade_mb"], _trade_blocks, rng, items, players)
+    atomic_write_text(root / MANIFEST_NAME, json.dumps({"version": GENERATOR_VERSION, "sizes": sizes,
+                                                        "seed": seed}, indent=2))
+
+
+def ensure_tree(root, sizes, regenerate=False):
+    """Reuse the tree under root if it was generated with the same sizes, else generate it"""
+    try:
+        manifest = json.loads((Path(root) / MANIFEST_NAME).read_text(encoding="utf-8"))
+        if not regenerate and manifest.get("version") == GENERATOR_VERSION and manifest.get("sizes") == sizes:
+            return False
+    except (OSError, ValueError):
+        pass
+    generate_tree(root, sizes)
+    return True
+
+
+def remove_derived_files(logs_path):
+    """Delete the sidecar indexes and databases the window builds next to the logs"""
+    for name in os.listdir(logs_path):
+        if (name.endswith(".idx") or name.startswith((DATABASE_NAME, INDEX_NAME))
+                or name in (CACHE_NAME, STATS_NAME)):
+            os.remove(logs_path / name)
+
+
+# Benchmarks - each is (name, what the window does, setup(tree) -> state, run(state), teardown(state) or None).
+# Only run is timed. A fresh CraftbotCore starts with empty caches, like the window after a start.
+
+def _fresh_core(tree):
+    return CraftbotCore(tree)
+
+
+def _warm_core(call):
+    def setup(tree):
+        core = CraftbotCore(tree)
+        call(core)
+        return core
+    return setup
+
+
+def _log_open(log_name):
+    def setup(tree):
+        path = Path(tree) / "logs" / log_name
+        index_path = index_path_for(path)
+        if index_path.exists():
+            index_path.unlink()
+        return path
+
+    def run(path):
+        # What the viewer does: open, resume the index, index a first chunk and show a page
+        log_file = LogFile(path).open()
+        log_file.load_index()
+        log_file.index_step()
+        log_file.get_lines(0, PAGE_LINES)
+        log_file.close()
+    return setup, run
+
+
+def _log_index(log_name):
+    def setup(tree):
+        path = Path(tree) / "logs" / log_name
+        index_path = index_path_for(path)
+        if index_path.exists():
+            index_path.unlink()
+        return path
+
+    def run(path):
+        # Index to the end and jump to the last page, then save the sidecar
+        log_file = LogFile(path).open()
+        log_file.index_all()
+        log_file.get_lines(max(log_file.line_count - PAGE_LINES, 0), PAGE_LINES)
+        log_file.save_index()
+        log_file.close()
+    return setup, run
+
+
+def _log_reopen(log_name):
+    def setup(tree):
+        path = Path(tree) / "logs" / log_name
+        if not index_path_for(path).exists():
+            _log_index(log_name)[1](path)
+        return path
+
+    def run(path):
+        log_file = LogFile(path).open()
+        log_file.load_index()
+        log_file.get_lines(max(log_file.line_count - PAGE_LINES, 0), PAGE_LINES)
+        log_file.close()
+    return setup, run
+
+
+def _search(text, regex=False, use_index=False, fresh_index=False):
+    def setup(tree):
+        core = CraftbotCore(tree)
+        if fresh_index:
+            for name in os.listdir(core.logs_path):
+                if name.startswith(INDEX_NAME):
+                    os.remove(core.logs_path / name)
+        elif use_index:
+            core.search_logs(text, regex=regex, use_index=True)
+        return core
+
+    def run(core):
+        core.search_logs(text, regex=regex, use_index=use_index)
+    return setup, run
+
+
+def _rank_frame(core):
+    """Read the largest rank and sort it the way VirtualList.set_items does"""
+    players = set(core.read_rank(core.rank_file("User"))[1])
+    return sorted((player.casefold(), player) for player in players)
+
+
+def _fresh_snapshots(tree):
+    core = CraftbotCore(tree)
+    shutil.rmtree(str(core.snapshot_store.path), ignore_errors=True)
+    return core
+
+
+def _snapshotted_core(tree):
+    CraftbotCore(tree).create_snapshot("benchmark")
+    return CraftbotCore(tree)
+
+
+def _snapshot_diff(core):
+    snapshots = core.list_snapshots()
+    return core.diff_snapshots(snapshots[-1]["id"], snapshots[0]["id"])
+
+
+def _restore_setup(tree):
+    """Snapshot the tree, then change one recipe for the restore to put back"""
+    core = _snapshotted_core(tree)
+    recipe_file = core.recipes_path / "recipe_00042.json"
+    recipe_file.write_text(recipe_file.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+    return core, core.list_snapshots()[0]["id"]
+
+
+def _trade_ingest(tree):
+    core = CraftbotCore(tree)
+    for name in os.listdir(core.logs_path):
+        if name.startswith(DATABASE_NAME) or name == CACHE_NAME:
+            os.remove(core.logs_path / name)
+    return core
+
+
+BENCHMARKS = [
+    ("recipes.list", "load_recipes_list", _fresh_core, lambda core: core.read_recipe_names(), None),
+    ("recipes.list_cached", "load_recipes_list (again)", _warm_core(lambda core: core.read_recipe_names()),
+     lambda core: core.read_recipe_names(), None),
+    ("recipes.index", "item names and cross-reference for the recipes tab", _fresh_core,
+     lambda core: core.read_all_recipes(), None),
+    ("commands.list", "load_commands_list", _fresh_core, lambda core: core.read_command_names(), None),
+    ("commands.select", "on_command_select", _fresh_core, lambda core: core.read_command("cmd00042"), None),
+    ("commands.select_cached", "on_command_select (another command)", _warm_core(lambda core: core.read_command_names()),
+     lambda core: core.read_command("cmd00043"), None),
+    ("ranks.list", "setup_ranks_tab", _fresh_core, lambda core: core.read_ranks(), None),
+    ("ranks.frame", "create_rank_frame for the largest rank", _fresh_core, _rank_frame, None),
+    ("logs.list", "load_logs_list", _fresh_core, lambda core: core.read_log_names(), None),
+    ("logs.open_debug", "open craftbot_debug.log in the viewer") + _log_open("craftbot_debug.log") + (None,),
+    ("logs.index_debug", "index craftbot_debug.log to its last page") + _log_index("craftbot_debug.log") + (None,),
+    ("logs.reopen_debug", "reopen craftbot_debug.log from its sidecar index")
+    + _log_reopen("craftbot_debug.log") + (None,),
+    ("logs.index_trades", "index trade_logs.txt to its last page") + _log_index("trade_logs.txt") + (None,),
+    ("logs.search_rare", "search every log for a rare word") + _search(RARE_WORD) + (lambda core: core.close(),),
+    ("logs.search_common", "search every log for a common word (stops at MAX_RESULTS)")
+    + _search(COMMON_WORD) + (lambda core: core.close(),),
+    ("logs.search_regex", "regular expression search of every log")
+    + _search(REGEX_QUERY, regex=True) + (lambda core: core.close(),),
+    ("logs.search_index_build", "first indexed search (builds search_index.db)")
+    + _search(RARE_WORD, use_index=True, fresh_index=True) + (lambda core: core.close(),),
+    ("logs.search_indexed", "indexed search once the index is up to date")
+    + _search(RARE_WORD, use_index=True) + (lambda core: core.close(),),
+    ("trades.ingest", "first trade query (ingests trade_logs.txt)", _trade_ingest,
+     lambda core: core.ingest_trades(), None),
+    ("snapshots.create", "first config snapshot (hashes and stores every file)", _fresh_snapshots,
+     lambda core: core.create_snapshot("benchmark"), None),
+    ("snapshots.create_unchanged", "snapshot before a save when nothing changed", _snapshotted_core,
+     lambda core: core.create_snapshot("benchmark"), None),
+    ("snapshots.diff", "compare the oldest and newest snapshots", _snapshotted_core, _snapshot_diff, None),
+    ("snapshots.restore_one", "restore a snapshot after one recipe changed", _restore_setup,
+     lambda state: state[0].snapshot_store.restore(state[1]), None),
+]
+
+
+def run_benchmarks(tree, runs, selected=None, progress=None):
+    """Time every selected benchmark runs times; returns result dicts"""
+    results = []
+    for name, description, setup, run, teardown in BENCHMARKS:
+        if selected and not any(name == choice or name.startswith(choice + ".") for choice in selected):
+            continue
+        timings = []
+        for _ in range(runs):
+            state = setup(tree)
+            try:
+                started = time.perf_counter()
+                run(state)
+                timings.append(time.perf_counter() - started)
+            finally:
+                if teardown is not None:
+                    teardown(state)
+        result = {
+            "name": name,
+            "description": description,
+            "runs": runs,
+            "median": statistics.median(timings),
+            "min": min(timings),
+            "max": max(timings),
+        }
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    return results
+
+
+def find_regressions(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """(profile, name, baseline median, median) for every result slower than its baseline allows"""
+    previous = {(result["profile"], result["name"]): result["median"] for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get((result["profile"], result["name"]))
+        if before is None:
+            continue
+        if result["median"] > before * (1 + tolerance) and result["median"] - before > NOISE_FLOOR:
+            regressions.append((result["profile"], result["name"], before, result["median"]))
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="craftbot_benchmark",
+                                     description="Time the management window's file paths on generated bot trees")
+    parser.add_argument("--profile", action="append", choices=sorted(PROFILES),
+                        help=f"tree size to run, may be repeated (default: {', '.join(DEFAULT_PROFILES)})")
+    parser.add_argument("--dir", metavar="PATH",
+                        help="where the trees are generated and kept between runs (default: the temp folder)")
+    parser.add_argument("--regenerate", action="store_true", help="generate the trees again even if they exist")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="timed runs per benchmark (median is used)")
+    parser.add_argument("--only", action="append", metavar="NAME",
+                        help="run only this benchmark or group, e.g. logs or recipes.list; may be repeated")
+    parser.add_argument("--output", metavar="FILE", help="write the results as JSON here (default: stdout)")
+    parser.add_argument("--baseline", metavar="FILE", help="results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown over the baseline as a fraction (default %(default)s); "
+                             "exits 1 if any benchmark is slower")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.list:
+        for name, description, *_ in BENCHMARKS:
+            print(f"{name}\t{description}")
+        return 0
+
+    base_dir = Path(args.dir) if args.dir else Path(tempfile.gettempdir()) / "craftbot-benchmark"
+    results = []
+    for profile in args.profile or DEFAULT_PROFILES:
+        tree = base_dir / profile
+        started = time.perf_counter()
+        if ensure_tree(tree, PROFILES[profile], args.regenerate):
+            print(f"[{profile}] generated {tree} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        remove_derived_files(tree / "logs")
+
+        def progress(result, profile=profile):
+            print(f"[{profile}] {result['name']:<26} {result['median'] * 1000:10.1f} ms", file=sys.stderr)
+
+        for result in run_benchmarks(tree, args.runs, args.only, progress):
+            results.append(dict(result, profile=profile))
+
+    report = {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "profiles": {profile: PROFILES[profile] for profile in args.profile or DEFAULT_PROFILES},
+        "tolerance": args.tolerance,
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = find_regressions(results, baseline, args.tolerance)
+        report["regressions"] = [{"profile": profile, "name": name, "baseline": before, "median": after}
+                                 for profile, name, before, after in regressions]
+        for profile, name, before, after in regressions:
+            print(f"REGRESSION [{profile}] {name}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms "
+                  f"(+{(after / before - 1) * 100:.0f}%)", file=sys.stderr)
+        exit_code = 1 if regressions else 0
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        atomic_write_text(args.output, text)
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Craftbot CLI
+Manage ranks and recipes and query logs and trades without a display,
+e.g. from scheduled tasks or over SSH
+"""
+
+import argparse
+import json
+import sys
+
+from config_files import parse_player_names, unique_player_names
+from config_snapshots import SHORT_ID
+from craftbot_core import CraftbotCore
+from log_archive import ROTATED_LOGS, SEGMENT_SIZE
+
+
+def read_player_arguments(args):
+    """Player names from the command line plus an optional list file ("-" for stdin), each player once"""
+    names = list(args.players)
+    if args.file:
+        text = sys.stdin.read() if args.file == "-" else open(args.file, encoding="utf-8-sig").read()
+        names.extend(parse_player_names(text))
+    return unique_player_names(names)
+
+
+def rank_list(core, args):
+    ranks = core.read_ranks()
+    if args.rank is None:
+        for rank_name, players in ranks:
+            print(f"{rank_name}\t{len(players)}")
+        return 0
+    players = dict(ranks).get(args.rank)
+    if players is None:
+        print(f"Rank '{args.rank}' not found", file=sys.stderr)
+        return 1
+    for player in players:
+        print(player)
+    return 0
+
+
+def rank_change(core, args):
+    player_names = read_player_arguments(args)
+    if not player_names:
+        print("No player names given", file=sys.stderr)
+        return 1
+    if not core.rank_file(args.rank).exists():
+        print(f"Rank '{args.rank}' not found", file=sys.stderr)
+        return 1
+    if args.command == "add":
+        players, added, removed = core.write_rank_players(args.rank, add=player_names)
+        print(f"Added {len(added)} players to {args.rank} ({len(player_names) - len(added)} already present)")
+    else:
+        players, added, removed = core.write_rank_players(args.rank, remove=player_names)
+        print(f"Removed {len(removed)} players from {args.rank} ({len(player_names) - len(removed)} not present)")
+    return 0
+
+
+def recipe_list(core, args):
+    for recipe_name, recipe in core.read_all_recipes():
+        if isinstance(recipe, Exception):
+            state = "invalid"
+        else:
+            state = "enabled" if core.recipe_index.enabled(recipe_name) else "disabled"
+        print(f"{recipe_name}\t{state}")
+    return 0
+
+
+def recipe_validate(core, args):
+    issues, recipe_count, name_count = core.check_all_recipes()
+    if args.json:
+        print(json.dumps([{"recipe": recipe, "field": field, "problem": problem}
+                          for recipe, field, problem in issues], indent=2))
+    else:
+        for recipe, field, problem in issues:
+            print(f"{recipe}\t{field}\t{problem}")
+        print(f"{len(issues)} problem(s) in {recipe_count} recipes ({name_count:,} item names known from trades)",
+              file=sys.stderr)
+    return 1 if issues else 0
+
+
+def recipe_uses(core, args):
+    core.refresh_recipe_index()
+    references = core.recipe_index.references(args.item)
+    for recipe_name, field, role in references:
+        print(f"{recipe_name}\t{field}\t{role}")
+    return 0 if references else 1
+
+
+def recipe_conflicts(core, args):
+    core.refresh_recipe_index()
+    conflicts = core.recipe_index.conflicts()
+    for item_name, recipe_names in conflicts:
+        print(f"{item_name}\t{', '.join(recipe_names)}")
+    return 1 if conflicts else 0
+
+
+def logs_list(core, args):
+    log_names = core.read_log_names()
+    if log_names is None:
+        print(f"Logs path not found: {core.logs_path}", file=sys.stderr)
+        return 1
+    for log_name in log_names:
+        print(log_name)
+    return 0
+
+
+def logs_grep(core, args):
+    import re
+    from log_search import compile_query
+
+    try:
+        compile_query(args.pattern, args.regex, args.match_case)
+    except re.error as e:
+        print(f"Invalid regular expression: {e}", file=sys.stderr)
+        return 2
+
+    printed = 0
+
+    def progress(matches):
+        nonlocal printed
+        for log_name, line_number, timestamp, text in matches:
+            if args.limit and printed >= args.limit:
+                return False
+            print(f"{log_name}:{line_number + 1}:{text}")
+            printed += 1
+        return not (args.limit and printed >= args.limit)
+
+    try:
+        core.search_logs(args.pattern, regex=args.regex, match_case=args.match_case, use_index=args.index,
+                         progress=progress)
+    finally:
+        core.close()
+    return 0 if printed else 1
+
+
+def logs_rotate(core, args):
+    rotated = core.rotate_logs(args.logs or ROTATED_LOGS, max_bytes=int(args.segment_mb * 1024 * 1024),
+                               by_day=args.by_day, min_bytes=int(args.min_mb * 1024 * 1024))
+    for log_name, segments in rotated.items():
+        if segments:
+            print(f"{log_name}: {len(segments)} segment(s) - {', '.join(segment.name for segment in segments)}")
+        else:
+            print(f"{log_name}: not rotated")
+    return 0
+
+
+def trades_stats(core, args):
+    from trade_store import parse_date_filter
+
+    try:
+        filters = {
+            "player": args.player,
+            "item": args.item,
+            "date_from": parse_date_filter(args.date_from or ""),
+            "date_to": parse_date_filter(args.date_to or "", end_of_range=True),
+            "failed_only": args.failed_only,
+        }
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    store = core.ingest_trades()
+    trade_count, processed, failed = store.summary(**filters)
+    if args.json:
+        print(json.dumps({"trades": trade_count, "items_processed": processed, "items_failed": failed}))
+    else:
+        print(f"{trade_count:,} trades - {processed:,} items processed, {failed:,} failed")
+    return 0
+
+
+def print_changes(added, removed, changed):
+    for marker, paths in (("A", added), ("D", removed), ("M", changed)):
+        for path in paths:
+            print(f"{marker}\t{path}")
+
+
+def snapshot_list(core, args):
+    for entry in core.list_snapshots():
+        print(f"{entry['number']}\t{entry['id'][:SHORT_ID]}\t{entry['created']}\t{entry['files']} files\t{entry['label']}")
+    return 0
+
+
+def snapshot_create(core, args):
+    entry, created = core.create_snapshot(args.label)
+    if created:
+        print(f"Created snapshot {entry['id'][:SHORT_ID]} ({entry['files']} files)")
+    else:
+        print(f"Config unchanged since snapshot {entry['id'][:SHORT_ID]}")
+    return 0
+
+
+def snapshot_diff(core, args):
+    try:
+        if args.file:
+            print(core.diff_snapshot_file(args.old, args.new, args.file), end="")
+            return 0
+        added, removed, changed = core.diff_snapshots(args.old, args.new)
+    except KeyError as e:
+        print(e.args[0], file=sys.stderr)
+        return 2
+    print_changes(added, removed, changed)
+    return 1 if added or removed or changed else 0
+
+
+def snapshot_restore(core, args):
+    try:
+        entry, written, deleted = core.restore_snapshot(args.id, delete_extra=not args.keep_extra)
+    except KeyError as e:
+        print(e.args[0], file=sys.stderr)
+        return 2
+    print(f"Restored snapshot {entry['number']} ({entry['id'][:SHORT_ID]}): {len(written)} file(s) written, {len(deleted)} deleted")
+    return 0
+
+
+def snapshot_auto(core, args):
+    if args.state is not None:
+        core.set_snapshot_before_write(args.state == "on")
+    state = "on" if core.snapshot_store.snapshot_before_write() else "off"
+    print(f"Snapshot before each config save: {state}")
+    return 0
+
+
+def snapshot_prune(core, args):
+    snapshots, objects = core.prune_snapshots(args.keep)
+    print(f"Removed {snapshots} snapshot(s) and {objects} stored file version(s)")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="craftbot_cli", description="Manage a Craftbot install without the window")
+    parser.add_argument("--control-panel", metavar="PATH",
+                        help="bot Control Panel folder holding config/ and logs/ (default: found like the window does)")
+    groups = parser.add_subparsers(dest="group", metavar="{rank,recipe,logs,trades,snapshot}")
+    groups.required = True
+
+    rank = groups.add_parser("rank", help="list and change rank members").add_subparsers(dest="command")
+    rank.required = True
+    command = rank.add_parser("list", help="list ranks, or the players of one rank")
+    command.add_argument("rank", nargs="?")
+    command.set_defaults(handler=rank_list)
+    for name, verb in (("add", "add players to"), ("remove", "remove players from")):
+        command = rank.add_parser(name, help=f"{verb} a rank in one write")
+        command.add_argument("rank")
+        command.add_argument("players", nargs="*")
+        command.add_argument("--file", metavar="FILE",
+                             help="also read names from a .txt/.csv player list (- for stdin)")
+        command.set_defaults(handler=rank_change)
+
+    recipe = groups.add_parser("recipe", help="check recipes").add_subparsers(dest="command")
+    recipe.required = True
+    recipe.add_parser("list", help="list recipes and whether they are enabled").set_defaults(handler=recipe_list)
+    command = recipe.add_parser("validate", help="check recipes against the bot's schema and item names against the trade history; exits 1 on problems")
+    command.add_argument("--json", action="store_true")
+    command.set_defaults(handler=recipe_validate)
+    command = recipe.add_parser("uses", help="recipes that process, need or produce an item")
+    command.add_argument("item")
+    command.set_defaults(handler=recipe_uses)
+    recipe.add_parser("conflicts", help="items claimed by more than one enabled recipe").set_defaults(
+        handler=recipe_conflicts)
+
+    logs = groups.add_parser("logs", help="list and search logs").add_subparsers(dest="command")
+    logs.required = True
+    logs.add_parser("list", help="list log files, newest first").set_defaults(handler=logs_list)
+    command = logs.add_parser("grep", help="search every log; prints file:line:text")
+    command.add_argument("pattern")
+    command.add_argument("-E", "--regex", action="store_true", help="pattern is a regular expression")
+    command.add_argument("-c", "--match-case", action="store_true")
+    command.add_argument("--index", action="store_true", help="use the word index (logs/search_index.db)")
+    command.add_argument("--limit", type=int, default=0, help="stop after this many lines")
+    command.set_defaults(handler=logs_grep)
+    command = logs.add_parser("rotate", help="archive live logs into gzip segments (the bot keeps logging)")
+    command.add_argument("logs", nargs="*", help="log file names (default: the debug, trade and alien armor logs)")
+    command.add_argument("--segment-mb", type=float, default=SEGMENT_SIZE // (1024 * 1024),
+                         help="uncompressed MB per segment (default %(default)s)")
+    command.add_argument("--by-day", action="store_true", help="also start a new segment for each day")
+    command.add_argument("--min-mb", type=float, default=0, help="skip logs smaller than this")
+    command.set_defaults(handler=logs_rotate)
+
+    trades = groups.add_parser("trades", help="query the trade history").add_subparsers(dest="command")
+    trades.required = True
+    command = trades.add_parser("stats", help="totals for the matching trades")
+    command.add_argument("--player")
+    command.add_argument("--item")
+    command.add_argument("--from", dest="date_from", metavar="DATE")
+    command.add_argument("--to", dest="date_to", metavar="DATE")
+    command.add_argument("--failed-only", action="store_true")
+    command.add_argument("--json", action="store_true")
+    command.set_defaults(handler=trades_stats)
+
+    snapshot = groups.add_parser("snapshot", help="take, compare and restore snapshots of config/").add_subparsers(
+        dest="command")
+    snapshot.required = True
+    snapshot.add_parser("list", help="list snapshots, newest first").set_defaults(handler=snapshot_list)
+    command = snapshot.add_parser("create", help="snapshot config/ unless it matches the newest snapshot")
+    command.add_argument("label", nargs="?", default="")
+    command.set_defaults(handler=snapshot_create)
+    command = snapshot.add_parser("diff", help="files added (A), deleted (D) or modified (M) between two snapshots, "
+                                              "or since one; exits 1 if any")
+    command.add_argument("old", help="snapshot number or id prefix, as listed")
+    command.add_argument("new", nargs="?", help="default: config/ as it is now")
+    command.add_argument("--file", metavar="PATH", help="print a unified diff of this config file instead")
+    command.set_defaults(handler=snapshot_diff)
+    command = snapshot.add_parser("restore", help="make config/ match a snapshot, writing only the files that "
+                                                 "differ (config/ is snapshotted first)")
+    command.add_argument("id", help="snapshot number or id prefix, as listed")
+    command.add_argument("--keep-extra", action="store_true", help="keep files the snapshot does not have")
+    command.set_defaults(handler=snapshot_restore)
+    command = snapshot.add_parser("auto", help="show, or turn on or off, a snapshot before every config save "
+                                               "by the window, the command line or a Fleet push")
+    command.add_argument("state", nargs="?", choices=["on", "off"])
+    command.set_defaults(handler=snapshot_auto)
+    command = snapshot.add_parser("prune", help="delete all but the newest snapshots")
+    command.add_argument("--keep", type=int, required=True)
+    command.set_defaults(handler=snapshot_prune)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    core = CraftbotCore(args.control_panel)
+    try:
+        return args.handler(core, args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
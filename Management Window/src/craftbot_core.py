@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Craftbot Core
+Config, rank, recipe, log and trade file logic shared by the management
+window and the command line
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+
+from config_cache import ConfigCache, file_signature, parse_commands
+from config_files import apply_player_changes, atomic_write_text
+from config_snapshots import SHORT_ID, SNAPSHOTS_DIR, SnapshotStore
+from log_archive import ROTATED_LOGS, SEGMENT_SIZE, list_segments, rotate_log, segment_log_name
+from recipe_index import RecipeIndex
+
+logger = logging.getLogger(__name__)
+
+# sqlite3, difflib and the log search process pool are imported by the methods
+# that need them, so commands that don't touch logs or trades start quickly
+
+DEFAULT_RANKS = ["Admin", "Moderator", "VIP", "User"]
+# Logs listed first when they exist, before any other .log/.txt file
+KNOWN_LOGS = ["alien_armor.log", "craftbot_debug.log", "trade_logs.txt"]
+LOG_SUFFIXES = (".log", ".txt")
+
+
+def find_control_panel():
+    """The bot's Control Panel folder, which holds config/ and logs/"""
+    script_file = Path(__file__)
+
+    # Check if we're in bin/Debug/Control Panel (copied location)
+    if script_file.parent.name == "Control Panel":
+        return script_file.parent
+    # We're in Management Window/src (original location)
+    script_dir = script_file.parent.parent.parent  # Go up to Craftbot root
+    return script_dir / "bin" / "Debug" / "Control Panel"
+
+
+def resolve_control_panel(path):
+    """The Control Panel folder of a bot, given either that folder or the bot's root folder"""
+    path = Path(path)
+    nested = path / "bin" / "Debug" / "Control Panel"
+    if not (path / "config").is_dir() and nested.is_dir():
+        return nested
+    return path
+
+
+def is_log_file(path):
+    """True for a log, or a gzip segment archived from one"""
+    return path.suffix in LOG_SUFFIXES or segment_log_name(path) is not None
+
+
+class CraftbotCore:
+    """The files of one bot install; every method may run on a worker thread
+
+    Methods that write are meant to be called from a single writer thread
+    (or a single command), so read-modify-write cycles don't interleave.
+    """
+
+    def __init__(self, control_panel=None):
+        control_panel = Path(control_panel) if control_panel is not None else find_control_panel()
+        self.control_panel = control_panel
+        self.config_path = control_panel / "config"
+        self.logs_path = control_panel / "logs"
+        self.recipes_path = self.config_path / "recipes"
+        self.ranks_path = self.config_path / "ranks"
+        self.help_templates_path = self.config_path / "help-templates"
+        self.commands_path = self.config_path / "commands.json"
+        self.trade_log_path = self.logs_path / "trade_logs.txt"
+
+        # Parsed config files and listings, reused until they change on disk
+        self.config_cache = ConfigCache()
+        # (mtime, size) of the files last written here, so our own saves can be told from outside changes
+        self.written_signatures = {}
+        # Cross-reference of every recipe file
+        self.recipe_index = RecipeIndex()
+        # History of the config folder
+        self.snapshot_store = SnapshotStore(control_panel / SNAPSHOTS_DIR, self.config_path)
+        # Called with the exception when a snapshot before a write fails; the write goes ahead
+        self.on_snapshot_error = None
+
+        # Opened the first time they are needed
+        self._lock = threading.Lock()
+        self._trade_store = None
+        self._item_name_database = None
+        self._log_searcher = None
+        self._log_stats = None
+
+    def close(self):
+        """Stop the log search processes, if any were started"""
+        if self._log_searcher is not None:
+            self._log_searcher.shutdown()
+
+    # Config files
+
+    def write_config_file(self, path, content):
+        """Atomically replace a config file and drop its cached copy
+
+        The bot may read config files at any moment, so they are never
+        written in place. The config is snapshotted first if that is turned on.
+        """
+        self.snapshot_before_write(f"saving {self.config_name(path)}")
+        atomic_write_text(path, content)
+        self.config_cache.invalidate(path)
+        self.written_signatures[path] = file_signature(path)
+
+    def delete_config_file(self, path):
+        """Delete a config file and drop its cached copy; the config is snapshotted first if that is turned on"""
+        self.snapshot_before_write(f"deleting {self.config_name(path)}")
+        path.unlink()
+        self.config_cache.invalidate(path)
+
+    def read_editor_file(self, path):
+        """Return (text, file (mtime, size)) for an editor, or None if the file is gone"""
+        signature = file_signature(path)
+        content = self.config_cache.read_text(path)
+        return None if content is None else (content, signature)
+
+    def prepare_directories(self):
+        """Create the config directories and default ranks"""
+        self.ranks_path.mkdir(parents=True, exist_ok=True)
+        self.help_templates_path.mkdir(parents=True, exist_ok=True)
+
+        # Create default ranks if they don't exist
+        self.create_default_ranks()
+
+    def create_default_ranks(self):
+        """Create default rank files if they don't exist"""
+        for rank in DEFAULT_RANKS:
+            rank_file = self.ranks_path / f"{rank}.json"
+            if not rank_file.exists():
+                atomic_write_text(rank_file, json.dumps({"rank": rank, "players": []}, indent=2))
+
+    # Recipes
+
+    def recipe_files(self):
+        return [recipe_file for recipe_file in self.config_cache.list_files(self.recipes_path, "*.json")
+                if recipe_file.name != "_template.json"]
+
+    def read_recipe_names(self):
+        """List recipe names in config/recipes"""
+        return [recipe_file.stem for recipe_file in self.recipe_files()]
+
+    def refresh_recipe_index(self):
+        """Reindex the recipe files that changed since the last refresh"""
+        return self.recipe_index.refresh(self.recipe_files(), self.config_cache.load)
+
+    def read_all_recipes(self):
+        """(recipe name, parsed recipe or the JSON error) for every recipe"""
+        self.refresh_recipe_index()
+        return self.recipe_index.recipes()
+
+    def write_recipe(self, recipe_file, content):
+        """Save a recipe and reindex just that file"""
+        self.write_config_file(recipe_file, content)
+        self.recipe_index.refresh_file(recipe_file, self.config_cache.load)
+
+    def read_trade_item_names(self):
+        """Item names seen in trades, after ingesting new trade log blocks"""
+        self.ingest_trades()
+        return self._item_name_database.get()
+
+    def read_item_names(self):
+        """Names offered by autocomplete: traded items plus items the recipes use"""
+        from item_names import ItemNameIndex
+
+        names = list(self.read_trade_item_names().names)
+        self.refresh_recipe_index()
+        names.extend(self.recipe_index.item_names())
+        return ItemNameIndex(names)
+
+    def check_all_recipes(self):
+        """Return (issues, recipe count, traded name count) for every recipe
+
+        Recipes are checked against the bot's recipe schema as well as for
+        unknown item names.
+        """
+        from config_schema import RECIPE_SCHEMA, check_document
+        from item_names import validate_recipes
+
+        trade_names = self.read_trade_item_names()
+        recipes = self.read_all_recipes()
+        issues = validate_recipes(recipes, trade_names)
+        for recipe_name, recipe in recipes:
+            if isinstance(recipe, Exception):
+                continue
+            content = self.config_cache.read_text(self.recipes_path / f"{recipe_name}.json")
+            if content is not None:
+                issues.extend((recipe_name, path, message)
+                              for start, end, severity, path, message in check_document(content, RECIPE_SCHEMA))
+        return issues, len(recipes), len(trade_names)
+
+    # Commands and help templates
+
+    def read_command_names(self):
+        """Read command names sorted alphabetically"""
+        try:
+            commands = self.config_cache.load(self.commands_path, parse_commands)
+            if commands is not None:
+                return commands.names
+        except (OSError, ValueError):
+            pass
+        return []
+
+    def read_command(self, cmd_name):
+        """Look up a command in commands.json; returns (JSON text, file (mtime, size))"""
+        try:
+            signature = file_signature(self.commands_path)
+            commands = self.config_cache.load(self.commands_path, parse_commands)
+            if commands is not None and cmd_name in commands.by_name:
+                return json.dumps(commands.by_name[cmd_name], indent=2), signature
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def write_command(self, updated_cmd):
+        """Replace a command in commands.json"""
+        data = json.loads(self.commands_path.read_text(encoding="utf-8-sig"))
+
+        for i, cmd in enumerate(data.get("Commands", [])):
+            if cmd.get("Name") == updated_cmd.get("Name"):
+                data["Commands"][i] = updated_cmd
+                break
+
+        self.write_config_file(self.commands_path, json.dumps(data, indent=2))
+
+    def read_help_template_names(self):
+        """List help template file names"""
+        return [template_file.name for template_file in self.config_cache.list_files(self.help_templates_path)]
+
+    # Config snapshots
+
+    def config_name(self, path):
+        """A config file's path relative to config/, with / separators"""
+        try:
+            return Path(path).relative_to(self.config_path).as_posix()
+        except ValueError:
+            return str(path)
+
+    def snapshot_before_write(self, description):
+        """Snapshot the config before a change, if turned on and the config changed since the last snapshot
+
+        Turned on per bot with set_snapshot_before_write; it costs a scan of
+        config/ on every save. A snapshot that cannot be written is reported
+        to on_snapshot_error (or logged) and does not stop the change.
+        """
+        if not self.snapshot_store.snapshot_before_write():
+            return
+        try:
+            self.snapshot_store.create(f"Before {description}")
+        except (OSError, ValueError) as e:
+            if self.on_snapshot_error is not None:
+                self.on_snapshot_error(e)
+            else:
+                logger.error("Config snapshot before %s failed: %r", description, e, exc_info=e)
+
+    def set_snapshot_before_write(self, enabled):
+        self.snapshot_store.set_snapshot_before_write(enabled)
+
+    def create_snapshot(self, label=""):
+        """Snapshot the config folder; returns (index entry, whether a new snapshot was added)"""
+        return self.snapshot_store.create(label)
+
+    def list_snapshots(self):
+        """Every snapshot, newest first"""
+        return list(reversed(self.snapshot_store.snapshots()))
+
+    def diff_snapshots(self, old_id, new_id=None):
+        """(added, removed, changed) config paths from one snapshot to another, or to the config now"""
+        old = self.snapshot_store.find(old_id)["id"]
+        new = self.snapshot_store.find(new_id)["id"] if new_id else None
+        return self.snapshot_store.diff(old, new)
+
+    def diff_snapshot_file(self, old_id, new_id, path):
+        """Unified diff of one config file between two snapshots (new_id None: the file now)"""
+        import difflib
+
+        old_id = self.snapshot_store.find(old_id)["id"]
+        new_id = self.snapshot_store.find(new_id)["id"] if new_id else None
+
+        def lines(snapshot_id):
+            if snapshot_id is None:
+                file_path = self.config_path / path
+                data = file_path.read_bytes() if file_path.exists() else b""
+            else:
+                digest = self.snapshot_store.manifest(snapshot_id).get(path)
+                data = self.snapshot_store.read_object(digest) if digest else b""
+            return data.decode("utf-8-sig", errors="replace").splitlines(keepends=True)
+
+        new_name = new_id[:SHORT_ID] if new_id else "current"
+        return "".join(difflib.unified_diff(lines(old_id), lines(new_id), f"{old_id[:SHORT_ID]}/{path}",
+                                            f"{new_name}/{path}"))
+
+    def restore_snapshot(self, snapshot_id, delete_extra=True):
+        """Make config/ match a snapshot, after snapshotting it as it is now
+
+        Only files that differ are written, each atomically. Returns
+        (snapshot entry, paths written, paths deleted).
+        """
+        entry = self.snapshot_store.find(snapshot_id)
+        self.snapshot_store.create(f"Before restoring {entry['id'][:SHORT_ID]}")
+        written, deleted = self.snapshot_store.restore(entry["id"], delete_extra)
+        for path in written + deleted:
+            self.config_cache.invalidate(self.config_path / path)
+        return entry, written, deleted
+
+    def prune_snapshots(self, keep):
+        """Keep only the newest snapshots; returns (snapshots, stored file versions) removed"""
+        return self.snapshot_store.prune(keep)
+
+    # Ranks
+
+    def rank_file(self, rank_name):
+        return self.ranks_path / f"{rank_name}.json"
+
+    def read_ranks(self):
+        """Read every rank file as (rank name, players) pairs"""
+        ranks = []
+        if self.ranks_path.exists():
+            for rank_file in self.config_cache.list_files(self.ranks_path, "*.json"):
+                data = self.config_cache.load(rank_file)
+                if data is not None:
+                    ranks.append((rank_file.stem, list(data.get("players", []))))
+        return ranks
+
+    def read_rank(self, rank_file):
+        """Read one rank file as (rank name, players), or None if it is gone"""
+        data = self.config_cache.load(rank_file)
+        if data is None:
+            return None
+        return rank_file.stem, list(data.get("players", []))
+
+    def write_rank_players(self, rank_name, add=(), remove=()):
+        """Apply one batched change to a rank file with a single write
+
+        Returns (players now in the rank, players added, players removed). The
+        file is left untouched if nothing changes.
+        """
+        rank_file = self.rank_file(rank_name)
+        data = json.loads(rank_file.read_text(encoding="utf-8-sig"))
+        players, added, removed = apply_player_changes(data.get("players", []), add, remove)
+        if added or removed:
+            data["players"] = players
+            self.write_config_file(rank_file, json.dumps(data, indent=2))
+        return players, added, removed
+
+    def write_players_moved(self, source_rank, target_rank, player_names):
+        """Move players between two rank files, one write per file
+
+        Only players actually in the source rank are moved. Returns
+        {rank name: (players, added, removed)} for both ranks.
+        """
+        source = self.write_rank_players(source_rank, remove=player_names)
+        target = self.write_rank_players(target_rank, add=source[2])
+        return {source_rank: source, target_rank: target}
+
+    def write_rank_created(self, rank_name):
+        """Create an empty rank file; returns False if it already exists"""
+        rank_file = self.rank_file(rank_name)
+        if rank_file.exists():
+            return False
+        self.write_config_file(rank_file, json.dumps({"rank": rank_name, "players": []}, indent=2))
+        return True
+
+    # Logs
+
+    def read_log_names(self):
+        """List log file names (archived segments included) newest first, or None if the logs folder is missing"""
+        if not self.logs_path.exists():
+            return None
+
+        # Look for specific log files
+        log_files = []
+        for pattern in KNOWN_LOGS:
+            log_file = self.logs_path / pattern
+            if log_file.exists():
+                log_files.append(log_file)
+
+        # Also add any other .log and .txt files and archived segments
+        for log_file in sorted(self.logs_path.glob("*.*")):
+            if log_file.is_file() and log_file not in log_files:
+                if is_log_file(log_file):
+                    log_files.append(log_file)
+
+        # Sort by modification time (newest first)
+        log_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+        return [log_file.name for log_file in log_files]
+
+    def search_logs(self, text, regex=False, match_case=False, use_index=False, progress=None):
+        """Search all listed logs; returns (found, truncated, indexed)"""
+        with self._lock:
+            if self._log_searcher is None:
+                from log_search import LogSearcher
+                self._log_searcher = LogSearcher(self.logs_path)
+        log_names = self.read_log_names() or []
+        return self._log_searcher.search([self.logs_path / name for name in log_names], text,
+                                         regex=regex, match_case=match_case, use_index=use_index, progress=progress)
+
+    def rotate_logs(self, log_names=ROTATED_LOGS, max_bytes=SEGMENT_SIZE, by_day=False, min_bytes=1):
+        """Archive live logs of at least min_bytes into gzip segments; returns {log name: segments}"""
+        return {log_name: rotate_log(self.logs_path / log_name, max_bytes, by_day, min_bytes)
+                for log_name in log_names}
+
+    def update_log_stats(self):
+        """Parse newly logged data into the running statistics and return their report"""
+        with self._lock:
+            if self._log_stats is None:
+                from log_stats import LogStats
+                self._log_stats = LogStats(self.logs_path)
+        return self._log_stats.update()
+
+    # Trades
+
+    def get_trade_store(self):
+        """Open the trade database next to trade_logs.txt"""
+        with self._lock:
+            if self._trade_store is None:
+                from item_names import CACHE_NAME, ItemNameDatabase
+                from trade_store import DATABASE_NAME, TradeStore
+
+                self.logs_path.mkdir(parents=True, exist_ok=True)
+                self._trade_store = TradeStore(self.logs_path / DATABASE_NAME)
+                self._item_name_database = ItemNameDatabase(self._trade_store, self.logs_path / CACHE_NAME)
+            return self._trade_store
+
+    def ingest_trades(self):
+        """Ingest new trade log blocks from the archived segments and the live log; returns the store"""
+        store = self.get_trade_store()
+        for segment in list_segments(self.logs_path, self.trade_log_path.name):
+            store.ingest(segment)
+        store.ingest(self.trade_log_path)
+        return store
+
+    def query_trades(self, filters):
+        """Ingest new trade log blocks, then return (trades, (trade count, processed, failed))"""
+        store = self.ingest_trades()
+        return store.query(**filters), store.summary(**filters)
+
+    def trade_items(self, trade_id):
+        return self.get_trade_store().trade_items(trade_id)
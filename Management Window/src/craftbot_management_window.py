@@ -5,38 +5,71 @@ A comprehensive GUI for managing Craftbot recipes, commands, ranks, and logs
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext, simpledialog
+from tkinter import ttk, messagebox, scrolledtext, simpledialog, filedialog
 import json
+import logging
+import re
 from pathlib import Path
 
+from autocomplete import ItemAutocomplete
+from background_io import BackgroundIO
+from config_files import atomic_write_text, format_player_names, parse_player_names
+from config_schema import COMMAND_SCHEMA, RECIPE_SCHEMA
+from config_snapshots import SHORT_ID
+from craftbot_core import CraftbotCore, is_log_file
+from file_watcher import FileWatcher
+from instrumentation import traced, tracer
+from live_validation import SAVE_PROBLEMS_SHOWN, LiveValidation
+from log_archive import ROTATED_LOGS, SEGMENT_SIZE
+from fleet import FLEET_FILE, Fleet, bot_name, load_fleet, save_fleet
+from log_search import MAX_RESULTS, compile_query
+from log_viewer import PagedLogViewer
+from trade_store import parse_date_filter
+from virtual_list import VirtualList
+
+logger = logging.getLogger(__name__)
+
 class CraftbotManagementWindow:
     def __init__(self, root):
         self.root = root
         self.root.title("Craftbot Management Window")
         self.root.geometry("1200x700")
 
-        # Set up paths - find the Control Panel directory
-        script_file = Path(__file__)
+        # File and JSON logic, shared with the command line (craftbot_cli.py)
+        self.core = CraftbotCore()
+        self.config_path = self.core.config_path
+        self.logs_path = self.core.logs_path
+        self.recipes_path = self.core.recipes_path
+        self.ranks_path = self.core.ranks_path
+        self.help_templates_path = self.core.help_templates_path
 
-        # Check if we're in bin/Debug/Control Panel (copied location)
-        if script_file.parent.name == "Control Panel":
-            control_panel = script_file.parent
-        else:
-            # We're in Management Window/src (original location)
-            script_dir = script_file.parent.parent.parent  # Go up to Craftbot root
-            control_panel = script_dir / "bin" / "Debug" / "Control Panel"
+        # Status bar - shows what is currently loading in the background
+        self.status_var = tk.StringVar()
+        status_frame = ttk.Frame(root)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=5)
+        ttk.Label(status_frame, textvariable=self.status_var, anchor=tk.W).pack(side=tk.LEFT, fill=tk.X, expand=True)
 
-        self.config_path = control_panel / "config"
-        self.logs_path = control_panel / "logs"
-        self.ranks_path = self.config_path / "ranks"
-        self.help_templates_path = self.config_path / "help-templates"
+        # Handler timing, off unless CRAFTBOT_TRACE=1 or toggled with Ctrl+Shift+T
+        self.trace_var = tk.StringVar()
+        self.trace_frame = ttk.Frame(status_frame)
+        ttk.Label(self.trace_frame, textvariable=self.trace_var, anchor=tk.E).pack(side=tk.LEFT)
+        ttk.Button(self.trace_frame, text="Export Trace...", command=self.export_trace).pack(side=tk.LEFT, padx=5)
+        tracer.on_slow = lambda operation: self.trace_var.set(f"Last slow: {operation.describe()}")
+        self.root.bind("<Control-T>", self.toggle_tracing)
+        self.show_tracing()
 
-        # Ensure directories exist
-        self.ranks_path.mkdir(parents=True, exist_ok=True)
-        self.help_templates_path.mkdir(parents=True, exist_ok=True)
+        # All file I/O runs on worker threads; results come back through root.after
+        self.io = BackgroundIO(root, on_status=self.status_var.set,
+                               on_error=self.report_error("Background task failed"))
+        # Snapshots before saves run on the writer thread
+        self.core.on_snapshot_error = lambda error: self.io.post(
+            self.report_error("Config snapshot before save failed"), error)
 
-        # Create default ranks if they don't exist
-        self.create_default_ranks()
+        # Files open in an editor: text widget -> (path, (mtime, size) shown, reload)
+        self.editor_files = {}
+        # Schema checks of the JSON editors: text widget -> LiveValidation
+        self.live_validations = {}
+        self.snapshots_dialog = None
 
         # Create notebook (tabs)
         self.notebook = ttk.Notebook(root)
@@ -48,33 +81,108 @@ class CraftbotManagementWindow:
         self.commands_tab = ttk.Frame(self.notebook)
         self.ranks_tab = ttk.Frame(self.notebook)
         self.logs_tab = ttk.Frame(self.notebook)
+        self.trades_tab = ttk.Frame(self.notebook)
+        self.stats_tab = ttk.Frame(self.notebook)
+        self.fleet_tab = ttk.Frame(self.notebook)
 
         self.notebook.add(self.recipes_tab, text="Recipes")
         self.notebook.add(self.help_menu_tab, text="Help Menu")
         self.notebook.add(self.commands_tab, text="Commands")
         self.notebook.add(self.ranks_tab, text="Ranks")
         self.notebook.add(self.logs_tab, text="Logs")
+        self.notebook.add(self.trades_tab, text="Trades")
+        self.notebook.add(self.stats_tab, text="Stats")
+        self.notebook.add(self.fleet_tab, text="Fleet")
 
-        # Initialize tabs
-        self.setup_recipes_tab()
-        self.setup_help_menu_tab()
-        self.setup_commands_tab()
-        self.setup_ranks_tab()
-        self.setup_logs_tab()
+        # Tabs are built the first time they are shown, so the window opens without loading every list
+        self.tab_setups = {
+            str(self.recipes_tab): self.setup_recipes_tab,
+            str(self.help_menu_tab): self.setup_help_menu_tab,
+            str(self.commands_tab): self.setup_commands_tab,
+            str(self.ranks_tab): self.setup_ranks_tab,
+            str(self.logs_tab): self.setup_logs_tab,
+            str(self.trades_tab): self.setup_trades_tab,
+            str(self.stats_tab): self.setup_stats_tab,
+            str(self.fleet_tab): self.setup_fleet_tab,
+        }
+        self.built_tabs = set()
+        self.build_tab(self.recipes_tab)
+
+        # Ensure directories and default ranks exist, then show the ranks and watch for changes
+        self.directories_ready = False
+        self.file_watcher = FileWatcher(
+            lambda changes: self.io.post(self.on_files_changed, changes),
+            on_error=lambda error: self.io.post(self.report_error("File change handler failed"), error))
+        self.io.submit_write(self.core.prepare_directories, on_done=lambda result: self.start_watching())
 
         # Bind tab change event to auto-reload lists
         self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
-    
-    def create_default_ranks(self):
-        """Create default rank files if they don't exist"""
-        default_ranks = ["Admin", "Moderator", "VIP", "User"]
-        for rank in default_ranks:
-            rank_file = self.ranks_path / f"{rank}.json"
-            if not rank_file.exists():
-                rank_file.write_text(json.dumps({"rank": rank, "players": []}, indent=2))
-    
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self):
+        """Release open files and let pending saves finish before exiting"""
+        self.file_watcher.stop()
+        if self.is_built(self.logs_tab):
+            self.log_viewer.close()
+        if self.is_built(self.fleet_tab):
+            self.fleet.close()
+        self.core.close()
+        self.io.shutdown()
+        self.root.destroy()
+
+    def build_tab(self, tab):
+        """Build a tab's widgets the first time it is shown"""
+        if str(tab) not in self.built_tabs:
+            self.built_tabs.add(str(tab))
+            self.tab_setups[str(tab)]()
+
+    def is_built(self, tab):
+        return str(tab) in self.built_tabs
+
+    def toggle_tracing(self, event=None):
+        tracer.enable(not tracer.enabled)
+        if tracer.enabled:
+            tracer.clear()
+        self.show_tracing()
+
+    def show_tracing(self):
+        if tracer.enabled:
+            self.trace_var.set("Tracing - no slow operations yet")
+            self.trace_frame.pack(side=tk.RIGHT)
+        else:
+            self.trace_frame.pack_forget()
+
+    def export_trace(self):
+        """Save the recorded handler timings for chrome://tracing or ui.perfetto.dev"""
+        path = filedialog.asksaveasfilename(
+            title="Export Trace", initialfile="craftbot_trace.json", defaultextension=".json",
+            filetypes=[("Chrome trace", "*.json"), ("All files", "*.*")])
+        if path:
+            self.io.submit_write(tracer.export, path,
+                                 on_done=lambda count: messagebox.showinfo(
+                                     "Success", f"Exported {count:,} trace events to {path}\n\n"
+                                                "Open it in chrome://tracing or ui.perfetto.dev"),
+                                 on_error=self.show_error("Failed to export trace"))
+
+    def show_error(self, message):
+        """Build an on_error callback that reports a failed background task"""
+        return lambda error: messagebox.showerror("Error", f"{message}: {error}")
+
+    def report_error(self, message):
+        """Build a callback for failures no dialog is shown for: logged and shown in the status bar (Tk thread)"""
+        def report(error):
+            logger.error("%s: %r", message, error, exc_info=error)
+            self.status_var.set(f"{message}: {error}")
+        return report
+
     def setup_recipes_tab(self):
         """Setup the Recipes tab with dual columns"""
+        # Known item names for autocomplete, loaded with the recipe list
+        self.item_names = None
+        # Cross-reference window; the index itself lives in the core
+        self.recipe_index = self.core.recipe_index
+        self.recipe_xref = None
+
         # Left column - Recipe list
         left_frame = ttk.Frame(self.recipes_tab)
         left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -105,30 +213,99 @@ class CraftbotManagementWindow:
         
         self.recipe_text = scrolledtext.ScrolledText(right_frame, wrap=tk.WORD, height=30)
         self.recipe_text.pack(fill=tk.BOTH, expand=True)
-        
-        # Save button
-        ttk.Button(right_frame, text="Save Recipe", command=self.save_recipe).pack(pady=5)
+        ItemAutocomplete(self.recipe_text, lambda prefix: self.item_names.complete(prefix) if self.item_names else [])
+        problems_label = ttk.Label(right_frame, anchor=tk.W, foreground="#a00000")
+        problems_label.pack(fill=tk.X)
+        self.live_validations[self.recipe_text] = LiveValidation(self.recipe_text, problems_label, self.io,
+                                                                 RECIPE_SCHEMA, "recipe_check")
+
+        # Buttons
+        button_frame = ttk.Frame(right_frame)
+        button_frame.pack(pady=5)
+        ttk.Button(button_frame, text="Save Recipe", command=self.save_recipe).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Validate All Recipes", command=self.validate_all_recipes).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Cross Reference...", command=self.show_recipe_xref).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Snapshots...", command=self.show_snapshots).pack(side=tk.LEFT, padx=5)
     
+    @traced
     def load_recipes_list(self):
         """Load recipes from config/recipes directory"""
+        self.io.submit("recipes_list", self.core.read_recipe_names,
+                       on_done=self.show_recipes_list, loading="Loading recipes...")
+        self.load_item_names()
+
+    @traced
+    def load_item_names(self):
+        """Refresh the autocomplete names from new trades and changed recipes"""
+        self.io.submit("item_names", self.core.read_item_names,
+                       on_done=self.show_item_names, loading="Loading item names...")
+
+    def show_recipes_list(self, recipe_names):
         self.recipes_listbox.delete(0, tk.END)
-        recipes_dir = self.config_path / "recipes"
-        if recipes_dir.exists():
-            for recipe_file in sorted(recipes_dir.glob("*.json")):
-                if recipe_file.name != "_template.json":
-                    self.recipes_listbox.insert(tk.END, recipe_file.stem)
+        for recipe_name in recipe_names:
+            self.recipes_listbox.insert(tk.END, recipe_name)
+
+    def show_item_names(self, item_names):
+        self.item_names = item_names
+
+    @traced
+    def validate_all_recipes(self):
+        """Check every recipe's item names against the trade history"""
+        self.io.submit("recipes_validate", self.core.check_all_recipes,
+                       on_done=self.show_recipe_issues, on_error=self.show_error("Failed to validate recipes"),
+                       loading="Validating recipes...")
+
+    def show_recipe_issues(self, result):
+        issues, recipe_count, name_count = result
+        if not issues:
+            messagebox.showinfo("Success", f"All {recipe_count} recipes look valid "
+                                           f"({name_count:,} item names known from trades)")
+            return
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Recipe Validation")
+        dialog.geometry("800x400")
+        ttk.Label(dialog, text=f"{len(issues)} problem(s) in {recipe_count} recipes "
+                               f"({name_count:,} item names known from trades). Double-click to open the recipe."
+                  ).pack(anchor=tk.W, padx=5, pady=5)
+
+        tree_frame = ttk.Frame(dialog)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        columns = ("recipe", "field", "problem")
+        issues_tree = ttk.Treeview(tree_frame, columns=columns, show="headings")
+        for column, heading, width in (("recipe", "Recipe", 150), ("field", "Field", 170), ("problem", "Problem", 450)):
+            issues_tree.heading(column, text=heading)
+            issues_tree.column(column, width=width, stretch=column == "problem")
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=issues_tree.yview)
+        issues_tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        issues_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        for issue in issues:
+            issues_tree.insert("", tk.END, values=issue)
+
+        def open_recipe(event):
+            selection = issues_tree.selection()
+            if not selection:
+                return
+            self.select_recipe(issues_tree.item(selection[0], "values")[0])
+
+        issues_tree.bind("<Double-1>", open_recipe)
     
+    @traced
     def on_recipe_select(self, event):
         """Load selected recipe for editing"""
         selection = self.recipes_listbox.curselection()
         if selection:
-            recipe_name = self.recipes_listbox.get(selection[0])
-            recipe_file = self.config_path / "recipes" / f"{recipe_name}.json"
-            if recipe_file.exists():
-                content = recipe_file.read_text()
-                self.recipe_text.delete(1.0, tk.END)
-                self.recipe_text.insert(1.0, content)
+            self.open_recipe(self.recipes_listbox.get(selection[0]))
+
+    def open_recipe(self, recipe_name):
+        recipe_file = self.recipes_path / f"{recipe_name}.json"
+        self.io.submit("recipe_content", self.core.read_editor_file, recipe_file,
+                       on_done=lambda result: self.show_editor_file(self.recipe_text, recipe_file, result,
+                                                                    lambda: self.open_recipe(recipe_name)),
+                       loading=f"Loading recipe '{recipe_name}'...")
     
+    @traced
     def save_recipe(self):
         """Save edited recipe"""
         selection = self.recipes_listbox.curselection()
@@ -137,15 +314,374 @@ class CraftbotManagementWindow:
             return
         
         recipe_name = self.recipes_listbox.get(selection[0])
-        recipe_file = self.config_path / "recipes" / f"{recipe_name}.json"
+        recipe_file = self.recipes_path / f"{recipe_name}.json"
         
         try:
             content = self.recipe_text.get(1.0, tk.END)
             json.loads(content)  # Validate JSON
-            recipe_file.write_text(content)
-            messagebox.showinfo("Success", f"Recipe '{recipe_name}' saved successfully!")
         except json.JSONDecodeError as e:
             messagebox.showerror("Error", f"Invalid JSON: {e}")
+            return
+        if not self.confirm_schema_errors(self.recipe_text, content, "recipe"):
+            return
+
+        self.io.submit_write(self.core.write_recipe, recipe_file, content,
+                             on_done=lambda result: self.editor_saved(self.recipe_text, f"Recipe '{recipe_name}' saved successfully!"),
+                             on_error=self.show_error("Failed to save recipe"),
+                             loading=f"Saving recipe '{recipe_name}'...")
+
+    def show_recipe_xref(self):
+        """Open the cross-reference window, or bring it to the front"""
+        if self.recipe_xref is not None and self.recipe_xref.winfo_exists():
+            self.recipe_xref.lift()
+        else:
+            self.create_recipe_xref()
+        self.io.submit("recipe_index", self.core.refresh_recipe_index,
+                       on_done=lambda changed: self.update_recipe_xref(),
+                       on_error=self.show_error("Failed to index recipes"), loading="Indexing recipes...")
+
+    def create_recipe_xref(self):
+        """Cross-reference window: item/tool lookup, conflicts and the selected recipe's step chain"""
+        self.recipe_xref = dialog = tk.Toplevel(self.root)
+        dialog.title("Recipe Cross Reference")
+        dialog.geometry("900x650")
+
+        search_frame = ttk.Frame(dialog)
+        search_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(search_frame, text="Item or tool:").pack(side=tk.LEFT)
+        self.xref_item_var = tk.StringVar()
+        self.xref_item_var.trace_add("write", lambda *args: self.lookup_recipe_xref())
+        ttk.Entry(search_frame, textvariable=self.xref_item_var, width=40).pack(side=tk.LEFT, padx=5)
+        ttk.Button(search_frame, text="Show Conflicts", command=self.show_recipe_conflicts).pack(side=tk.LEFT, padx=5)
+        self.xref_summary = ttk.Label(search_frame, text="")
+        self.xref_summary.pack(side=tk.LEFT, padx=5)
+
+        paned = ttk.PanedWindow(dialog, orient=tk.VERTICAL)
+        paned.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        # Lookup results, grouped by how the item is used
+        results_frame = ttk.Frame(paned)
+        self.xref_tree = ttk.Treeview(results_frame, columns=("field", "enabled"))
+        self.xref_tree.heading("#0", text="Recipe")
+        self.xref_tree.heading("field", text="Field")
+        self.xref_tree.heading("enabled", text="Enabled")
+        self.xref_tree.column("#0", width=300)
+        self.xref_tree.column("field", width=250)
+        self.xref_tree.column("enabled", width=70, stretch=False)
+        scrollbar = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=self.xref_tree.yview)
+        self.xref_tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.xref_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.xref_tree.bind("<<TreeviewSelect>>", self.on_xref_select)
+        self.xref_tree.bind("<Double-1>", lambda e: self.open_xref_recipe(self.xref_tree))
+        paned.add(results_frame, weight=1)
+
+        # Step chain of the selected recipe
+        chain_frame = ttk.Frame(paned)
+        self.xref_chain_label = ttk.Label(chain_frame, text="Step chain", font=("Arial", 10, "bold"))
+        self.xref_chain_label.pack(anchor=tk.W)
+        self.xref_chain_tree = ttk.Treeview(chain_frame, columns=("tool",))
+        self.xref_chain_tree.heading("#0", text="Step")
+        self.xref_chain_tree.heading("tool", text="Tool")
+        self.xref_chain_tree.column("#0", width=550)
+        self.xref_chain_tree.column("tool", width=250)
+        scrollbar = ttk.Scrollbar(chain_frame, orient=tk.VERTICAL, command=self.xref_chain_tree.yview)
+        self.xref_chain_tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.xref_chain_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.xref_chain_tree.bind("<Double-1>", lambda e: self.open_xref_recipe(self.xref_chain_tree))
+        paned.add(chain_frame, weight=1)
+
+        # Start from the recipe being edited
+        self.xref_recipe = None
+        selection = self.recipes_listbox.curselection()
+        if selection:
+            self.show_recipe_chain(self.recipes_listbox.get(selection[0]))
+
+    def update_recipe_xref(self):
+        """Redraw the open cross-reference window after the index changed"""
+        if self.recipe_xref is None or not self.recipe_xref.winfo_exists():
+            return
+        if self.xref_item_var.get().strip():
+            self.lookup_recipe_xref()
+        else:
+            self.xref_summary.config(text=f"{len(self.recipe_index)} recipes indexed")
+        if self.xref_recipe is not None:
+            self.show_recipe_chain(self.xref_recipe)
+
+    def lookup_recipe_xref(self):
+        """Show every recipe that uses the typed item or tool"""
+        self.xref_tree.delete(*self.xref_tree.get_children())
+        item_name = self.xref_item_var.get().strip()
+        if not item_name:
+            self.xref_summary.config(text=f"{len(self.recipe_index)} recipes indexed")
+            return
+        references = self.recipe_index.references(item_name)
+        groups = {}
+        for role, heading in (("processes", "Processed by"), ("tool", "Tool in"),
+                              ("input", "Step input in"), ("output", "Step output of")):
+            if any(reference_role == role for _, _, reference_role in references):
+                groups[role] = self.xref_tree.insert("", tk.END, text=heading, open=True)
+        for recipe_name, field, role in references:
+            enabled = "Yes" if self.recipe_index.enabled(recipe_name) else "No"
+            self.xref_tree.insert(groups[role], tk.END, text=recipe_name, values=(field, enabled),
+                                  tags=("recipe",))
+        recipe_count = len({recipe_name for recipe_name, _, _ in references})
+        self.xref_summary.config(text=f"Used by {recipe_count} recipe(s)")
+
+    def show_recipe_conflicts(self):
+        """List items that more than one enabled recipe claims to process"""
+        self.xref_tree.delete(*self.xref_tree.get_children())
+        conflicts = self.recipe_index.conflicts()
+        for item_name, recipe_names in conflicts:
+            parent = self.xref_tree.insert("", tk.END, text=item_name, values=("claimed by", len(recipe_names)),
+                                           open=True)
+            for recipe_name in recipe_names:
+                self.xref_tree.insert(parent, tk.END, text=recipe_name, values=("ProcessableItems", "Yes"),
+                                      tags=("recipe",))
+        self.xref_summary.config(text=f"{len(conflicts)} item(s) claimed by more than one enabled recipe")
+
+    @traced
+    def on_xref_select(self, event):
+        selection = self.xref_tree.selection()
+        if selection and "recipe" in self.xref_tree.item(selection[0], "tags"):
+            self.show_recipe_chain(self.xref_tree.item(selection[0], "text"))
+
+    def show_recipe_chain(self, recipe_name):
+        """Show a recipe's steps with the recipes that feed and consume each one"""
+        self.xref_recipe = recipe_name
+        self.xref_chain_tree.delete(*self.xref_chain_tree.get_children())
+        chain = self.recipe_index.step_chain(recipe_name)
+        self.xref_chain_label.config(text=f"Step chain: {recipe_name}" if chain
+                                     else f"Step chain: {recipe_name} (no steps)")
+        for step in chain:
+            tools = ", ".join([step["tool"]] + step["alternatives"]) if step["tool"] else ", ".join(step["alternatives"])
+            parent = self.xref_chain_tree.insert(
+                "", tk.END, text=f"Step {step['number']}: {step['input'] or '?'} -> {step['output'] or '?'}",
+                values=(tools,), open=True)
+            for source_name, field in step["input_from"]:
+                self.xref_chain_tree.insert(parent, tk.END, text=source_name, values=(f"input made by {field}",),
+                                            tags=("recipe",))
+            for target_name, field in step["output_to"]:
+                self.xref_chain_tree.insert(parent, tk.END, text=target_name, values=(f"output used by {field}",),
+                                            tags=("recipe",))
+
+    def open_xref_recipe(self, tree):
+        """Open the double-clicked recipe in the editor"""
+        selection = tree.selection()
+        if selection and "recipe" in tree.item(selection[0], "tags"):
+            self.select_recipe(tree.item(selection[0], "text"))
+
+    def select_recipe(self, recipe_name):
+        """Select a recipe in the list and load it into the editor"""
+        names = self.recipes_listbox.get(0, tk.END)
+        if recipe_name in names:
+            index = names.index(recipe_name)
+            self.recipes_listbox.selection_clear(0, tk.END)
+            self.recipes_listbox.selection_set(index)
+            self.recipes_listbox.see(index)
+            self.notebook.select(self.recipes_tab)
+            self.on_recipe_select(None)
+
+    def show_snapshots(self):
+        """Open the config snapshots window, or bring it to the front"""
+        if self.snapshots_dialog is not None and self.snapshots_dialog.winfo_exists():
+            self.snapshots_dialog.lift()
+        else:
+            self.create_snapshots_dialog()
+        self.load_snapshots()
+
+    def create_snapshots_dialog(self):
+        """Snapshots window: the history of config/, what changed between snapshots, and restore"""
+        self.snapshots_dialog = dialog = tk.Toplevel(self.root)
+        dialog.title("Config Snapshots")
+        dialog.geometry("900x600")
+
+        button_frame = ttk.Frame(dialog)
+        button_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(button_frame, text="Take Snapshot...", command=self.take_snapshot).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="Compare", command=self.compare_snapshots).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="Restore...", command=self.restore_snapshot).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="Prune...", command=self.prune_snapshots).pack(side=tk.LEFT, padx=2)
+        self.snapshots_summary = ttk.Label(button_frame, text="")
+        self.snapshots_summary.pack(side=tk.LEFT, padx=5)
+        self.snapshot_before_write_var = tk.BooleanVar()
+        ttk.Checkbutton(button_frame, text="Snapshot before every save", variable=self.snapshot_before_write_var,
+                        command=self.toggle_snapshot_before_write).pack(side=tk.RIGHT, padx=2)
+
+        paned = ttk.PanedWindow(dialog, orient=tk.VERTICAL)
+        paned.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        # Snapshots, newest first; select one to compare it with config/ now, or two to compare them
+        list_frame = ttk.Frame(paned)
+        self.snapshots_tree = ttk.Treeview(list_frame, columns=("number", "created", "label", "files", "id"),
+                                           show="headings")
+        for column, heading, width in (("number", "#", 50), ("created", "Created", 150), ("label", "Label", 380),
+                                       ("files", "Files", 70), ("id", "Id", 120)):
+            self.snapshots_tree.heading(column, text=heading)
+            self.snapshots_tree.column(column, width=width, stretch=column == "label")
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.snapshots_tree.yview)
+        self.snapshots_tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.snapshots_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.snapshots_tree.bind("<Double-1>", lambda e: self.compare_snapshots())
+        paned.add(list_frame, weight=1)
+
+        # Files changed between the compared snapshots; double-click for the file's diff
+        changes_frame = ttk.Frame(paned)
+        self.snapshot_changes_label = ttk.Label(changes_frame, text="Changes", font=("Arial", 10, "bold"))
+        self.snapshot_changes_label.pack(anchor=tk.W)
+        self.snapshot_changes_tree = ttk.Treeview(changes_frame, columns=("change", "path"), show="headings")
+        self.snapshot_changes_tree.heading("change", text="Change")
+        self.snapshot_changes_tree.heading("path", text="File")
+        self.snapshot_changes_tree.column("change", width=90, stretch=False)
+        self.snapshot_changes_tree.column("path", width=700)
+        scrollbar = ttk.Scrollbar(changes_frame, orient=tk.VERTICAL, command=self.snapshot_changes_tree.yview)
+        self.snapshot_changes_tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.snapshot_changes_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.snapshot_changes_tree.bind("<Double-1>", self.show_snapshot_file_diff)
+        paned.add(changes_frame, weight=1)
+        # (old id, new id or None for config/ now) of the changes shown
+        self.snapshot_comparison = None
+        self.snapshot_entries = {}
+
+    @traced
+    def load_snapshots(self):
+        self.io.submit("snapshots", self.core.list_snapshots,
+                       on_done=self.show_snapshots_list, on_error=self.show_error("Failed to read snapshots"),
+                       loading="Loading snapshots...")
+        self.io.submit("snapshot_setting", self.core.snapshot_store.snapshot_before_write,
+                       on_done=self.snapshot_before_write_var.set)
+
+    def toggle_snapshot_before_write(self):
+        self.io.submit_write(self.core.set_snapshot_before_write, self.snapshot_before_write_var.get(),
+                             on_error=self.show_error("Failed to save snapshot setting"))
+
+    def show_snapshots_list(self, snapshots):
+        if self.snapshots_dialog is None or not self.snapshots_dialog.winfo_exists():
+            return
+        self.snapshots_tree.delete(*self.snapshots_tree.get_children())
+        # Tree rows by snapshot number; the same id appears again when the config returns to an earlier state
+        self.snapshot_entries = {str(entry["number"]): entry for entry in snapshots}
+        for entry in snapshots:
+            self.snapshots_tree.insert("", tk.END, iid=str(entry["number"]), values=(
+                entry["number"], entry["created"], entry["label"], entry["files"], entry["id"][:SHORT_ID]))
+        self.snapshots_summary.config(text=f"{len(snapshots)} snapshot(s)")
+
+    @traced
+    def take_snapshot(self):
+        label = simpledialog.askstring("Take Snapshot", "Label for this snapshot (optional):",
+                                       parent=self.snapshots_dialog)
+        if label is None:
+            return
+
+        def created(result):
+            entry, is_new = result
+            if not is_new:
+                messagebox.showinfo("Success", f"Config unchanged since snapshot {entry['id'][:SHORT_ID]}",
+                                    parent=self.snapshots_dialog)
+            self.load_snapshots()
+
+        self.io.submit_write(self.core.create_snapshot, label.strip(), on_done=created,
+                             on_error=self.show_error("Failed to take snapshot"), loading="Taking snapshot...")
+
+    @traced
+    def compare_snapshots(self):
+        """Compare the selected snapshot with config/ now, or two selected snapshots with each other"""
+        selection = self.snapshots_tree.selection()
+        if not selection or len(selection) > 2:
+            messagebox.showwarning("Warning", "Select one snapshot to compare with the config now, or two to "
+                                              "compare with each other", parent=self.snapshots_dialog)
+            return
+        # The tree is newest first, so the older snapshot is the later row
+        rows = sorted(selection, key=self.snapshots_tree.index)
+        old_id = self.snapshot_entries[rows[-1]]["id"]
+        new_id = self.snapshot_entries[rows[0]]["id"] if len(rows) == 2 else None
+        self.io.submit("snapshot_diff", self.core.diff_snapshots, old_id, new_id,
+                       on_done=lambda changes: self.show_snapshot_changes(old_id, new_id, changes),
+                       on_error=self.show_error("Failed to compare snapshots"), loading="Comparing snapshots...")
+
+    def show_snapshot_changes(self, old_id, new_id, changes):
+        if self.snapshots_dialog is None or not self.snapshots_dialog.winfo_exists():
+            return
+        self.snapshot_comparison = (old_id, new_id)
+        self.snapshot_changes_tree.delete(*self.snapshot_changes_tree.get_children())
+        added, removed, changed = changes
+        for change, paths in (("Added", added), ("Deleted", removed), ("Modified", changed)):
+            for path in paths:
+                self.snapshot_changes_tree.insert("", tk.END, values=(change, path))
+        new_name = new_id[:SHORT_ID] if new_id else "the config now"
+        self.snapshot_changes_label.config(
+            text=f"Changes from {old_id[:SHORT_ID]} to {new_name}: {len(added)} added, {len(removed)} deleted, "
+                 f"{len(changed)} modified")
+
+    @traced
+    def show_snapshot_file_diff(self, event):
+        selection = self.snapshot_changes_tree.selection()
+        if not selection or self.snapshot_comparison is None:
+            return
+        path = self.snapshot_changes_tree.item(selection[0], "values")[1]
+        old_id, new_id = self.snapshot_comparison
+        self.io.submit("snapshot_file_diff", self.core.diff_snapshot_file, old_id, new_id, path,
+                       on_done=lambda diff: self.show_text_dialog(f"Diff: {path}", diff or "No differences"),
+                       on_error=self.show_error("Failed to compare file"), loading=f"Comparing {path}...")
+
+    def show_text_dialog(self, title, text):
+        dialog = tk.Toplevel(self.root)
+        dialog.title(title)
+        dialog.geometry("800x500")
+        text_widget = scrolledtext.ScrolledText(dialog, wrap=tk.NONE, font=("Consolas", 10))
+        text_widget.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        text_widget.tag_configure("added", foreground="#006000")
+        text_widget.tag_configure("removed", foreground="#a00000")
+        for line in text.splitlines(keepends=True):
+            tag = ()
+            if line.startswith("+") and not line.startswith("+++"):
+                tag = ("added",)
+            elif line.startswith("-") and not line.startswith("---"):
+                tag = ("removed",)
+            text_widget.insert(tk.END, line, tag)
+        text_widget.config(state=tk.DISABLED)
+
+    @traced
+    def restore_snapshot(self):
+        selection = self.snapshots_tree.selection()
+        if len(selection) != 1:
+            messagebox.showwarning("Warning", "Select the snapshot to restore", parent=self.snapshots_dialog)
+            return
+        snapshot_id = self.snapshot_entries[selection[0]]["id"]
+        if not messagebox.askyesno("Confirm", f"Make config/ match snapshot {snapshot_id[:SHORT_ID]}?\n\n"
+                                              "Only files that differ are rewritten, and files the snapshot does "
+                                              "not have are deleted. The config as it is now is snapshotted first.",
+                                   parent=self.snapshots_dialog):
+            return
+
+        def restored(result):
+            entry, written, deleted = result
+            messagebox.showinfo("Success", f"Restored snapshot {entry['id'][:SHORT_ID]}: {len(written)} file(s) "
+                                           f"written, {len(deleted)} deleted", parent=self.snapshots_dialog)
+            self.load_snapshots()
+
+        # Open lists and editors follow through the file watcher
+        self.io.submit_write(self.core.restore_snapshot, snapshot_id, on_done=restored,
+                             on_error=self.show_error("Failed to restore snapshot"), loading="Restoring snapshot...")
+
+    @traced
+    def prune_snapshots(self):
+        keep = simpledialog.askinteger("Prune Snapshots", "Number of newest snapshots to keep:",
+                                       parent=self.snapshots_dialog, minvalue=0, initialvalue=50)
+        if keep is None:
+            return
+
+        def pruned(result):
+            snapshots, objects = result
+            messagebox.showinfo("Success", f"Removed {snapshots} snapshot(s) and {objects} stored file version(s)",
+                                parent=self.snapshots_dialog)
+            self.load_snapshots()
+
+        self.io.submit_write(self.core.prune_snapshots, keep, on_done=pruned,
+                             on_error=self.show_error("Failed to prune snapshots"), loading="Pruning snapshots...")
 
     def setup_help_menu_tab(self):
         """Setup the Help Menu tab with dual columns"""
@@ -186,26 +722,34 @@ class CraftbotManagementWindow:
         # Save button
         ttk.Button(right_frame, text="Save Template", command=self.save_help_template).pack(pady=5)
 
+    @traced
     def load_help_templates_list(self):
         """Load help templates from config/help-templates directory"""
+        self.io.submit("help_templates_list", self.core.read_help_template_names,
+                       on_done=self.show_help_templates_list, loading="Loading help templates...")
+
+    def show_help_templates_list(self, template_names):
         self.help_templates_listbox.delete(0, tk.END)
-        if self.help_templates_path.exists():
-            for template_file in sorted(self.help_templates_path.glob("*")):
-                if template_file.is_file():
-                    self.help_templates_listbox.insert(tk.END, template_file.name)
+        for template_name in template_names:
+            self.help_templates_listbox.insert(tk.END, template_name)
 
+    @traced
     def on_help_template_select(self, event):
         """Load selected help template for editing"""
         selection = self.help_templates_listbox.curselection()
         if selection:
             template_name = self.help_templates_listbox.get(selection[0])
             self.current_help_template = template_name  # Store the template name
-            template_file = self.help_templates_path / template_name
-            if template_file.exists():
-                content = template_file.read_text()
-                self.help_template_text.delete(1.0, tk.END)
-                self.help_template_text.insert(1.0, content)
+            self.open_help_template(template_name)
 
+    def open_help_template(self, template_name):
+        template_file = self.help_templates_path / template_name
+        self.io.submit("help_template_content", self.core.read_editor_file, template_file,
+                       on_done=lambda result: self.show_editor_file(self.help_template_text, template_file, result,
+                                                                    lambda: self.open_help_template(template_name)),
+                       loading=f"Loading template '{template_name}'...")
+
+    @traced
     def save_help_template(self):
         """Save edited help template"""
         # Use the stored template name instead of relying on listbox selection
@@ -216,12 +760,11 @@ class CraftbotManagementWindow:
         template_name = self.current_help_template
         template_file = self.help_templates_path / template_name
 
-        try:
-            content = self.help_template_text.get(1.0, tk.END)
-            template_file.write_text(content)
-            messagebox.showinfo("Success", f"Template '{template_name}' saved successfully!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save template: {e}")
+        content = self.help_template_text.get(1.0, tk.END)
+        self.io.submit_write(self.core.write_config_file, template_file, content,
+                             on_done=lambda result: self.editor_saved(self.help_template_text, f"Template '{template_name}' saved successfully!"),
+                             on_error=self.show_error("Failed to save template"),
+                             loading=f"Saving template '{template_name}'...")
 
     def setup_commands_tab(self):
         """Setup the Commands tab with dual columns"""
@@ -246,42 +789,46 @@ class CraftbotManagementWindow:
         
         self.command_text = scrolledtext.ScrolledText(right_frame, wrap=tk.WORD, height=30)
         self.command_text.pack(fill=tk.BOTH, expand=True)
+        problems_label = ttk.Label(right_frame, anchor=tk.W, foreground="#a00000")
+        problems_label.pack(fill=tk.X)
+        self.live_validations[self.command_text] = LiveValidation(self.command_text, problems_label, self.io,
+                                                                  COMMAND_SCHEMA, "command_check")
         
-        # Save button
-        ttk.Button(right_frame, text="Save Command", command=self.save_command).pack(pady=5)
+        # Buttons
+        button_frame = ttk.Frame(right_frame)
+        button_frame.pack(pady=5)
+        ttk.Button(button_frame, text="Save Command", command=self.save_command).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Snapshots...", command=self.show_snapshots).pack(side=tk.LEFT, padx=5)
     
+    @traced
     def load_commands_list(self):
         """Load commands from config/commands.json"""
+        self.io.submit("commands_list", self.core.read_command_names,
+                       on_done=self.show_commands_list, loading="Loading commands...")
+
+    def show_commands_list(self, command_names):
+        if list(self.commands_listbox.get(0, tk.END)) == list(command_names):
+            # Keep the selection when commands.json changed but the names did not
+            return
         self.commands_listbox.delete(0, tk.END)
-        commands_file = self.config_path / "commands.json"
-        if commands_file.exists():
-            try:
-                data = json.loads(commands_file.read_text())
-                if "Commands" in data:
-                    # Sort commands alphabetically by name
-                    sorted_commands = sorted(data["Commands"], key=lambda x: x.get("Name", "").lower())
-                    for cmd in sorted_commands:
-                        self.commands_listbox.insert(tk.END, cmd.get("Name", "Unknown"))
-            except:
-                pass
+        for command_name in command_names:
+            self.commands_listbox.insert(tk.END, command_name)
     
+    @traced
     def on_command_select(self, event):
         """Load selected command for viewing"""
         selection = self.commands_listbox.curselection()
         if selection:
-            cmd_name = self.commands_listbox.get(selection[0])
-            commands_file = self.config_path / "commands.json"
-            if commands_file.exists():
-                try:
-                    data = json.loads(commands_file.read_text())
-                    for cmd in data.get("Commands", []):
-                        if cmd.get("Name") == cmd_name:
-                            self.command_text.delete(1.0, tk.END)
-                            self.command_text.insert(1.0, json.dumps(cmd, indent=2))
-                            break
-                except:
-                    pass
-    
+            self.open_command(self.commands_listbox.get(selection[0]))
+
+    def open_command(self, cmd_name):
+        commands_file = self.config_path / "commands.json"
+        self.io.submit("command_content", self.core.read_command, cmd_name,
+                       on_done=lambda result: self.show_editor_file(self.command_text, commands_file, result,
+                                                                    lambda: self.open_command(cmd_name)),
+                       loading=f"Loading command '{cmd_name}'...")
+
+    @traced
     def save_command(self):
         """Save edited command"""
         selection = self.commands_listbox.curselection()
@@ -292,27 +839,57 @@ class CraftbotManagementWindow:
         try:
             content = self.command_text.get(1.0, tk.END)
             updated_cmd = json.loads(content)
-            
-            commands_file = self.config_path / "commands.json"
-            data = json.loads(commands_file.read_text())
-            
-            for i, cmd in enumerate(data.get("Commands", [])):
-                if cmd.get("Name") == updated_cmd.get("Name"):
-                    data["Commands"][i] = updated_cmd
-                    break
-            
-            commands_file.write_text(json.dumps(data, indent=2))
-            messagebox.showinfo("Success", "Command saved successfully!")
         except json.JSONDecodeError as e:
             messagebox.showerror("Error", f"Invalid JSON: {e}")
-    
+            return
+        if not self.confirm_schema_errors(self.command_text, content, "command"):
+            return
+
+        self.io.submit_write(self.core.write_command, updated_cmd,
+                             on_done=lambda result: self.editor_saved(self.command_text, "Command saved successfully!"),
+                             on_error=self.show_error("Failed to save command"),
+                             loading="Saving command...")
+
+    def show_editor_file(self, text_widget, path, result, reload):
+        """Show a file in an editor and remember which version of it is shown"""
+        if result is None:
+            return
+        content, signature = result
+        text_widget.delete(1.0, tk.END)
+        text_widget.insert(1.0, content)
+        text_widget.edit_modified(False)
+        self.editor_files[text_widget] = (path, signature, reload)
+        if text_widget in self.live_validations:
+            self.live_validations[text_widget].schedule()
+
+    def confirm_schema_errors(self, text_widget, content, kind):
+        """Ask before saving a file the live check found errors in; True to go ahead"""
+        errors = self.live_validations[text_widget].errors(content)
+        if not errors:
+            return True
+        shown = "\n".join(errors[:SAVE_PROBLEMS_SHOWN])
+        if len(errors) > SAVE_PROBLEMS_SHOWN:
+            shown += f"\n... and {len(errors) - SAVE_PROBLEMS_SHOWN} more"
+        return messagebox.askyesno("Confirm", f"The bot will skip or misread this {kind}:\n\n{shown}\n\nSave anyway?")
+
+    def editor_saved(self, text_widget, message):
+        """The editor now matches the file on disk"""
+        text_widget.edit_modified(False)
+        if text_widget in self.editor_files:
+            path, signature, reload = self.editor_files[text_widget]
+            self.editor_files[text_widget] = (path, self.core.written_signatures.get(path, signature), reload)
+        messagebox.showinfo("Success", message)
+
     def setup_ranks_tab(self):
         """Setup the Ranks tab with nested tabs"""
         self.ranks_notebook = ttk.Notebook(self.ranks_tab)
         self.ranks_notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        # rank name -> (tab frame, player list); tabs are kept in name order
+        self.rank_tabs = {}
         
-        # Load rank tabs
-        self.load_rank_tabs()
+        # Rank tabs are loaded once the ranks directory has been prepared
+        if self.directories_ready:
+            self.load_rank_tabs()
         
         # Add/Remove rank buttons
         button_frame = ttk.Frame(self.ranks_tab)
@@ -320,103 +897,259 @@ class CraftbotManagementWindow:
         ttk.Button(button_frame, text="Add Rank", command=self.add_rank).pack(side=tk.LEFT, padx=2)
         ttk.Button(button_frame, text="Remove Rank", command=self.remove_rank).pack(side=tk.LEFT, padx=2)
     
+    @traced
     def load_rank_tabs(self):
         """Load rank tabs from rank files"""
-        for tab in self.ranks_notebook.tabs():
-            self.ranks_notebook.forget(tab)
-        
-        if self.ranks_path.exists():
-            for rank_file in sorted(self.ranks_path.glob("*.json")):
-                rank_name = rank_file.stem
-                frame = self.create_rank_frame(rank_name)
-                self.ranks_notebook.add(frame, text=rank_name)
-    
-    def create_rank_frame(self, rank_name):
-        """Create a frame for a specific rank"""
+        self.io.submit("rank_tabs", self.core.read_ranks, on_done=self.show_rank_tabs, loading="Loading ranks...")
+
+    def show_rank(self, rank_name, result):
+        """Update the tab of one rank after its file changed"""
+        if result is None:
+            if rank_name in self.rank_tabs:
+                self.remove_rank_tab(rank_name)
+        elif rank_name in self.rank_tabs:
+            player_list = self.rank_tabs[rank_name][1]
+            if set(result[1]) != set(player_list.items):
+                player_list.set_items(result[1])
+        else:
+            self.add_rank_tab(*result)
+
+    def show_rank_tabs(self, ranks):
+        """Bring the rank tabs in line with the rank files, touching only ranks that changed"""
+        loaded = dict(ranks)
+        for rank_name in list(self.rank_tabs):
+            if rank_name not in loaded:
+                self.remove_rank_tab(rank_name)
+        for rank_name, players in ranks:
+            if rank_name in self.rank_tabs:
+                player_list = self.rank_tabs[rank_name][1]
+                if set(players) != set(player_list.items):
+                    player_list.set_items(players)
+            else:
+                self.add_rank_tab(rank_name, players)
+
+    def add_rank_tab(self, rank_name, players):
+        """Insert a tab for a rank, keeping the tabs in name order"""
+        frame, player_list = self.create_rank_frame(rank_name, players)
+        self.rank_tabs[rank_name] = (frame, player_list)
+        position = sorted(self.rank_tabs).index(rank_name)
+        if position < len(self.ranks_notebook.tabs()):
+            self.ranks_notebook.insert(position, frame, text=rank_name)
+        else:
+            self.ranks_notebook.add(frame, text=rank_name)
+
+    def remove_rank_tab(self, rank_name):
+        frame, player_list = self.rank_tabs.pop(rank_name)
+        self.ranks_notebook.forget(frame)
+        frame.destroy()
+
+    def create_rank_frame(self, rank_name, players):
+        """Create a frame for a specific rank; returns (frame, player list)"""
         frame = ttk.Frame(self.ranks_notebook)
         
-        # Players listbox
+        # Players list - ranks can hold thousands of names, so only visible rows are created
         ttk.Label(frame, text=f"Players in {rank_name}", font=("Arial", 10, "bold")).pack()
         
-        players_frame = ttk.Frame(frame)
-        players_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        players_listbox = tk.Listbox(players_frame, height=20)
-        players_listbox.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
-        
-        scrollbar = ttk.Scrollbar(players_frame, orient=tk.VERTICAL, command=players_listbox.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        players_listbox.config(yscrollcommand=scrollbar.set)
-        
-        # Load players
-        rank_file = self.ranks_path / f"{rank_name}.json"
-        if rank_file.exists():
-            data = json.loads(rank_file.read_text())
-            for player in data.get("players", []):
-                players_listbox.insert(tk.END, player)
+        player_list = VirtualList(frame, height=20)
+        player_list.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        player_list.set_items(players)
         
         # Buttons
         button_frame = ttk.Frame(frame)
         button_frame.pack(fill=tk.X, padx=5, pady=5)
         
         ttk.Button(button_frame, text="Add Player", 
-                  command=lambda: self.add_player_to_rank(rank_name, players_listbox)).pack(side=tk.LEFT, padx=2)
+                  command=lambda: self.add_player_to_rank(rank_name, player_list)).pack(side=tk.LEFT, padx=2)
         ttk.Button(button_frame, text="Remove Player", 
-                  command=lambda: self.remove_player_from_rank(rank_name, players_listbox)).pack(side=tk.LEFT, padx=2)
+                  command=lambda: self.remove_player_from_rank(rank_name, player_list)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="Import...",
+                  command=lambda: self.import_players(rank_name)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="Move To...",
+                  command=lambda: self.move_players(rank_name, player_list)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="Export...",
+                  command=lambda: self.export_players(rank_name, player_list)).pack(side=tk.LEFT, padx=2)
         
-        return frame
+        return frame, player_list
     
-    def add_player_to_rank(self, rank_name, listbox):
+    def add_player_to_rank(self, rank_name, player_list):
         """Add a player to a rank"""
         player_name = simpledialog.askstring("Add Player", f"Enter player name for {rank_name}:")
         if player_name:
-            rank_file = self.ranks_path / f"{rank_name}.json"
-            data = json.loads(rank_file.read_text())
-            if player_name not in data["players"]:
-                data["players"].append(player_name)
-                rank_file.write_text(json.dumps(data, indent=2))
-                listbox.insert(tk.END, player_name)
-                messagebox.showinfo("Success", f"Added {player_name} to {rank_name}")
-            else:
+            if player_name in player_list:
                 messagebox.showwarning("Warning", f"{player_name} is already in {rank_name}")
+                return
+
+            def on_done(added):
+                if added:
+                    player_list.add(player_name)
+                    player_list.see(player_name)
+                    messagebox.showinfo("Success", f"Added {player_name} to {rank_name}")
+                else:
+                    messagebox.showwarning("Warning", f"{player_name} is already in {rank_name}")
+
+            self.io.submit_write(self.write_player_added, rank_name, player_name,
+                                 on_done=on_done, on_error=self.show_error("Failed to add player"))
+
+    def write_player_added(self, rank_name, player_name):
+        """Add a player to a rank file; returns False if already present (writer thread)"""
+        players, added, removed = self.core.write_rank_players(rank_name, add=[player_name])
+        return bool(added)
+
+    def show_rank_players(self, results):
+        """Refresh the player lists of ranks changed by a bulk update"""
+        for rank_name, (players, added, removed) in results.items():
+            if rank_name in self.rank_tabs:
+                self.rank_tabs[rank_name][1].set_items(players)
+
+    def import_players(self, rank_name):
+        """Add a list of players (pasted or loaded from a file) to a rank in one write"""
+        def apply(player_names, target_rank):
+            def on_done(result):
+                players, added, removed = result
+                self.show_rank_players({rank_name: result})
+                skipped = len(player_names) - len(added)
+                message = f"Added {len(added)} players to {rank_name}"
+                if skipped:
+                    message += f" ({skipped} already present)"
+                messagebox.showinfo("Success", message)
+
+            self.io.submit_write(self.core.write_rank_players, rank_name, player_names,
+                                 on_done=on_done, on_error=self.show_error("Failed to import players"),
+                                 loading="Importing players...")
+
+        self.show_bulk_players_dialog(f"Import Players to {rank_name}", [], apply)
+
+    def move_players(self, rank_name, player_list):
+        """Move the selected player, or every player matching the filter, to another rank"""
+        targets = [name for name in sorted(self.rank_tabs) if name != rank_name]
+        if not targets:
+            messagebox.showwarning("Warning", "There is no other rank to move players to")
+            return
+        if player_list.filter_text.strip():
+            player_names = player_list.items[player_list.first:player_list.last]
+        else:
+            player_names = [player_list.selected] if player_list.selected is not None else []
+
+        def apply(player_names, target_rank):
+            def on_done(results):
+                self.show_rank_players(results)
+                moved = results[rank_name][2]
+                messagebox.showinfo("Success", f"Moved {len(moved)} players from {rank_name} to {target_rank}")
+
+            self.io.submit_write(self.core.write_players_moved, rank_name, target_rank, player_names,
+                                 on_done=on_done, on_error=self.show_error("Failed to move players"),
+                                 loading="Moving players...")
+
+        self.show_bulk_players_dialog(f"Move Players from {rank_name}", player_names, apply, targets)
+
+    def export_players(self, rank_name, player_list):
+        """Save a rank's players as a newline list or CSV file"""
+        path = filedialog.asksaveasfilename(
+            title=f"Export {rank_name}", initialfile=f"{rank_name}.txt", defaultextension=".txt",
+            filetypes=[("Text files", "*.txt"), ("CSV files", "*.csv"), ("All files", "*.*")])
+        if path:
+            content = format_player_names(player_list.items, as_csv=path.lower().endswith(".csv"))
+            self.io.submit_write(atomic_write_text, path, content,
+                                 on_done=lambda result: messagebox.showinfo(
+                                     "Success", f"Exported {len(player_list)} players to {Path(path).name}"),
+                                 on_error=self.show_error("Failed to export players"))
+
+    def show_bulk_players_dialog(self, title, player_names, on_apply, targets=None):
+        """Ask for a list of player names, and optionally a target rank
+
+        on_apply(player names, target rank) is called when the user confirms.
+        """
+        dialog = tk.Toplevel(self.root)
+        dialog.title(title)
+        dialog.geometry("400x450")
+        dialog.transient(self.root)
+
+        ttk.Label(dialog, text="Players - one per line, comma separated, or CSV with a 'player' column:").pack(
+            fill=tk.X, padx=5, pady=(5, 0))
+        names_text = scrolledtext.ScrolledText(dialog, wrap=tk.WORD, height=18)
+        names_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        names_text.insert(1.0, format_player_names(player_names))
+
+        target_var = tk.StringVar(value=targets[0] if targets else "")
+        if targets:
+            target_frame = ttk.Frame(dialog)
+            target_frame.pack(fill=tk.X, padx=5)
+            ttk.Label(target_frame, text="Move to rank:").pack(side=tk.LEFT)
+            ttk.Combobox(target_frame, textvariable=target_var, values=targets, state="readonly").pack(
+                side=tk.LEFT, padx=2)
+
+        def load_file():
+            path = filedialog.askopenfilename(parent=dialog, title="Load Players",
+                                              filetypes=[("Player lists", "*.txt *.csv"), ("All files", "*.*")])
+            if path:
+                def on_done(text):
+                    names_text.delete(1.0, tk.END)
+                    names_text.insert(1.0, format_player_names(parse_player_names(text)))
+
+                self.io.submit("players_file", Path(path).read_text, "utf-8-sig",
+                               on_done=on_done, on_error=self.show_error("Failed to load player list"))
+
+        def apply():
+            names = parse_player_names(names_text.get(1.0, tk.END))
+            if not names:
+                messagebox.showwarning("Warning", "No player names entered", parent=dialog)
+                return
+            dialog.destroy()
+            on_apply(names, target_var.get())
+
+        button_frame = ttk.Frame(dialog)
+        button_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(button_frame, text="Load File...", command=load_file).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(button_frame, text="Apply", command=apply).pack(side=tk.RIGHT, padx=2)
     
-    def remove_player_from_rank(self, rank_name, listbox):
+    def remove_player_from_rank(self, rank_name, player_list):
         """Remove a player from a rank"""
-        selection = listbox.curselection()
-        if selection:
-            player_name = listbox.get(selection[0])
-            rank_file = self.ranks_path / f"{rank_name}.json"
-            data = json.loads(rank_file.read_text())
-            if player_name in data["players"]:
-                data["players"].remove(player_name)
-                rank_file.write_text(json.dumps(data, indent=2))
-                listbox.delete(selection[0])
-                messagebox.showinfo("Success", f"Removed {player_name} from {rank_name}")
+        player_name = player_list.selected
+        if player_name is not None:
+            def on_done(removed):
+                if removed:
+                    player_list.remove(player_name)
+                    messagebox.showinfo("Success", f"Removed {player_name} from {rank_name}")
+
+            self.io.submit_write(self.write_player_removed, rank_name, player_name,
+                                 on_done=on_done, on_error=self.show_error("Failed to remove player"))
+
+    def write_player_removed(self, rank_name, player_name):
+        """Remove a player from a rank file; returns False if not present (writer thread)"""
+        players, added, removed = self.core.write_rank_players(rank_name, remove=[player_name])
+        return bool(removed)
     
     def add_rank(self):
         """Add a new rank"""
         rank_name = simpledialog.askstring("Add Rank", "Enter new rank name:")
         if rank_name:
-            rank_file = self.ranks_path / f"{rank_name}.json"
-            if not rank_file.exists():
-                rank_file.write_text(json.dumps({"rank": rank_name, "players": []}, indent=2))
-                self.load_rank_tabs()
-                messagebox.showinfo("Success", f"Rank '{rank_name}' created")
-            else:
-                messagebox.showwarning("Warning", f"Rank '{rank_name}' already exists")
-    
+            def on_done(created):
+                if created:
+                    self.add_rank_tab(rank_name, [])
+                    messagebox.showinfo("Success", f"Rank '{rank_name}' created")
+                else:
+                    messagebox.showwarning("Warning", f"Rank '{rank_name}' already exists")
+
+            self.io.submit_write(self.core.write_rank_created, rank_name,
+                                 on_done=on_done, on_error=self.show_error("Failed to create rank"))
+
     def remove_rank(self):
         """Remove a rank"""
         current_tab = self.ranks_notebook.index(self.ranks_notebook.select())
         rank_name = self.ranks_notebook.tab(current_tab, "text")
         if messagebox.askyesno("Confirm", f"Remove rank '{rank_name}'?"):
             rank_file = self.ranks_path / f"{rank_name}.json"
-            rank_file.unlink()
-            self.load_rank_tabs()
-            messagebox.showinfo("Success", f"Rank '{rank_name}' removed")
+
+            def on_done(result):
+                if rank_name in self.rank_tabs:
+                    self.remove_rank_tab(rank_name)
+                messagebox.showinfo("Success", f"Rank '{rank_name}' removed")
+
+            self.io.submit_write(self.core.delete_config_file, rank_file, on_done=on_done, on_error=self.show_error("Failed to remove rank"))
     
     def setup_logs_tab(self):
-        """Setup the Logs tab with file viewing and editing"""
+        """Setup the Logs tab with a paged log viewer"""
         # Track currently selected log name (persists even if listbox selection is lost)
         self.current_log = None
 
@@ -429,6 +1162,7 @@ class CraftbotManagementWindow:
         self.logs_listbox = tk.Listbox(left_frame, width=30, height=30)
         self.logs_listbox.pack(fill=tk.BOTH, expand=True)
         self.logs_listbox.bind('<<ListboxSelect>>', self.on_log_select)
+        ttk.Button(left_frame, text="Rotate Logs...", command=self.rotate_logs).pack(fill=tk.X, pady=(5, 0))
 
         # Load logs
         self.load_logs_list()
@@ -438,79 +1172,682 @@ class CraftbotManagementWindow:
         right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         ttk.Label(right_frame, text="Log Content", font=("Arial", 12, "bold")).pack()
-        
-        self.log_text = scrolledtext.ScrolledText(right_frame, wrap=tk.WORD, height=30)
-        self.log_text.pack(fill=tk.BOTH, expand=True)
-        
-        # Save button
-        ttk.Button(right_frame, text="Save Log", command=self.save_log).pack(pady=5)
+
+        # Search across every log file
+        self.log_search_count = 0
+        search_frame = ttk.Frame(right_frame)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(search_frame, text="Search all logs:").pack(side=tk.LEFT)
+        self.log_search_entry = ttk.Entry(search_frame, width=40)
+        self.log_search_entry.pack(side=tk.LEFT, padx=2, fill=tk.X, expand=True)
+        self.log_search_entry.bind("<Return>", lambda e: self.search_logs())
+        self.log_search_regex = tk.BooleanVar(value=False)
+        self.log_search_case = tk.BooleanVar(value=False)
+        self.log_search_indexed = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_frame, text="Regex", variable=self.log_search_regex).pack(side=tk.LEFT, padx=2)
+        ttk.Checkbutton(search_frame, text="Match case", variable=self.log_search_case).pack(side=tk.LEFT, padx=2)
+        ttk.Checkbutton(search_frame, text="Use index", variable=self.log_search_indexed).pack(side=tk.LEFT, padx=2)
+        ttk.Button(search_frame, text="Search", command=self.search_logs).pack(side=tk.LEFT, padx=2)
+        ttk.Button(search_frame, text="Stop", command=self.stop_log_search).pack(side=tk.LEFT, padx=2)
+
+        paned = ttk.PanedWindow(right_frame, orient=tk.VERTICAL)
+        paned.pack(fill=tk.BOTH, expand=True)
+
+        # Logs can be hundreds of MB, so only the visible lines are ever loaded
+        self.log_viewer = PagedLogViewer(paned, self.io)
+        paned.add(self.log_viewer, weight=3)
+
+        results_frame = ttk.Frame(paned)
+        self.log_search_label = ttk.Label(results_frame, text="")
+        self.log_search_label.pack(fill=tk.X)
+        columns = ("file", "line", "time", "text")
+        self.log_search_tree = ttk.Treeview(results_frame, columns=columns, show="headings", height=8)
+        for column, heading, width in [("file", "File", 130), ("line", "Line", 70), ("time", "Time", 150), ("text", "Text", 500)]:
+            self.log_search_tree.heading(column, text=heading)
+            self.log_search_tree.column(column, width=width, anchor=tk.W, stretch=(column == "text"))
+        scrollbar = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=self.log_search_tree.yview)
+        self.log_search_tree.config(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.log_search_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.log_search_tree.bind("<<TreeviewSelect>>", self.on_log_search_select)
+        paned.add(results_frame, weight=1)
     
+    @traced
     def load_logs_list(self):
         """Load log files from logs directory"""
+        self.io.submit("logs_list", self.core.read_log_names, on_done=self.show_logs_list, loading="Loading logs...")
+
+    def show_logs_list(self, log_names):
         self.logs_listbox.delete(0, tk.END)
-        if self.logs_path.exists():
-            # Look for specific log files
-            log_files = []
-            for pattern in ["alien_armor.log", "craftbot_debug.log", "trade_logs.txt"]:
-                log_file = self.logs_path / pattern
-                if log_file.exists():
-                    log_files.append(log_file)
-
-            # Also add any other .log and .txt files
-            for log_file in sorted(self.logs_path.glob("*.*")):
-                if log_file.is_file() and log_file not in log_files:
-                    if log_file.suffix in ['.log', '.txt']:
-                        log_files.append(log_file)
-
-            # Sort by modification time (newest first)
-            log_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-
-            for log_file in log_files:
-                self.logs_listbox.insert(tk.END, log_file.name)
-        else:
+        if log_names is None:
             self.logs_listbox.insert(tk.END, f"Logs path not found: {self.logs_path}")
+            return
+        for log_name in log_names:
+            self.logs_listbox.insert(tk.END, log_name)
     
+    @traced
+    def search_logs(self):
+        """Search every log file, streaming matching lines into the results list"""
+        text = self.log_search_entry.get()
+        if not text:
+            return
+        regex = self.log_search_regex.get()
+        match_case = self.log_search_case.get()
+        try:
+            compile_query(text, regex, match_case)
+        except re.error as e:
+            messagebox.showwarning("Warning", f"Invalid regular expression: {e}")
+            return
+
+        self.log_search_tree.delete(*self.log_search_tree.get_children())
+        self.log_search_count = 0
+        self.log_search_label.config(text="Searching...")
+        self.io.submit("log_search", self.core.search_logs, text, regex, match_case, self.log_search_indexed.get(),
+                       on_progress=self.add_log_search_results, on_done=self.finish_log_search,
+                       on_error=self.on_log_search_failed, loading="Searching logs...")
+
+    def add_log_search_results(self, matches):
+        for log_name, line_number, timestamp, text in matches:
+            self.log_search_tree.insert("", tk.END, values=(log_name, line_number + 1, timestamp, text))
+        self.log_search_count += len(matches)
+        self.log_search_label.config(text=f"Searching... {self.log_search_count:,} matching lines")
+
+    def finish_log_search(self, result):
+        found, truncated, indexed = result
+        status = f"{found:,} matching lines"
+        if truncated:
+            status += f" (stopped at the first {MAX_RESULTS:,})"
+        if indexed:
+            status += " (from index)"
+        self.log_search_label.config(text=status)
+
+    def on_log_search_failed(self, error):
+        self.log_search_label.config(text="")
+        messagebox.showerror("Error", f"Failed to search logs: {error}")
+
+    def stop_log_search(self):
+        if self.io.is_busy("log_search"):
+            self.io.cancel("log_search")
+            self.log_search_label.config(text=f"Search stopped - {self.log_search_count:,} matching lines")
+
+    @traced
+    def on_log_search_select(self, event):
+        """Jump the viewer to the selected search result"""
+        selection = self.log_search_tree.selection()
+        if selection:
+            log_name, line_number = self.log_search_tree.item(selection[0], "values")[:2]
+            self.current_log = log_name
+            self.log_viewer.show_line(self.logs_path / log_name, int(line_number) - 1)
+
+    @traced
     def on_log_select(self, event):
-        """Load selected log file for viewing"""
+        """Open selected log file in the paged viewer"""
         selection = self.logs_listbox.curselection()
         if selection:
             log_name = self.logs_listbox.get(selection[0])
             self.current_log = log_name  # Store the log name
-            log_file = self.logs_path / log_name
-            if log_file.exists():
-                content = log_file.read_text()
-                self.log_text.delete(1.0, tk.END)
-                self.log_text.insert(1.0, content)
-    
-    def save_log(self):
-        """Save edited log file"""
-        if not self.current_log:
-            messagebox.showwarning("Warning", "Please select a log file first")
-            return
+            self.log_viewer.open(self.logs_path / log_name)
+
+    def rotate_logs(self):
+        """Archive the bot's live logs into gzip segments while it keeps logging"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Rotate Logs")
+        dialog.transient(self.root)
+        ttk.Label(dialog, text="Moves " + ", ".join(ROTATED_LOGS) + " into compressed segments.\n"
+                               "The bot starts new files; archived segments stay viewable and searchable.").pack(
+            anchor=tk.W, padx=5, pady=5)
+
+        options_frame = ttk.Frame(dialog)
+        options_frame.pack(fill=tk.X, padx=5)
+        ttk.Label(options_frame, text="Segment size (MB):").pack(side=tk.LEFT)
+        size_var = tk.StringVar(value=str(SEGMENT_SIZE // (1024 * 1024)))
+        ttk.Entry(options_frame, textvariable=size_var, width=6).pack(side=tk.LEFT, padx=2)
+        by_day_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="New segment each day", variable=by_day_var).pack(side=tk.LEFT, padx=5)
+
+        def apply():
+            try:
+                max_bytes = int(float(size_var.get()) * 1024 * 1024)
+            except ValueError:
+                max_bytes = 0
+            if max_bytes <= 0:
+                messagebox.showwarning("Warning", "Enter a segment size in MB", parent=dialog)
+                return
+            dialog.destroy()
+            # Windows cannot rename a log that is open, so the viewer lets go of it first
+            if self.current_log in ROTATED_LOGS:
+                self.log_viewer.close()
+            self.io.submit_write(self.core.rotate_logs, ROTATED_LOGS, max_bytes, by_day_var.get(),
+                                 on_done=self.show_rotated_logs, on_error=self.show_error("Failed to rotate logs"),
+                                 loading="Rotating logs...")
+
+        button_frame = ttk.Frame(dialog)
+        button_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(button_frame, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(button_frame, text="Rotate", command=apply).pack(side=tk.RIGHT, padx=2)
+
+    def show_rotated_logs(self, rotated):
+        lines = [f"{log_name}: {len(segments)} segment(s)" if segments else f"{log_name}: empty, not rotated"
+                 for log_name, segments in rotated.items()]
+        messagebox.showinfo("Success", "Logs rotated:\n\n" + "\n".join(lines))
+        self.load_logs_list()
+
+    def setup_trades_tab(self):
+        """Setup the Trades tab with trade search, results and details"""
+        # Filters
+        filter_frame = ttk.Frame(self.trades_tab)
+        filter_frame.pack(fill=tk.X, padx=5, pady=5)
+
+        self.trade_filter_entries = {}
+        for key, label, width in [("player", "Player:", 15), ("item", "Item/Recipe:", 18),
+                                  ("date_from", "From:", 17), ("date_to", "To:", 17)]:
+            ttk.Label(filter_frame, text=label).pack(side=tk.LEFT)
+            entry = ttk.Entry(filter_frame, width=width)
+            entry.pack(side=tk.LEFT, padx=(2, 8))
+            entry.bind("<Return>", lambda e: self.search_trades())
+            self.trade_filter_entries[key] = entry
+
+        self.trade_failed_only = tk.BooleanVar(value=False)
+        ttk.Checkbutton(filter_frame, text="Failures only", variable=self.trade_failed_only).pack(side=tk.LEFT)
+        ttk.Button(filter_frame, text="Search", command=self.search_trades).pack(side=tk.LEFT, padx=5)
 
-        log_file = self.logs_path / self.current_log
+        self.trade_summary_label = ttk.Label(self.trades_tab, text="")
+        self.trade_summary_label.pack(fill=tk.X, padx=5)
 
+        # Results on the left, details of the selected trade on the right
+        paned = ttk.PanedWindow(self.trades_tab, orient=tk.HORIZONTAL)
+        paned.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        results_frame = ttk.Frame(paned)
+        columns = ("date", "player", "duration", "status", "processed", "failed")
+        self.trades_tree = ttk.Treeview(results_frame, columns=columns, show="headings", height=25)
+        for column, heading, width in [("date", "Date", 140), ("player", "Player", 120), ("duration", "Duration (s)", 80),
+                                       ("status", "Status", 80), ("processed", "Processed", 70), ("failed", "Failed", 60)]:
+            self.trades_tree.heading(column, text=heading)
+            self.trades_tree.column(column, width=width, anchor=tk.W)
+        scrollbar = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=self.trades_tree.yview)
+        self.trades_tree.config(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.trades_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.trades_tree.bind("<<TreeviewSelect>>", self.on_trade_select)
+        paned.add(results_frame, weight=3)
+
+        details_frame = ttk.Frame(paned)
+        ttk.Label(details_frame, text="Trade Details", font=("Arial", 12, "bold")).pack()
+        self.trade_details_text = scrolledtext.ScrolledText(details_frame, wrap=tk.WORD, height=25)
+        self.trade_details_text.pack(fill=tk.BOTH, expand=True)
+        paned.add(details_frame, weight=2)
+
+    def read_trade_filters(self):
+        """Collect the trade search filters, or None if a date cannot be read"""
         try:
-            content = self.log_text.get(1.0, tk.END)
-            log_file.write_text(content)
-            messagebox.showinfo("Success", f"Log file '{self.current_log}' saved successfully!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save log: {e}")
+            return {
+                "player": self.trade_filter_entries["player"].get().strip(),
+                "item": self.trade_filter_entries["item"].get().strip(),
+                "date_from": parse_date_filter(self.trade_filter_entries["date_from"].get()),
+                "date_to": parse_date_filter(self.trade_filter_entries["date_to"].get(), end_of_range=True),
+                "failed_only": self.trade_failed_only.get(),
+            }
+        except ValueError as e:
+            messagebox.showwarning("Warning", str(e))
+            return None
+
+    @traced
+    def search_trades(self):
+        """Bring the trade database up to date and run the current search"""
+        filters = self.read_trade_filters()
+        if filters is not None:
+            self.io.submit("trades_search", self.core.query_trades, filters,
+                           on_done=self.show_trades, on_error=self.show_error("Failed to search trades"),
+                           loading="Searching trades...")
+
+    def show_trades(self, result):
+        trades, (trade_count, processed, failed) = result
+        self.trades_tree.delete(*self.trades_tree.get_children())
+        for trade in trades:
+            duration = "" if trade["duration"] is None else f"{trade['duration']:.1f}"
+            self.trades_tree.insert("", tk.END, iid=str(trade["id"]), values=(
+                trade["date"] or "", trade["player"] or "", duration, trade["status"] or "",
+                trade["items_processed"], trade["items_failed"]))
+        shown = f" (showing newest {len(trades):,})" if len(trades) < trade_count else ""
+        self.trade_summary_label.config(
+            text=f"{trade_count:,} trades{shown} - {processed:,} items processed, {failed:,} failed")
+
+    @traced
+    def on_trade_select(self, event):
+        """Show the items of the selected trade"""
+        selection = self.trades_tree.selection()
+        if selection:
+            self.io.submit("trade_details", self.core.trade_items, int(selection[0]),
+                           on_done=self.show_trade_details)
+
+    def show_trade_details(self, items):
+        titles = {"received": "Received", "returned": "Returned", "processed": "Processed", "failed": "Failed"}
+        lines = []
+        for kind in ("received", "returned", "processed", "failed"):
+            rows = [row for row in items if row[0] == kind]
+            if rows:
+                lines.append(f"--- {titles[kind]} ({len(rows)}) ---")
+                for _, bag, item, result in rows:
+                    text = f"{bag}: {item}" if bag else item
+                    lines.append(f"  - {text} -> {result}" if result else f"  - {text}")
+                lines.append("")
+        self.trade_details_text.delete(1.0, tk.END)
+        self.trade_details_text.insert(1.0, "\n".join(lines))
+
+    def setup_stats_tab(self):
+        """Setup the Stats tab with throughput, latency, queue and failure statistics"""
+        top_frame = ttk.Frame(self.stats_tab)
+        top_frame.pack(fill=tk.X, padx=5, pady=5)
+        self.stats_summary_label = ttk.Label(top_frame, text="", justify=tk.LEFT)
+        self.stats_summary_label.pack(side=tk.LEFT)
+        ttk.Button(top_frame, text="Refresh", command=self.load_stats).pack(side=tk.RIGHT)
+
+        paned = ttk.PanedWindow(self.stats_tab, orient=tk.HORIZONTAL)
+        paned.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        hourly_frame = ttk.Frame(paned)
+        ttk.Label(hourly_frame, text="Per Hour", font=("Arial", 12, "bold")).pack()
+        columns = ("hour", "trades", "duration", "processed", "failed", "queue")
+        self.stats_hourly_tree = ttk.Treeview(hourly_frame, columns=columns, show="headings", height=25)
+        for column, heading, width in [("hour", "Hour", 110), ("trades", "Trades", 60), ("duration", "Avg Duration (s)", 100),
+                                       ("processed", "Processed", 70), ("failed", "Failed", 60), ("queue", "Max Queue", 70)]:
+            self.stats_hourly_tree.heading(column, text=heading)
+            self.stats_hourly_tree.column(column, width=width, anchor=tk.W)
+        scrollbar = ttk.Scrollbar(hourly_frame, orient=tk.VERTICAL, command=self.stats_hourly_tree.yview)
+        self.stats_hourly_tree.config(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.stats_hourly_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        paned.add(hourly_frame, weight=3)
+
+        recipes_frame = ttk.Frame(paned)
+        ttk.Label(recipes_frame, text="Failures by Recipe", font=("Arial", 12, "bold")).pack()
+        columns = ("recipe", "attempted", "failed", "rate")
+        self.stats_recipes_tree = ttk.Treeview(recipes_frame, columns=columns, show="headings", height=25)
+        for column, heading, width in [("recipe", "Recipe", 160), ("attempted", "Items", 60),
+                                       ("failed", "Failed", 60), ("rate", "Failure Rate", 80)]:
+            self.stats_recipes_tree.heading(column, text=heading)
+            self.stats_recipes_tree.column(column, width=width, anchor=tk.W)
+        self.stats_recipes_tree.pack(fill=tk.BOTH, expand=True)
+        paned.add(recipes_frame, weight=2)
+
+    @traced
+    def load_stats(self):
+        """Update the statistics with newly logged data and show them"""
+        # The core keeps the statistics between refreshes so only new log data is parsed
+        self.io.submit("stats", self.core.update_log_stats,
+                       on_done=self.show_stats, on_error=self.show_error("Failed to read log statistics"),
+                       loading="Reading log statistics...")
+
+    def show_stats(self, report):
+        def seconds(value):
+            return "-" if value is None else f"{value:.1f}s"
+
+        def number(value):
+            return "-" if value is None else f"{value:.1f}"
+
+        duration = report["duration"]
+        items = report["items_per_trade"]
+        self.stats_summary_label.config(text=(
+            f"Trades: {report['trades']:,}    Trades/hour (active hours): {number(report['trades_per_hour'])}    "
+            f"Current queue: {report['queue_depth']}\n"
+            f"Duration p50 {seconds(duration['p50'])}, p90 {seconds(duration['p90'])}, "
+            f"p99 {seconds(duration['p99'])}, max {seconds(duration['max'])}    "
+            f"Items per trade: mean {number(items['mean'])}, p50 {number(items['p50'])}, p90 {number(items['p90'])}"))
+
+        self.stats_hourly_tree.delete(*self.stats_hourly_tree.get_children())
+        for row in report["hourly"]:
+            self.stats_hourly_tree.insert("", tk.END, values=(
+                row["hour"] + ":00", row["trades"], number(row["average_duration"]),
+                row["items_processed"], row["items_failed"], row["queue_max"]))
+
+        self.stats_recipes_tree.delete(*self.stats_recipes_tree.get_children())
+        for row in report["recipes"]:
+            rate = "-" if row["failure_rate"] is None else f"{row['failure_rate']:.1%}"
+            self.stats_recipes_tree.insert("", tk.END, values=(row["recipe"], row["attempted"], row["failed"], rate))
+
+    def setup_fleet_tab(self):
+        """Setup the Fleet tab with the status of several bots and changes pushed to many at once"""
+        # Bots are scanned in parallel; this window's own bot shares its caches with the fleet
+        self.fleet = Fleet(cores=[self.core])
+        self.fleet_file = self.core.control_panel / FLEET_FILE
+        self.fleet_bots = []
+        # bot -> last status, for the rank names offered when pushing a change
+        self.fleet_statuses = {}
+
+        button_frame = ttk.Frame(self.fleet_tab)
+        button_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(button_frame, text="Add Bot...", command=self.add_fleet_bot).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="Remove Bot", command=self.remove_fleet_bots).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="Refresh", command=self.refresh_fleet).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="Push Recipe...", command=self.push_fleet_recipe).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(button_frame, text="Push Rank Change...", command=self.push_fleet_rank_change).pack(side=tk.RIGHT, padx=2)
+
+        self.fleet_summary_label = ttk.Label(self.fleet_tab, text="Select bots (Ctrl/Shift-click) to push changes to them")
+        self.fleet_summary_label.pack(fill=tk.X, padx=5)
+
+        tree_frame = ttk.Frame(self.fleet_tab)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        columns = ("bot", "recipes", "ranks", "logs", "last_trade", "recent", "status")
+        self.fleet_tree = ttk.Treeview(tree_frame, columns=columns, show="headings", selectmode="extended")
+        for column, heading, width in [("bot", "Bot", 150), ("recipes", "Recipes (enabled)", 110),
+                                       ("ranks", "Ranks / Players", 110), ("logs", "Logs", 100),
+                                       ("last_trade", "Last Trade", 140),
+                                       ("recent", "Trades / Failed Items (24h)", 150), ("status", "Status", 300)]:
+            self.fleet_tree.heading(column, text=heading)
+            self.fleet_tree.column(column, width=width, anchor=tk.W, stretch=(column == "status"))
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.fleet_tree.yview)
+        self.fleet_tree.config(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.fleet_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.io.submit("fleet_list", load_fleet, self.fleet_file, self.core.control_panel,
+                       on_done=self.show_fleet_bots, loading="Loading fleet...")
+
+    def show_fleet_bots(self, bots):
+        self.fleet_bots = bots
+        self.fleet_tree.delete(*self.fleet_tree.get_children())
+        for bot in bots:
+            self.insert_fleet_row(bot)
+        self.refresh_fleet()
+
+    def insert_fleet_row(self, bot):
+        self.fleet_tree.insert("", tk.END, iid=bot, values=(bot_name(bot), "", "", "", "", "", "Scanning..."))
+
+    @traced
+    def refresh_fleet(self, bots=None):
+        """Rescan the given bots (all by default); rows update as each bot finishes"""
+        channel = "fleet_scan" if bots is None else None
+        bots = list(self.fleet_bots) if bots is None else bots
+        for bot in bots:
+            if self.fleet_tree.exists(bot):
+                self.fleet_tree.set(bot, "status", "Scanning...")
+        self.io.submit(channel, self.fleet.scan, bots,
+                       on_progress=self.show_fleet_status, on_done=lambda results: self.show_fleet_summary(),
+                       loading=f"Scanning {len(bots)} bot(s)...")
+
+    def show_fleet_status(self, result):
+        bot, status = result
+        if not self.fleet_tree.exists(bot):
+            return
+        if isinstance(status, Exception):
+            self.fleet_statuses.pop(bot, None)
+            self.fleet_tree.item(bot, values=(bot_name(bot), "", "", "", "", "", f"Error: {status}"))
+            return
+        self.fleet_statuses[bot] = status
+        players = sum(status["ranks"].values())
+        invalid = f", {status['recipes_invalid']} invalid" if status["recipes_invalid"] else ""
+        self.fleet_tree.item(bot, values=(
+            status["name"], f"{status['recipes']} ({status['recipes_enabled']}{invalid})",
+            f"{len(status['ranks'])} / {players:,}",
+            f"{status['logs']} ({status['log_bytes'] / (1024 * 1024):,.1f} MB)",
+            status["last_trade"] or "-", f"{status['recent_trades']:,} / {status['recent_failed']:,}",
+            status["path"]))
+
+    def show_fleet_summary(self):
+        statuses = [self.fleet_statuses[bot] for bot in self.fleet_bots if bot in self.fleet_statuses]
+        failed = len(self.fleet_bots) - len(statuses)
+        text = (f"{len(statuses)} of {len(self.fleet_bots)} bots read - "
+                f"{sum(status['recipes'] for status in statuses)} recipes, "
+                f"{sum(sum(status['ranks'].values()) for status in statuses):,} rank entries, "
+                f"{sum(status['recent_trades'] for status in statuses):,} trades in the last 24h")
+        if failed:
+            text += f" ({failed} could not be read)"
+        self.fleet_summary_label.config(text=text)
+
+    def add_fleet_bot(self):
+        """Add a bot by its root folder or its Control Panel folder"""
+        folder = filedialog.askdirectory(title="Select a bot's folder or its Control Panel folder")
+        if not folder:
+            return
+        bot = str(Path(folder))
+        if bot in self.fleet_bots:
+            messagebox.showwarning("Warning", f"{bot} is already in the fleet")
+            return
+        self.fleet_bots.append(bot)
+        self.insert_fleet_row(bot)
+        self.io.submit_write(save_fleet, self.fleet_file, list(self.fleet_bots),
+                             on_error=self.show_error("Failed to save the fleet list"))
+        self.refresh_fleet([bot])
+
+    def remove_fleet_bots(self):
+        bots = self.selected_fleet_bots()
+        if bots and messagebox.askyesno("Confirm", f"Remove {len(bots)} bot(s) from the fleet?\n\n"
+                                                   "Their files are not touched."):
+            for bot in bots:
+                self.fleet_bots.remove(bot)
+                self.fleet_statuses.pop(bot, None)
+                self.fleet_tree.delete(bot)
+            self.io.submit_write(save_fleet, self.fleet_file, list(self.fleet_bots),
+                                 on_error=self.show_error("Failed to save the fleet list"))
+            self.show_fleet_summary()
+
+    def selected_fleet_bots(self):
+        bots = list(self.fleet_tree.selection())
+        if not bots:
+            messagebox.showwarning("Warning", "Please select one or more bots first")
+        return bots
+
+    def push_fleet_rank_change(self):
+        """Add or remove players in one rank on every selected bot"""
+        bots = self.selected_fleet_bots()
+        if not bots:
+            return
+        rank_names = sorted({rank_name for bot in bots for rank_name in self.fleet_statuses.get(bot, {}).get("ranks", {})})
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"Push Rank Change to {len(bots)} Bot(s)")
+        dialog.geometry("400x450")
+        dialog.transient(self.root)
+
+        options_frame = ttk.Frame(dialog)
+        options_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(options_frame, text="Rank:").pack(side=tk.LEFT)
+        rank_var = tk.StringVar(value=rank_names[0] if rank_names else "")
+        ttk.Combobox(options_frame, textvariable=rank_var, values=rank_names, width=15).pack(side=tk.LEFT, padx=2)
+        action_var = tk.StringVar(value="add")
+        ttk.Radiobutton(options_frame, text="Add", variable=action_var, value="add").pack(side=tk.LEFT, padx=2)
+        ttk.Radiobutton(options_frame, text="Remove", variable=action_var, value="remove").pack(side=tk.LEFT, padx=2)
+
+        ttk.Label(dialog, text="Players - one per line, comma separated, or CSV with a 'player' column:").pack(
+            fill=tk.X, padx=5)
+        names_text = scrolledtext.ScrolledText(dialog, wrap=tk.WORD, height=18)
+        names_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        def apply():
+            rank_name = rank_var.get().strip()
+            names = parse_player_names(names_text.get(1.0, tk.END))
+            if not rank_name or not names:
+                messagebox.showwarning("Warning", "Enter a rank and at least one player", parent=dialog)
+                return
+            adding = action_var.get() == "add"
+            verb = "Add" if adding else "Remove"
+            if not messagebox.askyesno("Confirm", f"{verb} {len(names)} player(s) {'to' if adding else 'from'} "
+                                                  f"'{rank_name}' on {len(bots)} bot(s)?", parent=dialog):
+                return
+            dialog.destroy()
+            self.io.submit_write(self.fleet.push_rank_change, bots, rank_name,
+                                 names if adding else (), () if adding else names,
+                                 on_done=lambda results: self.show_fleet_push_results(
+                                     f"{verb} players in '{rank_name}'", results,
+                                     lambda result: f"+{len(result[1])} / -{len(result[2])}"),
+                                 on_error=self.show_error("Failed to push the rank change"),
+                                 loading=f"Updating '{rank_name}' on {len(bots)} bot(s)...")
+
+        button_frame = ttk.Frame(dialog)
+        button_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(button_frame, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(button_frame, text="Apply", command=apply).pack(side=tk.RIGHT, padx=2)
+
+    def push_fleet_recipe(self):
+        """Copy one of this bot's recipes to every selected bot"""
+        bots = self.selected_fleet_bots()
+        if bots:
+            self.io.submit("fleet_recipes", self.core.read_recipe_names,
+                           on_done=lambda recipe_names: self.show_fleet_recipe_dialog(bots, recipe_names))
+
+    def show_fleet_recipe_dialog(self, bots, recipe_names):
+        if not recipe_names:
+            messagebox.showwarning("Warning", "This bot has no recipes to push")
+            return
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"Push Recipe to {len(bots)} Bot(s)")
+        dialog.transient(self.root)
+        ttk.Label(dialog, text=f"Recipe from {bot_name(self.core.control_panel)}:").pack(anchor=tk.W, padx=5, pady=5)
+        recipe_var = tk.StringVar(value=recipe_names[0])
+        ttk.Combobox(dialog, textvariable=recipe_var, values=recipe_names, state="readonly", width=40).pack(padx=5)
+        ttk.Label(dialog, text="The recipe file is replaced on each selected bot.").pack(anchor=tk.W, padx=5, pady=5)
+
+        def apply():
+            recipe_name = recipe_var.get()
+            dialog.destroy()
+            self.io.submit_write(self.write_fleet_recipe, bots, recipe_name,
+                                 on_done=lambda results: self.show_fleet_push_results(
+                                     f"Push recipe '{recipe_name}'", results, lambda result: "updated"),
+                                 on_error=self.show_error("Failed to push the recipe"),
+                                 loading=f"Pushing '{recipe_name}' to {len(bots)} bot(s)...")
+
+        button_frame = ttk.Frame(dialog)
+        button_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(button_frame, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(button_frame, text="Push", command=apply).pack(side=tk.RIGHT, padx=2)
+
+    def write_fleet_recipe(self, bots, recipe_name):
+        """Copy a local recipe file to other bots (writer thread)"""
+        result = self.core.read_editor_file(self.recipes_path / f"{recipe_name}.json")
+        if result is None:
+            raise FileNotFoundError(f"Recipe '{recipe_name}' no longer exists")
+        targets = [bot for bot in bots if self.fleet.core(bot) is not self.core]
+        return self.fleet.push_recipe(targets, recipe_name, result[0])
+
+    def show_fleet_push_results(self, title, results, describe):
+        """Report a change pushed to several bots and rescan them"""
+        lines = []
+        failures = 0
+        for bot in sorted(results, key=bot_name):
+            result = results[bot]
+            if isinstance(result, Exception):
+                failures += 1
+                lines.append(f"{bot_name(bot)}: FAILED - {result}")
+            else:
+                lines.append(f"{bot_name(bot)}: {describe(result)}")
+        message = f"{title} on {len(results)} bot(s):\n\n" + "\n".join(lines)
+        if failures:
+            messagebox.showwarning("Warning", message)
+        else:
+            messagebox.showinfo("Success", message)
+        self.refresh_fleet(list(results))
+
+    def start_watching(self):
+        """Show the ranks and start pushing file changes to the lists"""
+        self.directories_ready = True
+        if self.is_built(self.ranks_tab):
+            self.load_rank_tabs()
+        self.file_watcher.watch(self.config_path)
+        self.file_watcher.watch(self.recipes_path)
+        self.file_watcher.watch(self.ranks_path)
+        self.file_watcher.watch(self.help_templates_path)
+        # Logs are appended to constantly; only new and removed files matter for the list
+        self.file_watcher.watch(self.logs_path, names_only=True)
+        self.file_watcher.start()
+
+    @traced
+    def on_files_changed(self, changes):
+        """Update just the list entries and editors affected by a batch of file changes"""
+        for path in changes:
+            self.core.config_cache.invalidate(path)
+
+        # Tabs not built yet read everything fresh when they are first shown
+        recipes = self.is_built(self.recipes_tab)
+        help_templates = self.is_built(self.help_menu_tab)
+        commands = self.is_built(self.commands_tab)
+        ranks = self.is_built(self.ranks_tab)
+        logs = self.is_built(self.logs_tab)
+
+        recipes_changed = False
+        for path, signature in changes.items():
+            folder = path.parent
+            exists = signature is not None
+            if path == self.recipes_path and recipes:
+                self.load_recipes_list()
+            elif path == self.help_templates_path and help_templates:
+                self.load_help_templates_list()
+            elif path == self.ranks_path and ranks:
+                self.load_rank_tabs()
+            elif path == self.logs_path and logs:
+                self.load_logs_list()
+            elif path == self.config_path and commands:
+                self.load_commands_list()
+            elif folder == self.recipes_path and path.suffix == ".json" and path.name != "_template.json":
+                if recipes:
+                    self.update_listbox_entry(self.recipes_listbox, path.stem, exists)
+                    recipes_changed = True
+            elif folder == self.help_templates_path and help_templates:
+                self.update_listbox_entry(self.help_templates_listbox, path.name, exists)
+            elif folder == self.ranks_path and path.suffix == ".json" and ranks:
+                self.io.submit(f"rank:{path.stem}", self.core.read_rank, path,
+                               on_done=lambda result, rank_name=path.stem: self.show_rank(rank_name, result),
+                               on_error=self.show_error(f"Failed to read rank '{path.stem}'"))
+            elif folder == self.logs_path and is_log_file(path) and logs:
+                # New logs are the newest, so they go to the top
+                self.update_listbox_entry(self.logs_listbox, path.name, exists, at_top=True)
+            elif path == self.config_path / "commands.json" and commands:
+                self.load_commands_list()
+
+        if recipes_changed:
+            self.io.submit("recipe_index", self.core.refresh_recipe_index,
+                           on_done=lambda changed: self.update_recipe_xref())
+            self.load_item_names()
+        self.check_open_editors(changes)
+
+    def update_listbox_entry(self, listbox, name, present, at_top=False):
+        """Add or remove one name, keeping a sorted listbox sorted"""
+        names = listbox.get(0, tk.END)
+        if present and name not in names:
+            position = 0 if at_top else next((i for i, other in enumerate(names) if other > name), tk.END)
+            listbox.insert(position, name)
+        elif not present and name in names:
+            listbox.delete(names.index(name))
+
+    def check_open_editors(self, changes):
+        """Reload or warn about editors whose file changed on disk underneath them"""
+        for text_widget, (path, signature, reload) in list(self.editor_files.items()):
+            if path not in changes or changes[path] == signature:
+                continue
+            current = changes[path]
+            if current is not None and current == self.core.written_signatures.get(path):
+                # Our own save
+                self.editor_files[text_widget] = (path, current, reload)
+            elif current is None:
+                self.editor_files[text_widget] = (path, current, reload)
+                messagebox.showwarning("Warning", f"'{path.name}' was deleted on disk. Saving will recreate it.")
+            elif not text_widget.edit_modified():
+                # Nothing to lose - just show the new version
+                reload()
+            elif messagebox.askyesno("File Changed", f"'{path.name}' changed on disk while you were editing it.\n\n"
+                                                     "Reload it and discard your changes?"):
+                reload()
+            else:
+                # Keep the edits; saving will overwrite the outside change
+                self.editor_files[text_widget] = (path, current, reload)
 
+    @traced
     def on_tab_changed(self, event):
-        """Auto-reload lists when switching tabs"""
+        """Build a tab on first use, and refresh the tabs whose contents come from queries"""
         selected_tab = self.notebook.select()
         tab_index = self.notebook.index(selected_tab)
+        self.build_tab(selected_tab)
 
-        # Reload appropriate list based on which tab is selected
-        if tab_index == 0:  # Recipes tab
-            self.load_recipes_list()
-        elif tab_index == 1:  # Help Menu tab
-            self.load_help_templates_list()
-        elif tab_index == 2:  # Commands tab
-            self.load_commands_list()
-        elif tab_index == 4:  # Logs tab
-            self.load_logs_list()
+        # Config and log lists are kept current by the file watcher
+        if tab_index == 0:  # Recipes tab - pick up item names from new trades
+            self.load_item_names()
+        elif tab_index == 5:  # Trades tab
+            self.search_trades()
+        elif tab_index == 6:  # Stats tab
+            self.load_stats()
+        elif tab_index == 7:  # Fleet tab
+            if self.fleet_bots and not self.io.is_busy("fleet_scan"):
+                self.refresh_fleet()
 
 if __name__ == "__main__":
     root = tk.Tk()
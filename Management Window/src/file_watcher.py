@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Craftbot File Watcher
+Reports changes to the config and log folders as they happen, using inotify
+on Linux and a periodic directory scan everywhere else
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+
+from config_cache import file_signature
+
+# How long a folder must stay quiet before its changes are reported (seconds)
+COALESCE_DELAY = 0.3
+# Longest a change waits while a folder keeps changing, e.g. a log being written
+MAX_DELAY = 2.0
+# How often the polling backend rescans, and how often inotify retries missing folders
+POLL_INTERVAL = 1.0
+
+logger = logging.getLogger(__name__)
+
+# inotify event bits (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+# Entries added, removed or renamed
+NAME_EVENTS = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+# ...plus changes to their contents
+CONTENT_EVENTS = NAME_EVENTS | IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_ignored(name):
+    # Temporary files from atomic_write_text and editors' hidden files
+    return name.startswith(".")
+
+
+class PollingBackend:
+    """Rescans each folder every POLL_INTERVAL, comparing (mtime, size) of its entries
+
+    os.scandir returns each entry's stat data with the listing on Windows, so
+    a rescan costs one directory read per folder rather than a stat per file.
+    """
+
+    name = "polling"
+
+    def __init__(self, directories, stop_event):
+        self.directories = directories
+        self.stop_event = stop_event
+        self.snapshots = {directory: self.scan(directory) for directory in directories}
+        self.next_scan = time.monotonic() + POLL_INTERVAL
+
+    def scan(self, directory):
+        """{name: (mtime, size)} of a folder's files, or None if the folder is missing"""
+        entries = {}
+        try:
+            with os.scandir(str(directory)) as iterator:
+                for entry in iterator:
+                    if is_ignored(entry.name):
+                        continue
+                    try:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            entries[entry.name] = (stat.st_mtime_ns, stat.st_size)
+                    except OSError:
+                        pass
+        except OSError:
+            return None
+        return entries
+
+    def read(self, timeout):
+        """Wait up to timeout and return the paths that changed"""
+        wait = min(timeout, max(0.0, self.next_scan - time.monotonic()))
+        if self.stop_event.wait(wait) or time.monotonic() < self.next_scan:
+            return set()
+        self.next_scan = time.monotonic() + POLL_INTERVAL
+
+        changed = set()
+        for directory, names_only in self.directories.items():
+            old = self.snapshots[directory]
+            new = self.scan(directory)
+            self.snapshots[directory] = new
+            if (old is None) != (new is None):
+                changed.add(directory)
+            old, new = old or {}, new or {}
+            for name in old.keys() ^ new.keys():
+                changed.add(directory / name)
+            if not names_only:
+                changed.update(directory / name for name in old.keys() & new.keys() if old[name] != new[name])
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    """Linux inotify watches on each folder (not recursive)"""
+
+    name = "inotify"
+
+    def __init__(self, directories, stop_event):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = directories
+        # watch descriptor -> folder, and the folders without a watch yet
+        self.watches = {}
+        self.missing = set(directories)
+        self.next_retry = 0.0
+        self.add_missing()
+
+    def add_missing(self):
+        """Watch folders that did not exist before; returns the ones that now do"""
+        added = set()
+        for directory in list(self.missing):
+            mask = (NAME_EVENTS if self.directories[directory] else CONTENT_EVENTS) | IN_ONLYDIR
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), mask)
+            if wd >= 0:
+                self.watches[wd] = directory
+                self.missing.discard(directory)
+                added.add(directory)
+        self.next_retry = time.monotonic() + POLL_INTERVAL
+        return added
+
+    def read(self, timeout):
+        """Wait up to timeout and return the paths that changed"""
+        changed = set()
+        if self.missing and time.monotonic() >= self.next_retry:
+            # A folder that appears is reported as a whole, since its files were never seen
+            changed |= self.add_missing()
+        ready, _, _ = select.select([self.fd], [], [], min(timeout, POLL_INTERVAL))
+        if not ready:
+            return changed
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += _EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; every folder has to be reread
+                changed.update(self.directories)
+                continue
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                del self.watches[wd]
+                self.missing.add(directory)
+                changed.add(directory)
+            elif name and not is_ignored(os.fsdecode(name)):
+                changed.add(directory / os.fsdecode(name))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """Watches folders on a background thread and reports changed files in batches
+
+    Changes are collected until the folders have been quiet for
+    COALESCE_DELAY (or for at most MAX_DELAY), then on_changes is called on
+    the watcher thread with {path: (mtime, size) or None if it is gone}. A
+    path that is one of the watched folders means the whole folder has to
+    be reread, for example because it was created or recreated.
+
+    If on_changes raises, on_error(exception) is called on the watcher
+    thread, or the failure is logged if there is no on_error, and watching
+    goes on.
+    """
+
+    def __init__(self, on_changes, delay=COALESCE_DELAY, on_error=None):
+        self.on_changes = on_changes
+        self.on_error = on_error
+        self.delay = delay
+        # folder -> True if only added/removed entries matter
+        self.directories = {}
+        self.backend = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def watch(self, directory, names_only=False):
+        """Add a folder before start(); names_only ignores changes to existing files' contents"""
+        self.directories[Path(directory)] = names_only
+
+    def start(self):
+        backend = None
+        if sys.platform.startswith("linux"):
+            try:
+                backend = InotifyBackend(self.directories, self._stop)
+            except (OSError, AttributeError):
+                backend = None
+        self.backend = backend or PollingBackend(self.directories, self._stop)
+        self._thread = threading.Thread(target=self._run, name="craftbot-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2 * POLL_INTERVAL)
+            self._thread = None
+
+    def _run(self):
+        pending = set()
+        first = last = 0.0
+        try:
+            while not self._stop.is_set():
+                if pending:
+                    timeout = max(0.0, min(last + self.delay, first + MAX_DELAY) - time.monotonic())
+                else:
+                    timeout = POLL_INTERVAL
+                changed = self.backend.read(timeout)
+                now = time.monotonic()
+                if changed:
+                    if not pending:
+                        first = now
+                    pending |= changed
+                    last = now
+                if pending and (now - last >= self.delay or now - first >= MAX_DELAY):
+                    batch = {path: file_signature(path) for path in pending}
+                    pending = set()
+                    try:
+                        self.on_changes(batch)
+                    except Exception as e:
+                        if self.on_error is not None:
+                            self.on_error(e)
+                        else:
+                            logger.error("File change handler failed: %r", e, exc_info=e)
+        finally:
+            self.backend.close()
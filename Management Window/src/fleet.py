@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Craftbot Fleet
+Status and bulk changes across several bot installs at once
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from config_files import atomic_write_text
+from craftbot_core import CraftbotCore, resolve_control_panel
+from log_archive import list_segments
+
+# The list of bots, kept next to (not in) the local config folder - the bot loads every config/*.json
+FLEET_FILE = "fleet.json"
+# Bots scanned or changed at the same time
+FLEET_WORKERS = 8
+# Trades newer than this count as recent
+RECENT_TRADES_HOURS = 24
+
+
+def load_fleet(path, default):
+    """Bot folders listed in the fleet file, or [default] if there is none yet"""
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8-sig"))
+        return [str(bot) for bot in data.get("bots", [])]
+    except (OSError, ValueError, AttributeError):
+        return [str(default)]
+
+
+def save_fleet(path, bots):
+    atomic_write_text(path, json.dumps({"bots": list(bots)}, indent=2))
+
+
+def bot_name(control_panel):
+    """A short name for a bot: the folder above bin/Debug/Control Panel, or the folder itself"""
+    path = Path(control_panel)
+    if path.name == "Control Panel" and path.parent.name == "Debug" and path.parent.parent.name == "bin":
+        return path.parent.parent.parent.name
+    return path.name
+
+
+class Fleet:
+    """Several bot installs, each with its own CraftbotCore, scanned in parallel
+
+    The cores are kept between scans, so their caches, recipe indexes and
+    trade databases only pick up what changed since the last refresh.
+    """
+
+    def __init__(self, cores=()):
+        # Cores already open elsewhere (the window's own bot) are shared rather than reopened
+        self._cores = {os.path.normcase(str(core.control_panel)): core for core in cores}
+        self._shared = set(self._cores)
+        self._pool = ThreadPoolExecutor(max_workers=FLEET_WORKERS, thread_name_prefix="craftbot-fleet")
+
+    def core(self, bot):
+        control_panel = resolve_control_panel(bot)
+        key = os.path.normcase(str(control_panel))
+        if key not in self._cores:
+            self._cores[key] = CraftbotCore(control_panel)
+        return self._cores[key]
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        for key, core in self._cores.items():
+            if key not in self._shared:
+                core.close()
+
+    def _run(self, bots, func, progress=None):
+        """Run func(core) for every bot in parallel; returns {bot: result or the exception}"""
+        futures = {self._pool.submit(func, self.core(bot)): bot for bot in bots}
+        results = {}
+        for future in as_completed(futures):
+            bot = futures[future]
+            try:
+                results[bot] = future.result()
+            except Exception as e:
+                results[bot] = e
+            if progress is not None:
+                progress((bot, results[bot]))
+        return results
+
+    def scan(self, bots, progress=None):
+        """Status of every bot; each (bot, status) pair is passed to progress as soon as it is read"""
+        return self._run(bots, scan_bot, progress)
+
+    def push_rank_change(self, bots, rank_name, add=(), remove=()):
+        """Apply one player change to a rank in every bot, creating the rank where players are added to a missing one
+
+        Returns {bot: (players, added, removed) or the exception}.
+        """
+        def apply(core):
+            if add and not core.rank_file(rank_name).exists():
+                core.ranks_path.mkdir(parents=True, exist_ok=True)
+                core.write_rank_created(rank_name)
+            return core.write_rank_players(rank_name, add, remove)
+
+        return self._run(bots, apply)
+
+    def push_recipe(self, bots, recipe_name, content):
+        """Write one recipe file into every bot; returns {bot: True or the exception}"""
+        def apply(core):
+            core.recipes_path.mkdir(parents=True, exist_ok=True)
+            core.write_recipe(core.recipes_path / f"{recipe_name}.json", content)
+            return True
+
+        return self._run(bots, apply)
+
+
+def scan_bot(core):
+    """Recipe, rank, log and recent trade figures for one bot"""
+    if not core.config_path.is_dir():
+        raise FileNotFoundError(f"No config folder in {core.control_panel}")
+
+    recipes = core.read_all_recipes()
+    ranks = core.read_ranks()
+    log_names = core.read_log_names() or []
+    log_bytes = 0
+    for log_name in log_names:
+        try:
+            log_bytes += (core.logs_path / log_name).stat().st_size
+        except OSError:
+            pass
+
+    status = {
+        "name": bot_name(core.control_panel),
+        "path": str(core.control_panel),
+        "recipes": len(recipes),
+        "recipes_enabled": sum(1 for name, recipe in recipes
+                               if not isinstance(recipe, Exception) and core.recipe_index.enabled(name)),
+        "recipes_invalid": sum(1 for name, recipe in recipes if isinstance(recipe, Exception)),
+        "ranks": {rank_name: len(players) for rank_name, players in ranks},
+        "logs": len(log_names),
+        "log_bytes": log_bytes,
+        "last_trade": None,
+        "recent_trades": 0,
+        "recent_failed": 0,
+    }
+    if core.trade_log_path.exists() or list_segments(core.logs_path, core.trade_log_path.name):
+        store = core.ingest_trades()
+        newest = store.query(limit=1)
+        status["last_trade"] = newest[0]["date"] if newest else None
+        since = (datetime.now() - timedelta(hours=RECENT_TRADES_HOURS)).strftime("%Y-%m-%d %H:%M:%S")
+        trades, processed, failed = store.summary(date_from=since)
+        status["recent_trades"] = trades
+        status["recent_failed"] = failed
+    return status
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Craftbot Instrumentation
+Opt-in timing of UI handlers split into I/O, parse and render phases, with
+export in the Chrome trace format (chrome://tracing, Perfetto)
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from config_files import atomic_write_text
+
+# Set to 1 to start the window with tracing on
+TRACE_ENV = "CRAFTBOT_TRACE"
+# Operations at least this long are shown in the status bar (seconds)
+SLOW_THRESHOLD = 0.1
+# Trace events kept for export; the oldest are dropped first
+MAX_EVENTS = 200000
+# Where time goes: worker threads do "io" unless a span says "parse"; the Tk thread does "render"
+PHASES = ("io", "parse", "render")
+# Track the operation summaries are drawn on in the exported trace
+OPERATIONS_TID = 0
+
+
+class Operation:
+    """One user action: a handler call plus the background work and callbacks it led to"""
+
+    def __init__(self, operation_id, name, start):
+        self.id = operation_id
+        self.name = name
+        self.start = start
+        self.end = None
+        # Exclusive seconds spent in each phase
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        # Handler calls and background requests still running; the operation ends at zero
+        self.pending = 0
+
+    @property
+    def wall(self):
+        return self.end - self.start
+
+    def describe(self):
+        """e.g. on_recipe_select 412 ms (I/O 301, parse 78, render 21, waiting 12)"""
+        parts = [f"{label} {self.phases[phase] * 1000:.0f}"
+                 for phase, label in (("io", "I/O"), ("parse", "parse"), ("render", "render"))]
+        waiting = self.wall - sum(self.phases.values())
+        parts.append(f"waiting {max(waiting, 0) * 1000:.0f}")
+        return f"{self.name} {self.wall * 1000:.0f} ms ({', '.join(parts)})"
+
+
+class _Span:
+    """A timed phase on one thread; time spent in nested spans is not counted twice"""
+
+    __slots__ = ("tracer", "operation", "phase", "name", "start", "nested", "parent")
+
+    def __init__(self, tracer, operation, phase, name):
+        self.tracer = tracer
+        self.operation = operation
+        self.phase = phase
+        self.name = name
+
+    def __enter__(self):
+        local = self.tracer._local
+        self.parent = getattr(local, "span", None)
+        if self.operation is None and self.parent is not None:
+            self.operation = self.parent.operation
+        local.span = self
+        self.nested = 0.0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        duration = end - self.start
+        self.tracer._local.span = self.parent
+        if self.parent is not None:
+            self.parent.nested += duration
+        self.tracer._record(self, duration - self.nested, end)
+        return False
+
+
+class _NullSpan:
+    """What phase() returns while tracing is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Collects spans and operations while enabled; costs one attribute check when not
+
+    Operations are started and finished on the Tk thread. Spans may be
+    recorded from any thread.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        # Called on the Tk thread with every finished operation of at least SLOW_THRESHOLD
+        self.on_slow = None
+        self.last_slow = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=MAX_EVENTS)
+        self._thread_names = {}
+        self._ids = 0
+        self._epoch = time.perf_counter()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+        self.last_slow = None
+
+    def current(self):
+        span = getattr(self._local, "span", None)
+        return span.operation if span is not None else None
+
+    def phase(self, phase, name):
+        """Context manager timing a phase of whatever operation is running on this thread"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, None, phase, name)
+
+    def run_handler(self, name, func, args, kwargs):
+        """Run a UI handler as an operation, or as part of the one already running"""
+        operation = self.current()
+        if operation is None:
+            self._ids += 1
+            operation = Operation(self._ids, name, time.perf_counter())
+        operation.pending += 1
+        try:
+            with _Span(self, operation, "render", name):
+                return func(*args, **kwargs)
+        finally:
+            self.release(operation)
+
+    def hold(self):
+        """Keep the current operation open for a background request; returns it (or None)"""
+        operation = self.current() if self.enabled else None
+        if operation is not None:
+            operation.pending += 1
+        return operation
+
+    def release(self, operation):
+        """A handler call or background request of operation is done"""
+        operation.pending -= 1
+        if operation.pending == 0:
+            operation.end = time.perf_counter()
+            self._record_operation(operation)
+
+    def resume(self, operation, phase, name):
+        """Context manager running part of a held operation, on any thread"""
+        return _Span(self, operation, phase, name)
+
+    def _timestamp(self, seconds):
+        return round((seconds - self._epoch) * 1e6, 1)
+
+    def _record(self, span, exclusive, end):
+        thread = threading.current_thread()
+        event = {
+            "name": span.name, "cat": span.phase, "ph": "X", "pid": os.getpid(), "tid": thread.ident,
+            "ts": self._timestamp(span.start), "dur": round((end - span.start) * 1e6, 1),
+        }
+        if span.operation is not None:
+            event["args"] = {"operation": f"{span.operation.name} #{span.operation.id}"}
+        with self._lock:
+            if span.operation is not None:
+                span.operation.phases[span.phase] += exclusive
+            self._thread_names[thread.ident] = thread.name
+            self._events.append(event)
+
+    def _record_operation(self, operation):
+        args = {phase: round(seconds * 1000, 3) for phase, seconds in operation.phases.items()}
+        with self._lock:
+            self._events.append({
+                "name": f"{operation.name} #{operation.id}", "cat": "operation", "ph": "X", "pid": os.getpid(),
+                "tid": OPERATIONS_TID, "ts": self._timestamp(operation.start),
+                "dur": round(operation.wall * 1e6, 1), "args": dict(args, wall=round(operation.wall * 1000, 3)),
+            })
+        if operation.wall >= SLOW_THRESHOLD:
+            self.last_slow = operation
+            if self.on_slow is not None:
+                self.on_slow(operation)
+
+    def export(self, path):
+        """Write the recorded events as a Chrome trace JSON file; returns the number of events"""
+        with self._lock:
+            events = list(self._events)
+            thread_names = dict(self._thread_names)
+        thread_names[OPERATIONS_TID] = "Operations"
+        metadata = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                    for tid, name in thread_names.items()]
+        atomic_write_text(path, json.dumps({"traceEvents": metadata + events, "displayTimeUnit": "ms"}))
+        return len(events)
+
+
+# The window's tracer; on from the start if CRAFTBOT_TRACE=1
+tracer = Tracer()
+tracer.enable(os.environ.get(TRACE_ENV) == "1")
+
+
+def traced(func):
+    """Record calls of a UI handler as operations while tracing is enabled"""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not tracer.enabled:
+            return func(*args, **kwargs)
+        return tracer.run_handler(name, func, args, kwargs)
+    return wrapper
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Craftbot Item Names
+Item name database built from the trade history, used for recipe editor
+autocomplete and recipe validation
+"""
+
+import difflib
+import json
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+from config_files import atomic_write_text
+from recipe_index import iter_recipe_items
+
+# Cache of the cleaned names, kept next to the trade database
+CACHE_NAME = "item_names.json"
+CACHE_VERSION = 1
+# Suggestions shown while typing
+MAX_COMPLETIONS = 12
+# How similar an unknown name must be to a known one to be reported as a likely typo
+TYPO_CUTOFF = 0.85
+# A name used this many times across recipes is taken to be spelled correctly
+TRUSTED_RECIPE_USES = 2
+
+# GetItemDisplayName appends " QL<n>" and " x<count>" to item names
+_SUFFIX_PATTERN = re.compile(r"(?: QL\d+)?(?: x\d+)?$")
+_UNRESOLVED_PATTERN = re.compile(r"^(?:Unknown Item \(ID: -?\d+\)|NULL_ITEM|Unknown)$")
+
+
+def clean_item_name(text):
+    """Item name without the quality/stack suffixes, or None if the bot could not resolve it"""
+    name = _SUFFIX_PATTERN.sub("", text.strip())
+    if not name or _UNRESOLVED_PATTERN.match(name):
+        return None
+    return name
+
+
+class ItemNameIndex:
+    """Sorted array of item names, compared case-insensitively like the bot does"""
+
+    def __init__(self, names):
+        by_key = {}
+        for name in names:
+            by_key.setdefault(name.casefold(), name)
+        self.keys = sorted(by_key)
+        self.names = [by_key[key] for key in self.keys]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, name):
+        key = name.casefold()
+        position = bisect_left(self.keys, key)
+        return position < len(self.keys) and self.keys[position] == key
+
+    def _prefix_range(self, prefix):
+        prefix = prefix.casefold()
+        return bisect_left(self.keys, prefix), bisect_left(self.keys, prefix + "\U0010ffff")
+
+    def complete(self, prefix, limit=MAX_COMPLETIONS):
+        """Names starting with prefix, in alphabetical order"""
+        first, last = self._prefix_range(prefix)
+        return self.names[first:min(last, first + limit)]
+
+    def closest(self, name):
+        """The known name most similar to name, or None if none is close
+
+        Only names with the same first letter and a similar length are
+        compared, which keeps this fast on large indexes.
+        """
+        key = name.casefold()
+        if not key:
+            return None
+        first, last = self._prefix_range(key[0])
+        candidates = [candidate for candidate in self.keys[first:last] if abs(len(candidate) - len(key)) <= 3]
+        matches = difflib.get_close_matches(key, candidates, n=1, cutoff=TYPO_CUTOFF)
+        if not matches:
+            return None
+        return self.names[bisect_left(self.keys, matches[0])]
+
+
+class ItemNameDatabase:
+    """Item names seen in trades, cached on disk and rebuilt only when new trades arrive"""
+
+    def __init__(self, store, cache_path):
+        self.store = store
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._key = None
+        self._index = None
+
+    def get(self):
+        """The current name index (worker thread); the caller ingests new trades first"""
+        with self._lock:
+            key = self.store.state_key()
+            if key != self._key:
+                self._index = ItemNameIndex(self._load_names(key))
+                self._key = key
+            return self._index
+
+    def _load_names(self, key):
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            if data.get("version") == CACHE_VERSION and data.get("key") == key:
+                return data["names"]
+        except (OSError, ValueError, KeyError):
+            pass
+        names = sorted({clean_item_name(text) for text in self.store.item_names()} - {None})
+        atomic_write_text(self.cache_path, json.dumps({"version": CACHE_VERSION, "key": key, "names": names}))
+        return names
+
+
+def validate_recipes(recipes, trade_names):
+    """Check the item names of every recipe; returns (recipe, field, message) issues
+
+    recipes is a list of (recipe name, parsed recipe or the JSON error). A
+    name counts as known if it was seen in a trade or is used at least
+    TRUSTED_RECIPE_USES times across recipes. Unknown names that are close to
+    a known one are reported as likely typos; other unknown items (not tools,
+    which never pass through trades) are reported as never traded once there
+    is a trade history to compare against.
+    """
+    references = []
+    for recipe_name, recipe in recipes:
+        if isinstance(recipe, Exception):
+            continue
+        references.extend((recipe_name, field, name.strip(), is_tool)
+                          for field, name, is_tool in iter_recipe_items(recipe))
+
+    uses = Counter(name.casefold() for _, _, name, _ in references)
+    trusted = [name for _, _, name, _ in references if uses[name.casefold()] >= TRUSTED_RECIPE_USES]
+    known = ItemNameIndex(list(trade_names.names) + trusted)
+
+    issues = [(recipe_name, "", f"Invalid JSON: {recipe}")
+              for recipe_name, recipe in recipes if isinstance(recipe, Exception)]
+    for recipe_name, field, name, is_tool in references:
+        if name in known:
+            continue
+        match = known.closest(name)
+        if match is not None:
+            issues.append((recipe_name, field, f"Unknown item '{name}' - did you mean '{match}'?"))
+        elif not is_tool and len(trade_names):
+            issues.append((recipe_name, field, f"'{name}' has never been seen in a trade"))
+    return issues
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Craftbot Live Validation
+Checks a JSON editor against a config schema while typing and highlights
+the problems inline
+"""
+
+import tkinter as tk
+
+from config_schema import DocumentValidator
+
+# Quiet time after the last change before the editor is checked (ms)
+VALIDATE_DELAY = 400
+# Problems listed when asking whether to save anyway
+SAVE_PROBLEMS_SHOWN = 8
+
+TAGS = {"error": "schema_error", "warning": "schema_warning"}
+
+
+class LiveValidation:
+    """Highlights schema problems in a Text widget a moment after each change
+
+    The check runs on io's reader threads (channel supersedes older checks)
+    and only rechecks the part of the document that was edited, so typing
+    stays responsive in large documents. label shows the problem count, or
+    the message of the problem under the mouse.
+    """
+
+    def __init__(self, text, label, io, schema, channel):
+        self.text = text
+        self.label = label
+        self.io = io
+        self.channel = channel
+        self.validator = DocumentValidator(schema)
+        # The text last checked and what was found in it
+        self.checked = None
+        self.problems = []
+        self._job = None
+
+        self.text.tag_configure(TAGS["error"], background="#ffd6d6", underline=True)
+        self.text.tag_configure(TAGS["warning"], background="#fff0c0")
+        for tag in TAGS.values():
+            self.text.tag_bind(tag, "<Motion>", self.on_motion)
+            self.text.tag_bind(tag, "<Leave>", lambda e: self.show_summary())
+        self.text.bind("<KeyRelease>", self.schedule, add="+")
+        for sequence in ("<<Paste>>", "<<Cut>>", "<<Undo>>", "<<Redo>>"):
+            self.text.bind(sequence, self.schedule, add="+")
+
+    def schedule(self, event=None):
+        """Check the editor once it has been left alone for VALIDATE_DELAY"""
+        if self._job is not None:
+            self.text.after_cancel(self._job)
+        self._job = self.text.after(VALIDATE_DELAY, self.check)
+
+    def check(self):
+        self._job = None
+        content = self.text.get("1.0", "end-1c")
+        if content == self.checked:
+            return
+        self.io.submit(self.channel, self.validator.check, content,
+                       on_done=lambda problems: self.show(content, problems))
+
+    def show(self, content, problems):
+        if self.text.get("1.0", "end-1c") != content:
+            # Edited while being checked; the check scheduled by that edit replaces this one
+            return
+        self.checked = content
+        self.problems = problems
+        for tag in TAGS.values():
+            self.text.tag_remove(tag, "1.0", tk.END)
+        for start, end, severity, path, message in problems:
+            self.text.tag_add(TAGS[severity], f"1.0 + {start} chars", f"1.0 + {max(end, start + 1)} chars")
+        self.show_summary()
+
+    def describe(self, problem):
+        start, end, severity, path, message = problem
+        line = self.text.index(f"1.0 + {start} chars").split(".")[0]
+        return f"Line {line}: {path} {message}"
+
+    def show_summary(self):
+        errors = sum(1 for problem in self.problems if problem[2] == "error")
+        warnings = len(self.problems) - errors
+        if not self.problems:
+            self.label.config(text="No problems found" if self.checked else "")
+        elif len(self.problems) == 1:
+            self.label.config(text=self.describe(self.problems[0]))
+        else:
+            self.label.config(text=f"{errors} error(s), {warnings} warning(s) - first: "
+                                   f"{self.describe(self.problems[0])}")
+
+    def on_motion(self, event):
+        offset = self.text.count("1.0", f"@{event.x},{event.y}", "chars")
+        if isinstance(offset, tuple):
+            offset = offset[0]
+        offset = offset or 0
+        for problem in self.problems:
+            if problem[0] <= offset < max(problem[1], problem[0] + 1):
+                self.label.config(text=self.describe(problem))
+                return
+
+    def errors(self, content):
+        """Errors found in content, the editor's text; checked on the spot if the last check is out of date
+
+        A save right after typing comes before the delayed check, so it must
+        not rely on that check having run.
+        """
+        if self.checked is None or content.rstrip("\n") != self.checked.rstrip("\n"):
+            if self._job is not None:
+                self.text.after_cancel(self._job)
+                self._job = None
+            current = self.text.get("1.0", "end-1c")
+            self.show(current, self.validator.check(current))
+        return [self.describe(problem) for problem in self.problems if problem[2] == "error"]
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Craftbot Log Archive
+Rotates the bot's logs into gzip segments and reads the segments back next
+to the live logs
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import struct
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Logs the bot keeps appending to, which the rotation archives
+ROTATED_LOGS = ["craftbot_debug.log", "trade_logs.txt", "alien_armor.log"]
+# Uncompressed bytes per segment; the log viewer reads a whole segment into memory
+SEGMENT_SIZE = 32 * 1024 * 1024
+ARCHIVE_SUFFIX = ".gz"
+COMPRESS_LEVEL = 6
+# How long the moved log must stop growing before it is considered complete (seconds)
+SETTLE_DELAY = 0.5
+# The bot opens a log for every write, and Windows refuses to rename an open file
+RENAME_ATTEMPTS = 40
+RENAME_RETRY_DELAY = 0.05
+# Bytes read from the moved log at a time, and compressed per write
+COPY_CHUNK_SIZE = 1024 * 1024
+# Leading bytes hashed to recognise a replaced log
+FINGERPRINT_SIZE = 4096
+
+# Lines that start a record; segments are only split before them, so a trade
+# block never spans two segments. Other logs may be split at any line.
+RECORD_STARTS = {
+    "craftbot_debug.log": re.compile(rb"\d{4}-\d\d-\d\d "),
+    "trade_logs.txt": re.compile(rb"=== DETAILED TRADE LOG ==="),
+    "alien_armor.log": re.compile(rb"=== ALIEN ARMOR TRADE LOG ==="),
+}
+
+# craftbot_debug.20261017-153000-001.log.gz -> (craftbot_debug, 20261017-153000-001, .log)
+_SEGMENT_PATTERN = re.compile(r"^(.+)\.(\d{8}-\d{6}-\d{3})(\.[^.]+)\.gz$")
+# Day of a debug line, or of a trade block's "Date: " line
+_DAY_PATTERN = re.compile(rb"^\s*(?:Date: )?(\d{4}-\d\d-\d\d)")
+
+
+def is_archive(path):
+    return Path(path).suffix == ARCHIVE_SUFFIX
+
+
+def segment_log_name(path):
+    """Name of the live log a segment was archived from, or None if path is not a segment"""
+    match = _SEGMENT_PATTERN.match(Path(path).name)
+    return match.group(1) + match.group(3) if match else None
+
+
+def list_segments(logs_path, log_name):
+    """Archived segments of a log, oldest first"""
+    segments = []
+    try:
+        with os.scandir(str(logs_path)) as iterator:
+            for entry in iterator:
+                if segment_log_name(entry.name) == log_name:
+                    segments.append(Path(logs_path) / entry.name)
+    except OSError:
+        pass
+    return sorted(segments, key=lambda segment: segment.name)
+
+
+def open_log(path):
+    """Open a live log or an archived segment for reading bytes"""
+    return gzip.open(str(path), "rb") if is_archive(path) else open(path, "rb")
+
+
+def fingerprint_bytes(data):
+    """Hash of a log's leading bytes, as stored by the indexes and databases built from it"""
+    return hashlib.sha1(data).digest()
+
+
+def log_fingerprint(path, size):
+    """fingerprint_bytes() of the first size bytes of a live log, or of a segment's decompressed contents"""
+    with open_log(path) as log_file:
+        return fingerprint_bytes(log_file.read(size))
+
+
+def read_archive(path):
+    """The whole decompressed contents of a segment"""
+    with gzip.open(str(path), "rb") as archive:
+        return archive.read()
+
+
+def archive_size(path):
+    """Decompressed size of a segment, from its gzip trailer
+
+    Exact for the segments written here, which are a single gzip member and
+    far below 4 GB.
+    """
+    with open(path, "rb") as archive:
+        archive.seek(-4, os.SEEK_END)
+        return struct.unpack("<I", archive.read(4))[0]
+
+
+class SegmentWriter:
+    """Compresses a log's lines into numbered segments of at most max_bytes (or one day)
+
+    Segments are written under hidden temporary names and only renamed to
+    their final names by finish(), so readers never see a partial segment.
+    Given the stamp and number of an interrupted writer, a new one continues
+    its numbering.
+    """
+
+    def __init__(self, log_path, max_bytes=SEGMENT_SIZE, by_day=False, stamp=None, number=None):
+        self.log_path = Path(log_path)
+        self.max_bytes = max_bytes
+        self.by_day = by_day
+        self.record_start = RECORD_STARTS.get(self.log_path.name)
+        self.stamp = stamp or datetime.now().strftime("%Y%m%d-%H%M%S")
+        # Two rotations within a second continue the numbering of the first
+        if number is None:
+            number = sum(1 for segment in list_segments(self.log_path.parent, self.log_path.name)
+                         if f".{self.stamp}-" in segment.name)
+        self.number = number
+        # (temporary path, final path) of every segment started
+        self.segments = []
+        self._file = None
+        self._size = 0
+        self._day = None
+        # Partial line carried to the next feed, and the lines of the record being collected
+        self._pending = b""
+        self._record = []
+        self._buffer = []
+        self._buffered = 0
+
+    def feed(self, data):
+        data = self._pending + data
+        end = data.rfind(b"\n") + 1
+        self._pending = data[end:]
+        for line in data[:end].split(b"\n")[:-1]:
+            line += b"\n"
+            if self._record and (self.record_start is None or self.record_start.match(line)):
+                self._write_record()
+            self._record.append(line)
+
+    def _write_record(self):
+        record = b"".join(self._record)
+        day = None
+        if self.by_day:
+            for line in self._record:
+                match = _DAY_PATTERN.match(line)
+                if match:
+                    day = match.group(1)
+                    break
+        self._record = []
+
+        if self._file is not None and (self._size + len(record) > self.max_bytes
+                                       or (day is not None and self._day is not None and day != self._day)):
+            self._close_segment()
+        if self._file is None:
+            self._open_segment()
+        if self._day is None:
+            self._day = day
+        self._buffer.append(record)
+        self._buffered += len(record)
+        self._size += len(record)
+        if self._buffered >= COPY_CHUNK_SIZE:
+            self._flush()
+
+    def segment_path(self, number):
+        stem, suffix = self.log_path.stem, self.log_path.suffix
+        return self.log_path.with_name(f"{stem}.{self.stamp}-{number:03d}{suffix}{ARCHIVE_SUFFIX}")
+
+    def _open_segment(self):
+        self.number += 1
+        final = self.segment_path(self.number)
+        temporary = final.with_name(f".{final.name}.tmp")
+        self.segments.append((temporary, final))
+        self._file = gzip.GzipFile(filename=final.name[:-len(ARCHIVE_SUFFIX)], mode="wb",
+                                   compresslevel=COMPRESS_LEVEL, fileobj=open(temporary, "wb"))
+        self._size = 0
+        self._day = None
+
+    def _flush(self):
+        self._file.write(b"".join(self._buffer))
+        self._buffer = []
+        self._buffered = 0
+
+    def _close_segment(self):
+        self._flush()
+        fileobj = self._file.fileobj
+        self._file.close()
+        fileobj.flush()
+        os.fsync(fileobj.fileno())
+        fileobj.close()
+        self._file = None
+
+    def finish(self):
+        """Write what is left and publish the segments; returns their paths"""
+        if self._pending:
+            self._record.append(self._pending)
+            self._pending = b""
+        if self._record:
+            self._write_record()
+        if self._file is not None:
+            self._close_segment()
+        for temporary, final in self.segments:
+            os.replace(temporary, final)
+        return [final for temporary, final in self.segments]
+
+    def discard(self):
+        if self._file is not None:
+            fileobj = self._file.fileobj
+            self._file.close()
+            fileobj.close()
+            self._file = None
+        for temporary, final in self.segments:
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+
+
+def _move_live_log(path, moved):
+    for attempt in range(RENAME_ATTEMPTS):
+        try:
+            os.replace(path, moved)
+            return
+        except PermissionError:
+            if attempt == RENAME_ATTEMPTS - 1:
+                raise
+            time.sleep(RENAME_RETRY_DELAY)
+
+
+def _read_rotation_state(state_path):
+    try:
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+        return state["stamp"], int(state["number"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None, None
+
+
+def _write_rotation_state(state_path, stamp, number):
+    temporary = state_path.with_name(state_path.name + ".tmp")
+    with open(temporary, "w", encoding="utf-8") as state_file:
+        json.dump({"stamp": stamp, "number": number}, state_file)
+        state_file.flush()
+        os.fsync(state_file.fileno())
+    os.replace(temporary, state_path)
+
+
+def rotate_log(path, max_bytes=SEGMENT_SIZE, by_day=False, min_bytes=1):
+    """Move a live log into gzip segments; returns the segments written
+
+    The log is renamed first, so the bot starts a new file with its next
+    write. A write that already had the old file open still lands in it,
+    so the moved file is read until it has stopped growing for
+    SETTLE_DELAY, and only then removed. A rotation that was interrupted is
+    finished by the next call before the live log is touched.
+
+    The segment stamp and numbering are kept next to the moved log. Each
+    segment holds an exact run of the moved log's bytes, so a resumed
+    rotation skips the bytes of the segments already published and writes
+    only the rest, and nothing is archived twice.
+    """
+    path = Path(path)
+    moved = path.with_name(f".{path.name}.rotating")
+    state_path = moved.with_name(moved.name + ".json")
+    stamp = number = None
+    published = []
+    offset = 0
+    if moved.exists():
+        # Segments the interrupted rotation had not published yet are written again
+        for name in os.listdir(path.parent):
+            if name.startswith(".") and name.endswith(".tmp") and segment_log_name(name[1:-4]) == path.name:
+                os.remove(path.parent / name)
+        stamp, number = _read_rotation_state(state_path)
+    else:
+        if not path.exists() or path.stat().st_size < max(min_bytes, 1):
+            return []
+        _move_live_log(path, moved)
+
+    writer = SegmentWriter(path, max_bytes, by_day, stamp, number)
+    if stamp is None:
+        _write_rotation_state(state_path, writer.stamp, writer.number)
+    else:
+        # Segments are published in order, so the published ones are the next numbers that exist
+        while writer.segment_path(writer.number + 1).exists():
+            writer.number += 1
+            published.append(writer.segment_path(writer.number))
+            offset += archive_size(published[-1])
+    try:
+        with open(moved, "rb") as source:
+            source.seek(offset)
+            while True:
+                chunk = source.read(COPY_CHUNK_SIZE)
+                if chunk:
+                    writer.feed(chunk)
+                    continue
+                time.sleep(SETTLE_DELAY)
+                if os.fstat(source.fileno()).st_size == source.tell():
+                    break
+        segments = writer.finish()
+    except BaseException:
+        writer.discard()
+        raise
+    os.remove(moved)
+    try:
+        os.remove(state_path)
+    except OSError:
+        pass
+    return published + segments
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Craftbot Log File Access
+Memory-mapped, line-addressable access to large log files, with a persistent
+line/timestamp index stored next to each log; archived gzip segments are
+decompressed into memory instead
+"""
+
+import mmap
+import os
+import re
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+from log_archive import FINGERPRINT_SIZE, fingerprint_bytes, is_archive, read_archive
+
+# Bytes scanned for line breaks per indexing step
+INDEX_CHUNK_SIZE = 4 * 1024 * 1024
+# One checkpoint (byte offset + timestamp) is kept for every this many lines
+LINES_PER_CHECKPOINT = 64
+# Suffix of the sidecar index written next to each log file
+INDEX_SUFFIX = ".idx"
+
+# Sidecar layout: header, then one (offset, timestamp) record per checkpoint
+INDEX_MAGIC = b"CBLI"
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct("<4sHHQQH20s")
+INDEX_RECORD = struct.Struct("<Qq")
+
+_CHECKPOINT_PATTERN = re.compile(rb"(?:[^\n]*\n){%d}" % LINES_PER_CHECKPOINT)
+# LogDebug lines start with "yyyy-MM-dd HH:mm:ss.fff"
+_TIMESTAMP_PATTERN = re.compile(rb"(\d{4})-(\d\d)-(\d\d) (\d\d):(\d\d):(\d\d)(?:\.(\d{3}))?")
+_QUERY_PATTERN = re.compile(r"^\s*(?:(\d{4})-(\d\d)-(\d\d)\s+)?(\d{1,2}):(\d\d)(?::(\d\d))?\s*$")
+
+
+def parse_timestamp(raw):
+    """Return a sortable yyyyMMddHHmmssfff key for a line's leading timestamp, or None"""
+    match = _TIMESTAMP_PATTERN.match(raw)
+    if not match:
+        return None
+    year, month, day, hour, minute, second, millis = match.groups()
+    return int(year + month + day + hour + minute + second + (millis or b"000"))
+
+
+def format_timestamp(key):
+    """Format a timestamp key the way LogDebug writes it"""
+    text = f"{key:017d}"
+    return f"{text[0:4]}-{text[4:6]}-{text[6:8]} {text[8:10]}:{text[10:12]}:{text[12:14]}.{text[14:17]}"
+
+
+def parse_time_query(text, default_date_key=None):
+    """Parse "HH:MM[:SS]" or "yyyy-MM-dd HH:MM[:SS]" into (timestamp key, precision)
+
+    precision is how far the typed time extends as a key difference: a second
+    (1000) when seconds were given, otherwise a minute (60000), so key +
+    precision is past the last line logged in it. A time without a date uses
+    the date of default_date_key. Returns None if the text cannot be parsed or
+    no date is available.
+    """
+    match = _QUERY_PATTERN.match(text)
+    if not match:
+        return None
+    year, month, day, hour, minute, second = match.groups()
+    if year:
+        date_part = int(year + month + day)
+    elif default_date_key:
+        date_part = default_date_key // 10 ** 9
+    else:
+        return None
+    precision = 1000 if second else 60000
+    hour, minute, second = int(hour), int(minute), int(second or 0)
+    if hour > 23 or minute > 59 or second > 59:
+        return None
+    return date_part * 10 ** 9 + hour * 10 ** 7 + minute * 10 ** 5 + second * 10 ** 3, precision
+
+
+def index_path_for(path):
+    """Sidecar index path for a log file"""
+    path = Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+class LogFile:
+    """Read-only view of a log file that maps it into memory and indexes line offsets
+
+    Only every LINES_PER_CHECKPOINT-th line offset is kept, so memory stays small
+    no matter how large the log grows; lines in between are found by scanning
+    forward from the nearest checkpoint.
+
+    Indexing and refreshing may run on a worker thread while the Tk thread reads
+    lines; only one thread may index or refresh at a time.
+
+    An archived segment never changes, so it is decompressed once and its bytes
+    take the place of the memory map (segments are at most SEGMENT_SIZE).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.index_path = index_path_for(self.path)
+        self._lock = threading.RLock()
+        self._file = None
+        self._map = None
+        self._mapped_size = 0
+        self.reset_index()
+
+    def reset_index(self):
+        """Forget all indexed line offsets"""
+        with self._lock:
+            self._reset_index()
+
+    def _reset_index(self):
+        # checkpoints[n] is the byte offset where line n * LINES_PER_CHECKPOINT starts
+        self.checkpoints = array('Q', [0])
+        # checkpoint_times[n] is the timestamp key in effect at that line (0 if none yet)
+        self.checkpoint_times = array('q', [0])
+        self.indexed_size = 0
+        self._tail_lines = 0
+        self._tail_end = 0
+        self._saved_checkpoints = 0
+
+    def open(self):
+        """Open and map the file"""
+        if is_archive(self.path):
+            self._map = read_archive(self.path)
+            self._mapped_size = len(self._map)
+            return self
+        self._file = open(self.path, 'rb')
+        self._remap()
+        return self
+
+    def close(self):
+        """Release the memory map and file handle"""
+        with self._lock:
+            if self._map is not None:
+                if self._file is not None:
+                    self._map.close()
+                self._map = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._mapped_size = 0
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _remap(self):
+        """(Re)create the memory map so it covers the whole file"""
+        new_map = None
+        # mmap refuses empty files, so an empty log simply stays unmapped
+        if os.fstat(self._file.fileno()).st_size > 0:
+            new_map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+            self._map = new_map
+            self._mapped_size = len(new_map) if new_map is not None else 0
+
+    @property
+    def size(self):
+        """Number of bytes currently mapped"""
+        return self._mapped_size
+
+    @property
+    def fully_indexed(self):
+        return self.indexed_size >= self._mapped_size
+
+    @property
+    def line_count(self):
+        """Number of lines indexed so far"""
+        with self._lock:
+            count = (len(self.checkpoints) - 1) * LINES_PER_CHECKPOINT + self._tail_lines
+            # A final line without a trailing newline only counts once the end is reached
+            if self.fully_indexed and self._tail_end < self.indexed_size:
+                count += 1
+            return count
+
+    @property
+    def has_timestamps(self):
+        return self.checkpoint_times[-1] > 0
+
+    def refresh(self):
+        """Map bytes appended since the last call; returns False if the file shrank"""
+        if self._file is None:
+            return True
+        size = os.fstat(self._file.fileno()).st_size
+        if size < self._mapped_size:
+            with self._lock:
+                self._remap()
+                self._reset_index()
+            return False
+        if size > self._mapped_size:
+            self._remap()
+        return True
+
+    def replaced(self):
+        """True if the path now names a different file than the one that is open (log rotation)"""
+        if self._file is None:
+            return False
+        try:
+            current = os.stat(self.path)
+        except OSError:
+            # Moved away and not recreated yet - keep showing the old file
+            return False
+        opened = os.fstat(self._file.fileno())
+        return (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino)
+
+    def index_step(self, max_bytes=INDEX_CHUNK_SIZE):
+        """Index line breaks in the next max_bytes; returns True while data remains"""
+        end = min(self._mapped_size, self.indexed_size + max_bytes)
+        if end <= self.indexed_size:
+            return False
+
+        # Rescan from the last checkpoint so groups split across steps are completed.
+        # The scan works on local arrays so readers never see a half-finished step.
+        start = self.checkpoints[-1]
+        last_time = self.checkpoint_times[-1]
+        if start == 0 and last_time == 0:
+            last_time = parse_timestamp(self._map[0:23]) or 0
+        first_time = last_time
+        offsets = array('Q')
+        times = array('q')
+        for match in _CHECKPOINT_PATTERN.finditer(self._map, start, end):
+            offset = match.end()
+            offsets.append(offset)
+            last_time = max(parse_timestamp(self._map[offset:offset + 23]) or 0, last_time)
+            times.append(last_time)
+
+        tail_start = offsets[-1] if offsets else start
+        tail = self._map[tail_start:end]
+
+        with self._lock:
+            if start == 0:
+                self.checkpoint_times[0] = first_time
+            self.checkpoints.extend(offsets)
+            self.checkpoint_times.extend(times)
+            self._tail_lines = tail.count(b'\n')
+            self._tail_end = tail_start + tail.rfind(b'\n') + 1
+            self.indexed_size = end
+        return end < self._mapped_size
+
+    def index_all(self):
+        """Index the remainder of the file"""
+        while self.index_step():
+            pass
+
+    def iter_line_spans(self, first):
+        """Yield (line_number, start, end) for indexed lines from line number first
+
+        Callers on another thread than the indexer must hold self._lock.
+        """
+        if first < 0 or first >= self.line_count:
+            return
+        group, skip = divmod(first, LINES_PER_CHECKPOINT)
+        pos = self.checkpoints[group]
+        find = self._map.find
+        limit = self.indexed_size
+        for _ in range(skip):
+            pos = find(b'\n', pos, limit) + 1
+        line_number = first
+        total = self.line_count
+        while line_number < total:
+            newline = find(b'\n', pos, limit)
+            end = newline if newline != -1 else limit
+            yield line_number, pos, end
+            line_number += 1
+            pos = end + 1
+
+    def get_lines(self, first, count):
+        """Return up to count decoded lines starting at line number first"""
+        lines = []
+        with self._lock:
+            for line_number, start, end in self.iter_line_spans(max(first, 0)):
+                if len(lines) >= count:
+                    break
+                lines.append(self._map[start:end].rstrip(b'\r').decode('utf-8', errors='replace'))
+        return lines
+
+    def line_time(self, line_number):
+        """Timestamp key of a line, falling back to the nearest earlier checkpoint"""
+        with self._lock:
+            for _, start, _ in self.iter_line_spans(line_number):
+                timestamp = parse_timestamp(self._map[start:start + 23])
+                if timestamp is not None:
+                    return timestamp
+                break
+            group = min(line_number // LINES_PER_CHECKPOINT, len(self.checkpoint_times) - 1)
+            return self.checkpoint_times[max(group, 0)] or None
+
+    def find_time(self, timestamp):
+        """Line number of the first line logged at or after timestamp
+
+        Binary search over the checkpoints, then a short scan inside one group.
+        """
+        with self._lock:
+            group = max(bisect_left(self.checkpoint_times, timestamp) - 1, 0)
+            first = group * LINES_PER_CHECKPOINT
+            for line_number, start, _ in self.iter_line_spans(first):
+                line_time = parse_timestamp(self._map[start:start + 23])
+                if line_time is not None and line_time >= timestamp:
+                    return line_number
+            return self.line_count
+
+    def _fingerprint(self, length):
+        return fingerprint_bytes(self._map[:length] if length else b"")
+
+    def load_index(self):
+        """Resume from the sidecar index if it still matches this file; returns True on success"""
+        try:
+            with open(self.index_path, 'rb') as index_file:
+                header = index_file.read(INDEX_HEADER.size)
+                if len(header) < INDEX_HEADER.size:
+                    return False
+                magic, version, stride, indexed_size, count, fingerprint_size, fingerprint = INDEX_HEADER.unpack(header)
+                if (magic != INDEX_MAGIC or version != INDEX_VERSION or stride != LINES_PER_CHECKPOINT
+                        or indexed_size > self._mapped_size
+                        or fingerprint != self._fingerprint(fingerprint_size)):
+                    return False
+                records = index_file.read(count * INDEX_RECORD.size)
+        except (OSError, struct.error):
+            return False
+        if count == 0 or len(records) != count * INDEX_RECORD.size:
+            return False
+
+        offsets, timestamps = zip(*INDEX_RECORD.iter_unpack(records))
+        with self._lock:
+            self._reset_index()
+            self.checkpoints = array('Q', offsets)
+            self.checkpoint_times = array('q', timestamps)
+            # Lines after the last checkpoint are cheap to rescan, so resume from there
+            self.indexed_size = self.checkpoints[-1]
+            self._tail_end = self.indexed_size
+            self._saved_checkpoints = count
+        return True
+
+    def save_index(self):
+        """Write new checkpoints to the sidecar index, appending to what is already there"""
+        # Without an existing sidecar every checkpoint has to be written
+        start = self._saved_checkpoints if self.index_path.exists() else 0
+        with self._lock:
+            fingerprint_size = min(FINGERPRINT_SIZE, self.indexed_size)
+            header = INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, LINES_PER_CHECKPOINT, self.indexed_size,
+                                       len(self.checkpoints), fingerprint_size, self._fingerprint(fingerprint_size))
+            checkpoints = self.checkpoints[start:]
+            checkpoint_times = self.checkpoint_times[start:]
+            saved_checkpoints = len(self.checkpoints)
+        try:
+            with open(self.index_path, 'r+b' if start else 'wb') as index_file:
+                index_file.seek(INDEX_HEADER.size + start * INDEX_RECORD.size)
+                index_file.write(b"".join(INDEX_RECORD.pack(offset, timestamp) for offset, timestamp in
+                                          zip(checkpoints, checkpoint_times)))
+                index_file.seek(0)
+                index_file.write(header)
+        except OSError:
+            return False
+        self._saved_checkpoints = saved_checkpoints
+        return True
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Craftbot Log Search
+Regex and keyword search across all log files (live and archived) in a
+process pool, with an optional on-disk word index for repeated keyword searches
+"""
+
+import mmap
+import os
+import re
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from log_archive import FINGERPRINT_SIZE, is_archive, log_fingerprint, open_log, read_archive
+from log_file import format_timestamp, parse_timestamp
+
+# Bytes of a log searched by one pool task
+SEARCH_CHUNK_SIZE = 8 * 1024 * 1024
+# Searches stop after this many matching lines
+MAX_RESULTS = 10000
+# Longest part of a matching line shown in the results
+MAX_LINE_LENGTH = 300
+SEARCH_WORKERS = max(1, min(4, (os.cpu_count() or 1)))
+
+# Name of the word index kept next to the logs
+INDEX_NAME = "search_index.db"
+# Logs are indexed in line-aligned blocks of about this size; a keyword
+# search only scans the blocks that contain all of its words
+INDEX_BLOCK_SIZE = 64 * 1024
+# Shorter words are not indexed
+MIN_WORD_LENGTH = 3
+
+_WORD_PATTERN = re.compile(rb"\w{%d,}" % MIN_WORD_LENGTH)
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    indexed_size INTEGER NOT NULL,
+    line_count INTEGER NOT NULL,
+    fingerprint BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    file_id INTEGER NOT NULL,
+    block INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    first_line INTEGER NOT NULL,
+    PRIMARY KEY (file_id, block)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postings (
+    word TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    block INTEGER NOT NULL,
+    PRIMARY KEY (word, file_id, block)
+) WITHOUT ROWID;
+"""
+
+
+def compile_query(text, regex=False, match_case=False):
+    """Compile a search as a bytes pattern; raises re.error for a bad regex"""
+    pattern = text.encode("utf-8")
+    if not regex:
+        pattern = re.escape(pattern)
+    return re.compile(pattern, re.MULTILINE if match_case else re.MULTILINE | re.IGNORECASE)
+
+
+def search_range(path, start, end, pattern, flags, limit):
+    """Search the lines that start in [start, end) of a log (pool process)
+
+    Returns (lines in the range, matches) where each match is
+    (line number relative to the range, timestamp, text). An archived
+    segment is decompressed into memory and searched the same way.
+    """
+    pattern = re.compile(pattern, flags)
+    if is_archive(path):
+        return search_data(read_archive(path), start, end, pattern, limit)
+    with open(path, "rb") as log_file:
+        if os.fstat(log_file.fileno()).st_size == 0:
+            return 0, []
+        with mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return search_data(data, start, end, pattern, limit)
+
+
+def search_data(data, start, end, pattern, limit):
+    """search_range over a log's bytes (a memory map or a decompressed segment)"""
+    size = len(data)
+    end = min(end, size)
+    # A line belongs to the range its first byte falls in
+    if start > 0:
+        start = data.find(b"\n", start - 1, size) + 1 or size
+    if end < size:
+        end = data.find(b"\n", end - 1, size) + 1 or size
+    if start >= end:
+        return 0, []
+
+    matches = []
+    line = 0
+    counted = start
+    position = start
+    while len(matches) < limit:
+        match = pattern.search(data, position, end)
+        if match is None:
+            break
+        line_start = data.rfind(b"\n", start, match.start()) + 1 or start
+        line_end = data.find(b"\n", match.start(), end)
+        if line_end < 0:
+            line_end = end
+        line += data[counted:line_start].count(b"\n")
+        counted = line_start
+        raw = data[line_start:line_end].rstrip(b"\r")
+        timestamp = parse_timestamp(raw)
+        matches.append((line, format_timestamp(timestamp) if timestamp is not None else "",
+                        raw[:MAX_LINE_LENGTH].decode("utf-8", errors="replace")))
+        position = line_end + 1
+    return data[start:end].count(b"\n"), matches
+
+
+def _words(text):
+    return {word.decode("ascii", errors="ignore") for word in _WORD_PATTERN.findall(text.lower())}
+
+
+class SearchIndex:
+    """Word -> block index over the logs, extended as the logs grow
+
+    The index only narrows down which blocks to scan; matches are always
+    confirmed by searching the block, so results are exact for whole words
+    and word beginnings.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        connection = self._connect()
+        try:
+            connection.executescript(INDEX_SCHEMA)
+        finally:
+            connection.close()
+
+    def _connect(self):
+        return sqlite3.connect(str(self.db_path))
+
+    def update(self, paths):
+        """Index whatever was appended to each log since the last update (worker thread)"""
+        with self._lock:
+            connection = self._connect()
+            try:
+                for path in paths:
+                    self._update_file(connection, Path(path))
+            finally:
+                connection.close()
+
+    def _update_file(self, connection, path):
+        # Segments never change, so their compressed size only tells whether they were indexed at all
+        archived = is_archive(path)
+        size = sys.maxsize if archived else path.stat().st_size
+        row = connection.execute("SELECT id, indexed_size, line_count, fingerprint FROM files WHERE name = ?",
+                                 (path.name,)).fetchone()
+        if row is not None:
+            file_id, indexed_size, line_count, fingerprint = row
+            if archived and indexed_size:
+                return
+            if indexed_size > size or log_fingerprint(path, min(FINGERPRINT_SIZE, indexed_size)) != fingerprint:
+                with connection:
+                    connection.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+                    connection.execute("DELETE FROM blocks WHERE file_id = ?", (file_id,))
+                    connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                row = None
+        if row is None:
+            with connection:
+                file_id = connection.execute(
+                    "INSERT INTO files (name, indexed_size, line_count, fingerprint) VALUES (?, 0, 0, ?)",
+                    (path.name, b"")).lastrowid
+            indexed_size = line_count = 0
+        if indexed_size == size:
+            return
+
+        block = connection.execute("SELECT COALESCE(MAX(block) + 1, 0) FROM blocks WHERE file_id = ?",
+                                   (file_id,)).fetchone()[0]
+        blocks = []
+        postings = []
+        with open_log(path) as log_file:
+            log_file.seek(indexed_size)
+            # Read sequentially, carrying partial lines over, since a segment cannot seek back cheaply
+            data = b""
+            while True:
+                chunk = log_file.read(INDEX_BLOCK_SIZE - len(data) if len(data) < INDEX_BLOCK_SIZE
+                                      else INDEX_BLOCK_SIZE)
+                if not chunk:
+                    # Only a line the bot is still writing is left
+                    break
+                data += chunk
+                end = data.rfind(b"\n") + 1
+                if not end:
+                    continue
+                block_data, data = data[:end], data[end:]
+                blocks.append((file_id, block, indexed_size, indexed_size + end, line_count))
+                postings.extend((word, file_id, block) for word in _words(block_data))
+                indexed_size += end
+                line_count += block_data.count(b"\n")
+                block += 1
+
+        with connection:
+            connection.executemany("INSERT INTO blocks VALUES (?, ?, ?, ?, ?)", blocks)
+            connection.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?, ?)", postings)
+            connection.execute("UPDATE files SET indexed_size = ?, line_count = ?, fingerprint = ? WHERE id = ?",
+                               (indexed_size, line_count, log_fingerprint(path, min(FINGERPRINT_SIZE, indexed_size)),
+                                file_id))
+
+    def candidate_blocks(self, paths, text):
+        """(path, start, end, first line) of the blocks that contain every word of text
+
+        Returns None if text has no word long enough to be indexed.
+        """
+        words = sorted(_words(text.encode("utf-8")))
+        if not words:
+            return None
+        names = {Path(path).name: Path(path) for path in paths}
+        connection = self._connect()
+        try:
+            found = None
+            for word in words:
+                # Words are matched by prefix, so "Bob" also finds "Bobby"
+                upper = word[:-1] + chr(ord(word[-1]) + 1)
+                blocks = set(connection.execute(
+                    "SELECT file_id, block FROM postings WHERE word >= ? AND word < ?", (word, upper)))
+                found = blocks if found is None else found & blocks
+                if not found:
+                    return []
+            files = dict(connection.execute("SELECT id, name FROM files"))
+            spans = connection.execute("SELECT file_id, block, start, end, first_line FROM blocks "
+                                       "ORDER BY file_id, block").fetchall()
+        finally:
+            connection.close()
+        return [(names[files[file_id]], start, end, first_line)
+                for file_id, block, start, end, first_line in spans
+                if (file_id, block) in found and files[file_id] in names]
+
+
+class LogSearcher:
+    """Runs searches over a set of logs and streams the matching lines"""
+
+    def __init__(self, logs_path):
+        self.logs_path = Path(logs_path)
+        self._pool = None
+        self._index = None
+
+    @property
+    def pool(self):
+        # Started on first use and kept, since starting processes is slow on Windows
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=SEARCH_WORKERS)
+        return self._pool
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = SearchIndex(self.logs_path / INDEX_NAME)
+        return self._index
+
+    def search(self, paths, text, regex=False, match_case=False, use_index=False, progress=None):
+        """Search the logs, passing batches of (file, line, timestamp, text) to progress (worker thread)
+
+        Returns (number of matching lines, whether the search stopped at
+        MAX_RESULTS, whether the index was used).
+        """
+        pattern = compile_query(text, regex, match_case)
+        paths = [Path(path) for path in paths if Path(path).exists()]
+        ranges = None
+        if use_index and not regex:
+            self.index.update(paths)
+            ranges = self.index.candidate_blocks(paths, text)
+        if ranges is not None:
+            return self._search_ranges(ranges, pattern, progress) + (True,)
+        return self._scan_files(paths, pattern, progress) + (False,)
+
+    def _search_ranges(self, ranges, pattern, progress):
+        """Search indexed blocks in this thread - there are usually too few to be worth the pool"""
+        found = 0
+        # The segment whose blocks are being searched, decompressed once for all of them
+        segment = segment_data = None
+        for path, start, end, first_line in ranges:
+            if is_archive(path):
+                if segment != path:
+                    segment, segment_data = path, read_archive(path)
+                _, matches = search_data(segment_data, start, end, pattern, MAX_RESULTS - found)
+            else:
+                _, matches = search_range(path, start, end, pattern.pattern, pattern.flags, MAX_RESULTS - found)
+            if matches:
+                found += len(matches)
+                if progress is not None and not progress(
+                        [(path.name, first_line + line, timestamp, line_text) for line, timestamp, line_text in matches]):
+                    break
+            if found >= MAX_RESULTS:
+                return found, True
+        return found, False
+
+    def _scan_files(self, paths, pattern, progress):
+        """Search every chunk of every log in the process pool, reporting each file's matches in line order"""
+        tasks = []
+        for path in paths:
+            if is_archive(path):
+                # A segment is searched by one task, which decompresses it once
+                spans = [(0, sys.maxsize)]
+            else:
+                spans = [(start, start + SEARCH_CHUNK_SIZE)
+                         for start in range(0, path.stat().st_size, SEARCH_CHUNK_SIZE)]
+            futures = [self.pool.submit(search_range, str(path), start, end,
+                                        pattern.pattern, pattern.flags, MAX_RESULTS)
+                       for start, end in spans]
+            tasks.append((path, futures))
+
+        found = 0
+        try:
+            for path, futures in tasks:
+                line_base = 0
+                for future in futures:
+                    line_count, matches = future.result()
+                    if matches:
+                        batch = [(path.name, line_base + line, timestamp, line_text)
+                                 for line, timestamp, line_text in matches[:MAX_RESULTS - found]]
+                        found += len(batch)
+                        if progress is not None and not progress(batch):
+                            return found, False
+                        if found >= MAX_RESULTS:
+                            return found, True
+                    line_base += line_count
+            return found, False
+        finally:
+            for _, futures in tasks:
+                for future in futures:
+                    future.cancel()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Craftbot Log Stats
+Rolling throughput, latency, queue and failure statistics built from the
+debug and trade logs in bounded memory
+"""
+
+import json
+import math
+import re
+import threading
+from pathlib import Path
+
+from config_files import atomic_write_text
+from instrumentation import tracer
+from log_archive import FINGERPRINT_SIZE, archive_size, list_segments, log_fingerprint, open_log
+from trade_store import iter_trade_blocks
+
+# Name of the saved statistics kept next to the logs
+STATS_NAME = "log_stats.json"
+STATS_VERSION = 1
+# Hourly buckets kept per log (two weeks)
+MAX_HOURS = 24 * 14
+# Bytes of the debug log parsed per read
+STATS_CHUNK_SIZE = 4 * 1024 * 1024
+# Quantile sketch error relative to the value, and its bin limit
+SKETCH_ACCURACY = 0.01
+SKETCH_MAX_BINS = 2048
+# Item -> recipe mappings remembered for attributing processing errors
+MAX_TRACKED_ITEMS = 1000
+
+DEBUG_LOG_NAME = "craftbot_debug.log"
+TRADE_LOG_NAME = "trade_logs.txt"
+
+# Only lines from these loggers are looked at; everything else is skipped by the regex engine
+_EVENT_PATTERN = re.compile(
+    rb"^(\d{4}-\d\d-\d\d \d\d):[^\n]*?\[(TRADE LOGGER|QUEUE|RECIPE\] \[RECIPE MANAGER UNIFIED)\] ([^\r\n]*)",
+    re.MULTILINE)
+_COMPLETED_PATTERN = re.compile(r"^Completed trade session for .* \(Duration: ([\d.,]+)s\)$")
+_QUEUE_ADDED_PATTERN = re.compile(r"^Added .* to trade queue \(position (\d+)\)$")
+_QUEUE_REMOVED_PATTERN = re.compile(r"^Removed player .* now queue has (\d+) players\)$")
+_RECIPE_START_PATTERN = re.compile(r"^Processing (?:loose|bag) item (.+) with (.+?)(?: \(bag: .*\))?$")
+_RECIPE_ERROR_PATTERN = re.compile(r"^Error processing item (.+?): ")
+
+
+class QuantileSketch:
+    """Streaming quantiles of positive values with bounded relative error
+
+    Values are counted in logarithmically spaced bins, so any quantile is
+    within SKETCH_ACCURACY of the true value no matter how many values were
+    added. If more than SKETCH_MAX_BINS are needed the lowest bins are merged,
+    which only costs accuracy at the very bottom of the distribution.
+    """
+
+    def __init__(self):
+        self._gamma = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+        self._log_gamma = math.log(self._gamma)
+        self.bins = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+        if value <= 0:
+            self.zeros += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[index] = self.bins.get(index, 0) + 1
+        if len(self.bins) > SKETCH_MAX_BINS:
+            lowest, second = sorted(self.bins)[:2]
+            self.bins[second] += self.bins.pop(lowest)
+
+    def quantile(self, q):
+        """Approximate value below which a fraction q of the values fall, or None if empty"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                # Midpoint of the bin (gamma^(i-1), gamma^i] in relative terms
+                return min(2 * self._gamma ** index / (1 + self._gamma), self.maximum)
+        return self.maximum
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def to_dict(self):
+        return {"bins": [[index, count] for index, count in sorted(self.bins.items())],
+                "zeros": self.zeros, "count": self.count, "total": self.total, "maximum": self.maximum}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls()
+        sketch.bins = {index: count for index, count in data["bins"]}
+        sketch.zeros = data["zeros"]
+        sketch.count = data["count"]
+        sketch.total = data["total"]
+        sketch.maximum = data["maximum"]
+        return sketch
+
+
+class HourlyBuckets:
+    """Per-hour counters for the most recent MAX_HOURS hours seen"""
+
+    def __init__(self, fields):
+        self.fields = fields
+        # "yyyy-MM-dd HH" -> list of values in field order
+        self.hours = {}
+
+    def bucket(self, hour):
+        values = self.hours.get(hour)
+        if values is None:
+            values = self.hours[hour] = [0] * len(self.fields)
+            if len(self.hours) > MAX_HOURS:
+                del self.hours[min(self.hours)]
+        return values
+
+    def add(self, hour, field, amount=1):
+        self.bucket(hour)[self.fields.index(field)] += amount
+
+    def maximum(self, hour, field, value):
+        values = self.bucket(hour)
+        position = self.fields.index(field)
+        values[position] = max(values[position], value)
+
+    def get(self, hour, field):
+        values = self.hours.get(hour)
+        return values[self.fields.index(field)] if values is not None else 0
+
+    def to_dict(self):
+        return self.hours
+
+    def load(self, data):
+        self.hours = {hour: list(values) for hour, values in data.items()}
+
+
+class LogSource:
+    """Read position in one log, plus a fingerprint to notice when it is replaced"""
+
+    def __init__(self, data=None):
+        data = data or {}
+        self.offset = data.get("offset", 0)
+        try:
+            self.fingerprint = bytes.fromhex(data.get("fingerprint", ""))
+        except (TypeError, ValueError):
+            self.fingerprint = b""
+
+    def check(self, path):
+        """True if path still continues the data already read; False if it must be read again"""
+        size = path.stat().st_size
+        if size < self.offset:
+            return False
+        return not self.offset or log_fingerprint(path, min(FINGERPRINT_SIZE, self.offset)) == self.fingerprint
+
+    def moved_to(self, segment):
+        """True if segment starts with the data already read, i.e. the log was rotated into it"""
+        return bool(self.offset) and log_fingerprint(segment, min(FINGERPRINT_SIZE, self.offset)) == self.fingerprint
+
+    def advance(self, path, offset):
+        if self.offset < FINGERPRINT_SIZE:
+            self.fingerprint = log_fingerprint(path, min(FINGERPRINT_SIZE, offset))
+        self.offset = offset
+
+    def to_dict(self):
+        return {"offset": self.offset, "fingerprint": self.fingerprint.hex()}
+
+
+def read_segments(stats, segments):
+    """Add archived segments to stats, skipping what was already counted from the live log
+
+    A rotation moves the live log into the first new segments, so the part of
+    it already read is skipped, only lines logged since are counted, and the
+    live log is read from its start again.
+    """
+    moved = stats.source.moved_to(segments[0])
+    skip = stats.source.offset if moved else 0
+    for segment in segments:
+        size = archive_size(segment)
+        if skip < size:
+            stats.read(segment, skip)
+        skip = max(skip - size, 0)
+        stats.segments.append(segment.name)
+    if moved:
+        stats.source = LogSource()
+
+
+class DebugLogStats:
+    """Trades, durations, queue depth and recipe failures from craftbot_debug.log"""
+
+    def __init__(self, data=None):
+        data = data or {}
+        self.source = LogSource(data.get("source"))
+        # Archived segments already counted
+        self.segments = data.get("segments", [])
+        self.hourly = HourlyBuckets(["trades", "duration_total", "queue_max"])
+        self.hourly.load(data.get("hourly", {}))
+        self.durations = (QuantileSketch.from_dict(data["durations"]) if "durations" in data
+                          else QuantileSketch())
+        self.queue_depth = data.get("queue_depth", 0)
+        # recipe -> [items attempted, items failed]
+        self.recipes = data.get("recipes", {})
+        # item name -> recipe that last started processing it
+        self.item_recipes = data.get("item_recipes", {})
+
+    def update(self, path):
+        """Parse whatever was appended to the log since the last update (worker thread)"""
+        self.source.advance(path, self.read(path, self.source.offset))
+
+    def read(self, path, offset):
+        """Count the events from offset on; returns the offset after the last complete line"""
+        with open_log(path) as log_file:
+            log_file.seek(offset)
+            # Partial lines are carried over rather than reread, since a segment cannot seek back cheaply
+            pending = b""
+            while True:
+                chunk = log_file.read(STATS_CHUNK_SIZE)
+                if not chunk:
+                    # Nothing but a line the bot is still writing is left
+                    break
+                chunk = pending + chunk
+                end = chunk.rfind(b"\n") + 1
+                for match in _EVENT_PATTERN.finditer(chunk, 0, end):
+                    self.add_event(match.group(1).decode(), match.group(2), match.group(3).decode("utf-8", "replace"))
+                pending = chunk[end:]
+                offset += end
+        return offset
+
+    def add_event(self, hour, logger, message):
+        if logger == b"TRADE LOGGER":
+            match = _COMPLETED_PATTERN.match(message)
+            if match:
+                duration = float(match.group(1).replace(",", "."))
+                self.durations.add(duration)
+                self.hourly.add(hour, "trades")
+                self.hourly.add(hour, "duration_total", duration)
+        elif logger == b"QUEUE":
+            depth = self.queue_depth
+            match = _QUEUE_ADDED_PATTERN.match(message) or _QUEUE_REMOVED_PATTERN.match(message)
+            if match:
+                depth = int(match.group(1))
+            elif message.startswith("Processing next player:"):
+                depth = max(depth - 1, 0)
+            elif message == "No more players in queue":
+                depth = 0
+            self.queue_depth = depth
+            self.hourly.maximum(hour, "queue_max", depth)
+        else:
+            match = _RECIPE_START_PATTERN.match(message)
+            if match:
+                item, recipe = match.groups()
+                self.recipes.setdefault(recipe, [0, 0])[0] += 1
+                if len(self.item_recipes) >= MAX_TRACKED_ITEMS and item not in self.item_recipes:
+                    self.item_recipes.clear()
+                self.item_recipes[item] = recipe
+                return
+            match = _RECIPE_ERROR_PATTERN.match(message)
+            if match:
+                recipe = self.item_recipes.get(match.group(1), "Unknown")
+                self.recipes.setdefault(recipe, [0, 0])[1] += 1
+
+    def to_dict(self):
+        return {"source": self.source.to_dict(), "segments": self.segments, "hourly": self.hourly.to_dict(),
+                "durations": self.durations.to_dict(), "queue_depth": self.queue_depth,
+                "recipes": self.recipes, "item_recipes": self.item_recipes}
+
+
+class TradeLogStats:
+    """Items per trade and hourly item counts from trade_logs.txt"""
+
+    def __init__(self, data=None):
+        data = data or {}
+        self.source = LogSource(data.get("source"))
+        self.segments = data.get("segments", [])
+        self.hourly = HourlyBuckets(["trades", "items_processed", "items_failed"])
+        self.hourly.load(data.get("hourly", {}))
+        self.items = QuantileSketch.from_dict(data["items"]) if "items" in data else QuantileSketch()
+
+    def update(self, path):
+        """Parse trade blocks appended since the last update (worker thread)"""
+        self.source.advance(path, self.read(path, self.source.offset))
+
+    def read(self, path, offset):
+        """Count the trade blocks from offset on; returns the offset after the last complete block"""
+        with open_log(path) as log_file:
+            for start, end, trade in iter_trade_blocks(log_file, offset):
+                offset = end
+                self.items.add(trade["items_processed"])
+                hour = (trade["date"] or "")[:13]
+                if hour:
+                    self.hourly.add(hour, "trades")
+                    self.hourly.add(hour, "items_processed", trade["items_processed"])
+                    self.hourly.add(hour, "items_failed", trade["items_failed"])
+        return offset
+
+    def to_dict(self):
+        return {"source": self.source.to_dict(), "segments": self.segments, "hourly": self.hourly.to_dict(),
+                "items": self.items.to_dict()}
+
+
+class LogStats:
+    """Statistics for one logs folder, saved next to the logs between runs
+
+    Each log is read once; later updates only parse what was appended. If a
+    log was truncated or replaced, only that log's statistics are rebuilt.
+    Archived segments count as part of their log's history.
+    """
+
+    def __init__(self, logs_path):
+        self.logs_path = Path(logs_path)
+        self.stats_path = self.logs_path / STATS_NAME
+        # Updates are serialised so two workers never count the same lines
+        self._lock = threading.Lock()
+        self.debug = None
+        self.trades = None
+
+    def _load(self):
+        data = {}
+        try:
+            data = json.loads(self.stats_path.read_text())
+            if data.get("version") != STATS_VERSION:
+                data = {}
+        except (OSError, ValueError):
+            pass
+        self.debug = DebugLogStats(data.get("debug"))
+        self.trades = TradeLogStats(data.get("trades"))
+
+    def _save(self):
+        data = {"version": STATS_VERSION, "debug": self.debug.to_dict(), "trades": self.trades.to_dict()}
+        atomic_write_text(self.stats_path, json.dumps(data))
+
+    def update(self):
+        """Bring the statistics up to date with the logs and return a report (worker thread)"""
+        with self._lock:
+            if self.debug is None:
+                self._load()
+            changed = False
+            for attribute, name, stats_class in [("debug", DEBUG_LOG_NAME, DebugLogStats),
+                                                 ("trades", TRADE_LOG_NAME, TradeLogStats)]:
+                path = self.logs_path / name
+                stats = getattr(self, attribute)
+                segments = [segment for segment in list_segments(self.logs_path, name)
+                            if segment.name not in stats.segments]
+                if segments:
+                    with tracer.phase("parse", f"stats of {len(segments)} {name} segment(s)"):
+                        read_segments(stats, segments)
+                    changed = True
+                if not path.exists():
+                    continue
+                if not stats.source.check(path):
+                    # Replaced by something else; start over, segments included
+                    stats = stats_class()
+                    setattr(self, attribute, stats)
+                    segments = list_segments(self.logs_path, name)
+                    if segments:
+                        read_segments(stats, segments)
+                if stats.source.offset != path.stat().st_size:
+                    with tracer.phase("parse", f"stats of {name}"):
+                        stats.update(path)
+                    changed = True
+            if changed:
+                self._save()
+            return self.report()
+
+    def report(self):
+        """Summary of the current statistics as plain values"""
+        durations = self.debug.durations
+        items = self.trades.items
+        hours = sorted(set(self.debug.hourly.hours) | set(self.trades.hourly.hours), reverse=True)
+        hourly = []
+        for hour in hours:
+            trades = self.debug.hourly.get(hour, "trades")
+            duration_total = self.debug.hourly.get(hour, "duration_total")
+            hourly.append({
+                "hour": hour,
+                # Prefer the debug log, which has a line for every completed session
+                "trades": trades or self.trades.hourly.get(hour, "trades"),
+                "average_duration": duration_total / trades if trades else None,
+                "items_processed": self.trades.hourly.get(hour, "items_processed"),
+                "items_failed": self.trades.hourly.get(hour, "items_failed"),
+                "queue_max": self.debug.hourly.get(hour, "queue_max"),
+            })
+        recipes = []
+        for recipe, (attempted, failed) in self.debug.recipes.items():
+            recipes.append({"recipe": recipe, "attempted": attempted, "failed": failed,
+                            "failure_rate": failed / attempted if attempted else None})
+        recipes.sort(key=lambda row: (-(row["failure_rate"] or 0), -row["failed"], row["recipe"].lower()))
+        active_hours = [row for row in hourly if row["trades"]]
+        return {
+            "trades": durations.count or items.count,
+            "trades_per_hour": (sum(row["trades"] for row in active_hours) / len(active_hours)
+                                if active_hours else None),
+            "duration": {"p50": durations.quantile(0.5), "p90": durations.quantile(0.9),
+                         "p99": durations.quantile(0.99), "max": durations.maximum if durations.count else None},
+            "items_per_trade": {"mean": items.mean, "p50": items.quantile(0.5), "p90": items.quantile(0.9)},
+            "queue_depth": self.debug.queue_depth,
+            "hourly": hourly,
+            "recipes": recipes,
+        }
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Craftbot Log Viewer
+Paged text view that only renders the visible part of a log file
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+import tkinter.font as tkfont
+from pathlib import Path
+
+from log_file import LogFile, parse_time_query
+
+# Extra lines rendered below the visible area
+BUFFER_LINES = 20
+# How often follow mode checks the log for new data (ms)
+FOLLOW_INTERVAL = 500
+
+# BackgroundIO channels. Everything that touches the open LogFile's index runs
+# on INDEX_CHANNEL, one request at a time, so the Tk thread only ever reads.
+OPEN_CHANNEL = "log_open"
+INDEX_CHANNEL = "log_index"
+
+
+def open_log_file(path):
+    """Open a log and resume its sidecar index (worker thread)"""
+    log_file = LogFile(path).open()
+    log_file.load_index()
+    log_file.index_step()
+    return log_file
+
+
+def index_log_file(log_file):
+    """Index one more chunk, saving the sidecar once the end is reached (worker thread)"""
+    more = log_file.index_step()
+    if not more:
+        log_file.save_index()
+    return more
+
+
+def poll_log_file(log_file):
+    """Check a followed log for rotation, truncation or new data (worker thread)"""
+    if log_file.replaced():
+        return "replaced"
+    return "ok" if log_file.refresh() else "truncated"
+
+
+def release_log_file(log_file):
+    """Save what was indexed and close the log (worker thread)"""
+    log_file.save_index()
+    log_file.close()
+
+
+class PagedLogViewer(ttk.Frame):
+    """Read-only log view that pages lines in from a memory-mapped LogFile"""
+
+    def __init__(self, parent, io, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.io = io
+        self.log_file = None
+        self.top_line = 0
+        # Optional line range the view is limited to (range_end None = end of file)
+        self.range_start = 0
+        self.range_end = None
+        self._follow_job = None
+        # True while the view sits on the last line, so follow mode keeps it there
+        self._pinned = False
+        # Line to scroll to once it has been indexed, and the line to highlight
+        self._pending_line = None
+        self.highlight_line = None
+
+        text_frame = ttk.Frame(self)
+        text_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.text = tk.Text(text_frame, wrap=tk.NONE, height=30, state=tk.DISABLED)
+        self.text.tag_configure("highlight", background="yellow")
+        self.vscrollbar = ttk.Scrollbar(text_frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.hscrollbar = ttk.Scrollbar(text_frame, orient=tk.HORIZONTAL, command=self.text.xview)
+        self.text.config(xscrollcommand=self.hscrollbar.set)
+
+        self.vscrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.hscrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        # Time navigation - jump to a time, or limit the view to a time range
+        time_frame = ttk.Frame(self)
+        time_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Label(time_frame, text="From:").pack(side=tk.LEFT)
+        self.time_from_entry = ttk.Entry(time_frame, width=20)
+        self.time_from_entry.pack(side=tk.LEFT, padx=2)
+        self.time_from_entry.bind("<Return>", lambda e: self.jump_to_time())
+        ttk.Label(time_frame, text="To:").pack(side=tk.LEFT)
+        self.time_to_entry = ttk.Entry(time_frame, width=20)
+        self.time_to_entry.pack(side=tk.LEFT, padx=2)
+        self.time_to_entry.bind("<Return>", lambda e: self.show_time_range())
+        ttk.Button(time_frame, text="Jump", command=self.jump_to_time).pack(side=tk.LEFT, padx=2)
+        ttk.Button(time_frame, text="Show Range", command=self.show_time_range).pack(side=tk.LEFT, padx=2)
+        ttk.Button(time_frame, text="Show All", command=self.clear_range).pack(side=tk.LEFT, padx=2)
+        self.follow_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(time_frame, text="Follow", variable=self.follow_var,
+                        command=self.on_follow_toggled).pack(side=tk.RIGHT, padx=2)
+
+        self.status_label = ttk.Label(self, text="")
+        self.status_label.pack(fill=tk.X)
+
+        # We own vertical scrolling, so every way of scrolling goes through scroll_lines
+        self.text.bind("<MouseWheel>", self.on_mousewheel)
+        self.text.bind("<Button-4>", lambda e: self.scroll_lines(-3) or "break")
+        self.text.bind("<Button-5>", lambda e: self.scroll_lines(3) or "break")
+        self.text.bind("<Up>", lambda e: self.scroll_lines(-1) or "break")
+        self.text.bind("<Down>", lambda e: self.scroll_lines(1) or "break")
+        self.text.bind("<Prior>", lambda e: self.scroll_lines(-self.visible_lines()) or "break")
+        self.text.bind("<Next>", lambda e: self.scroll_lines(self.visible_lines()) or "break")
+        self.text.bind("<Control-Home>", lambda e: self.goto_line(0) or "break")
+        self.text.bind("<Control-End>", lambda e: self.goto_end() or "break")
+        self.text.bind("<Button-1>", lambda e: self.text.focus_set())
+        self.text.bind("<Configure>", lambda e: self.render())
+
+    def open(self, path, line_number=None):
+        """Show a log file; it is opened and indexed on a worker thread
+
+        If line_number is given, the view scrolls to and highlights that line
+        as soon as indexing reaches it.
+        """
+        self.close()
+        self._pending_line = line_number
+        self.highlight_line = line_number
+        self.status_label.config(text=f"Opening {Path(path).name}...")
+        self.io.submit(OPEN_CHANNEL, open_log_file, path,
+                       on_done=self._on_opened, on_error=self._on_open_failed,
+                       on_cancel=self._release, loading=f"Opening {Path(path).name}...")
+
+    def _on_opened(self, log_file):
+        self.log_file = log_file
+        self.top_line = 0
+        self._pinned = self.follow_var.get()
+        self.render()
+        self._goto_pending_line()
+        self._continue_indexing()
+
+    def _on_open_failed(self, error):
+        self.status_label.config(text="")
+        messagebox.showerror("Error", f"Failed to open log: {error}")
+
+    def _release(self, log_file):
+        if log_file is not None:
+            self.io.submit_write(release_log_file, log_file)
+
+    def close(self):
+        """Stop indexing and release the current file"""
+        self.io.cancel(OPEN_CHANNEL)
+        log_file, self.log_file = self.log_file, None
+        # A step still running on the worker releases the file when it finishes
+        if log_file is not None and not self.io.cancel(INDEX_CHANNEL):
+            self._release(log_file)
+        self.range_start = 0
+        self.range_end = None
+        self._set_text("")
+        self.status_label.config(text="")
+
+    def _continue_indexing(self):
+        """Index the next chunk on the worker, rendering after each step"""
+        log_file = self.log_file
+        if log_file is None or log_file.fully_indexed:
+            return
+        self.io.submit(INDEX_CHANNEL, index_log_file, log_file,
+                       on_done=self._on_indexed, on_cancel=lambda result: self._release(log_file))
+
+    def _on_indexed(self, more):
+        self.render()
+        self._goto_pending_line()
+        if more:
+            self._continue_indexing()
+
+    def _goto_pending_line(self):
+        line_number = self._pending_line
+        if line_number is not None and (line_number < self.log_file.line_count or self.log_file.fully_indexed):
+            self._pending_line = None
+            self.goto_line(line_number)
+
+    def show_line(self, path, line_number):
+        """Scroll to and highlight a line of a log, opening the log if it is not the one shown"""
+        if self.log_file is not None and self.log_file.path == Path(path):
+            self.clear_range()
+            self.highlight_line = line_number
+            self._pending_line = line_number
+            self._goto_pending_line()
+        else:
+            self.open(path, line_number)
+
+    def visible_lines(self):
+        """Number of lines that fit in the text widget"""
+        linespace = tkfont.Font(font=self.text.cget("font")).metrics("linespace")
+        height = self.text.winfo_height()
+        if height <= 1:
+            return int(self.text.cget("height"))
+        return max(1, height // linespace)
+
+    def view_end(self):
+        """Line number just past the last line that may be shown"""
+        if self.log_file is None:
+            return 0
+        if self.range_end is None:
+            return self.log_file.line_count
+        return min(self.range_end, self.log_file.line_count)
+
+    def max_top_line(self):
+        return max(self.range_start, self.view_end() - self.visible_lines())
+
+    def render(self):
+        """Redraw the window of lines starting at top_line"""
+        if self.log_file is None:
+            return
+        if self._pinned and self.follow_var.get():
+            self.top_line = self.max_top_line()
+        self.top_line = max(self.range_start, min(self.top_line, self.max_top_line()))
+        visible = self.visible_lines()
+        end = self.view_end()
+
+        lines = self.log_file.get_lines(self.top_line, min(visible + BUFFER_LINES, end - self.top_line))
+        self._set_text("\n".join(lines))
+        if self.highlight_line is not None and 0 <= self.highlight_line - self.top_line < len(lines):
+            row = self.highlight_line - self.top_line + 1
+            self.text.tag_add("highlight", f"{row}.0", f"{row}.end")
+
+        total = end - self.range_start
+        if total > 0:
+            offset = self.top_line - self.range_start
+            self.vscrollbar.set(offset / total, min(1.0, (offset + visible) / total))
+        else:
+            self.vscrollbar.set(0.0, 1.0)
+        self.update_status()
+
+    def update_status(self):
+        log_file = self.log_file
+        end = self.view_end()
+        status = f"Lines {self.top_line + 1:,}-{min(self.top_line + self.visible_lines(), end):,} of {log_file.line_count:,}"
+        if self.range_end is not None:
+            status += f" (showing {self.range_start + 1:,}-{end:,})"
+        if not log_file.fully_indexed:
+            status += f" (indexing {log_file.indexed_size * 100 // max(log_file.size, 1)}%)"
+        self.status_label.config(text=status)
+
+    def _set_text(self, content):
+        xview = self.text.xview()[0]
+        self.text.config(state=tk.NORMAL)
+        self.text.delete(1.0, tk.END)
+        self.text.insert(1.0, content)
+        self.text.config(state=tk.DISABLED)
+        self.text.xview_moveto(xview)
+
+    def goto_line(self, line_number):
+        """Scroll so line_number is the first visible line"""
+        self.top_line = line_number
+        self._pinned = line_number >= self.max_top_line()
+        self.render()
+
+    def goto_end(self):
+        self.goto_line(self.max_top_line())
+
+    def scroll_lines(self, delta):
+        self.goto_line(self.top_line + delta)
+
+    def on_scrollbar(self, *args):
+        """Handle the vertical scrollbar's moveto/scroll commands"""
+        if self.log_file is None:
+            return
+        if args[0] == "moveto":
+            self.goto_line(self.range_start + int(float(args[1]) * (self.view_end() - self.range_start)))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.visible_lines()
+            self.scroll_lines(amount)
+
+    def on_mousewheel(self, event):
+        # Windows reports multiples of 120 per notch
+        self.scroll_lines(-3 * int(event.delta / 120) if abs(event.delta) >= 120 else -event.delta)
+        return "break"
+
+    def on_follow_toggled(self):
+        """Start or stop following new lines appended to the log"""
+        if self._follow_job is not None:
+            self.after_cancel(self._follow_job)
+            self._follow_job = None
+        if self.follow_var.get():
+            self.clear_range()
+            self.goto_end()
+            self._follow_job = self.after(FOLLOW_INTERVAL, self._follow_poll)
+
+    def _follow_poll(self):
+        self._follow_job = None
+        if not self.follow_var.get():
+            return
+        # Skip this round while the previous batch is still being indexed
+        if self.log_file is not None and not self.io.is_busy(INDEX_CHANNEL):
+            self.poll_file()
+        self._follow_job = self.after(FOLLOW_INTERVAL, self._follow_poll)
+
+    def poll_file(self):
+        """Pick up lines appended since the last poll, starting over after truncation or rotation
+
+        Only bytes past the indexed size are read; new lines are indexed in
+        batches by the regular background indexing steps.
+        """
+        log_file = self.log_file
+        self.io.submit(INDEX_CHANNEL, poll_log_file, log_file,
+                       on_done=self._on_polled, on_cancel=lambda result: self._release(log_file))
+
+    def _on_polled(self, status):
+        if status == "replaced":
+            self.open(self.log_file.path)
+            return
+        if status == "truncated":
+            # The old line numbers are meaningless now
+            self.range_start = 0
+            self.range_end = None
+            self.top_line = 0
+        self.render()
+        self._continue_indexing()
+
+    def parse_time_entry(self, entry):
+        """Read (timestamp, precision) from an entry, defaulting the date to the line at the top of the view"""
+        text = entry.get().strip()
+        if not text:
+            return None
+        parsed = parse_time_query(text, self.log_file.line_time(self.top_line))
+        if parsed is None:
+            messagebox.showwarning("Warning", f"Could not read time '{text}' - use HH:MM[:SS] or yyyy-MM-dd HH:MM[:SS]")
+        return parsed
+
+    def _check_time_navigation(self):
+        if self.log_file is None:
+            return False
+        if not self.log_file.fully_indexed:
+            messagebox.showinfo("Info", "The log is still being indexed, please try again in a moment")
+            return False
+        if not self.log_file.has_timestamps:
+            messagebox.showinfo("Info", "This log has no timestamped lines")
+            return False
+        return True
+
+    def jump_to_time(self):
+        """Scroll to the first line logged at or after the From time"""
+        if not self._check_time_navigation():
+            return
+        parsed = self.parse_time_entry(self.time_from_entry)
+        if parsed is not None:
+            self.goto_line(self.log_file.find_time(parsed[0]))
+
+    def show_time_range(self):
+        """Limit the view to the lines logged between the From and To times"""
+        if not self._check_time_navigation():
+            return
+        start = self.parse_time_entry(self.time_from_entry)
+        end = self.parse_time_entry(self.time_to_entry)
+        if start is None or end is None:
+            return
+        if end[0] < start[0]:
+            messagebox.showwarning("Warning", "The To time is before the From time")
+            return
+        # Include the whole last second, or minute if no seconds were typed
+        self.range_start = self.log_file.find_time(start[0])
+        self.range_end = self.log_file.find_time(end[0] + end[1])
+        self.goto_line(self.range_start)
+
+    def clear_range(self):
+        """Show the whole file again"""
+        self.range_start = 0
+        self.range_end = None
+        self.render()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Craftbot Recipe Index
+Item references made by configurable recipes, and a cross-reference index
+of the recipe files
+"""
+
+import threading
+
+from config_cache import file_signature
+
+# Recipe fields that hold item names, and whether they name a tool
+RECIPE_ITEM_FIELDS = {"ProcessableItems": False, "RequiredTools": True}
+STEP_ITEM_FIELDS = {"Tool": True, "InputItem": False, "OutputItem": False, "AlternativeTools": True}
+
+
+def iter_recipe_items(recipe):
+    """Yield (field path, item name, is tool) for every item a recipe refers to
+
+    Field paths read like "Steps[2].InputItem" or "ProcessableItems[0]".
+    Anything that is not a string is skipped; structural problems are left
+    to JSON validation.
+    """
+    if not isinstance(recipe, dict):
+        return
+    for field, is_tool in RECIPE_ITEM_FIELDS.items():
+        values = recipe.get(field)
+        if isinstance(values, list):
+            for i, name in enumerate(values):
+                if isinstance(name, str) and name.strip():
+                    yield f"{field}[{i}]", name, is_tool
+    steps = recipe.get("Steps")
+    if not isinstance(steps, list):
+        return
+    for i, step in enumerate(steps):
+        if not isinstance(step, dict):
+            continue
+        for field, is_tool in STEP_ITEM_FIELDS.items():
+            value = step.get(field)
+            if isinstance(value, str) and value.strip():
+                yield f"Steps[{i}].{field}", value, is_tool
+            elif isinstance(value, list):
+                for j, name in enumerate(value):
+                    if isinstance(name, str) and name.strip():
+                        yield f"Steps[{i}].{field}[{j}]", name, is_tool
+
+
+def item_key(name):
+    """Item names are matched case-insensitively, like the bot's recipe loader does"""
+    return name.strip().casefold()
+
+
+def is_enabled(recipe):
+    # ConfigurableRecipe.Enabled defaults to true
+    return not isinstance(recipe, dict) or recipe.get("Enabled", True) is not False
+
+
+def field_role(field):
+    """How a field path uses its item: processes, tool, input or output"""
+    name = field.split(".")[-1].split("[")[0]
+    if name == "ProcessableItems":
+        return "processes"
+    if name == "InputItem":
+        return "input"
+    if name == "OutputItem":
+        return "output"
+    return "tool"
+
+
+class RecipeIndex:
+    """Cross-reference of recipe files: item -> recipes, tool -> recipes and the step graph
+
+    Each recipe file is parsed once and reparsed only when its (mtime, size)
+    changes; updating one recipe touches only that recipe's entries. Lookups
+    are dictionary reads, so they can run on the Tk thread while a worker
+    thread refreshes the index.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # recipe name -> (file signature, parsed recipe or the JSON error)
+        self._recipes = {}
+        # recipe name -> [(field path, item key)]
+        self._refs = {}
+        # item key -> {recipe name: [field path]}
+        self._by_item = {}
+        # item key -> the item name as first written in a recipe
+        self._names = {}
+
+    def refresh(self, paths, load):
+        """Bring the index up to date with the recipe files in paths (worker thread)
+
+        load(path) parses a file and may raise ValueError. Returns the names
+        of the recipes that were added, changed or removed.
+        """
+        paths = {path.stem: path for path in paths}
+        with self._lock:
+            known = {name: entry[0] for name, entry in self._recipes.items()}
+        changed = [name for name in known if name not in paths]
+        for name in changed:
+            self.remove(name)
+        for name, path in sorted(paths.items()):
+            signature = file_signature(path)
+            if signature != known.get(name) and self.refresh_file(path, load, signature):
+                changed.append(name)
+        return changed
+
+    def refresh_file(self, path, load, signature=None):
+        """Reindex one recipe file, e.g. right after saving it (worker thread)
+
+        Returns False if the file was unchanged.
+        """
+        name = path.stem
+        if signature is None:
+            signature = file_signature(path)
+        with self._lock:
+            entry = self._recipes.get(name)
+        if entry is not None and entry[0] == signature:
+            return False
+        if signature is None:
+            self.remove(name)
+            return True
+        try:
+            recipe = load(path)
+        except ValueError as e:
+            recipe = e
+        self.update(name, recipe, signature)
+        return True
+
+    def update(self, name, recipe, signature=None):
+        """Replace one recipe's entries"""
+        refs = []
+        if not isinstance(recipe, Exception):
+            refs = [(field, item_name.strip()) for field, item_name, _ in iter_recipe_items(recipe)]
+        with self._lock:
+            self._unlink(name)
+            self._recipes[name] = (signature, recipe)
+            self._refs[name] = [(field, item_key(item_name)) for field, item_name in refs]
+            for field, item_name in refs:
+                key = item_key(item_name)
+                self._names.setdefault(key, item_name)
+                self._by_item.setdefault(key, {}).setdefault(name, []).append(field)
+
+    def remove(self, name):
+        with self._lock:
+            self._unlink(name)
+            self._recipes.pop(name, None)
+
+    def _unlink(self, name):
+        for _, key in self._refs.pop(name, ()):
+            users = self._by_item.get(key)
+            if users is None:
+                continue
+            users.pop(name, None)
+            if not users:
+                del self._by_item[key]
+                self._names.pop(key, None)
+
+    def __len__(self):
+        return len(self._recipes)
+
+    def recipes(self):
+        """(recipe name, parsed recipe or the JSON error) for every indexed recipe"""
+        with self._lock:
+            return [(name, self._recipes[name][1]) for name in sorted(self._recipes)]
+
+    def enabled(self, name):
+        with self._lock:
+            entry = self._recipes.get(name)
+        return entry is not None and is_enabled(entry[1])
+
+    def item_names(self):
+        """Every item name referenced by a recipe"""
+        with self._lock:
+            return list(self._names.values())
+
+    def references(self, item_name):
+        """(recipe name, field path, role) for every use of an item, sorted by recipe"""
+        with self._lock:
+            users = self._by_item.get(item_key(item_name), {})
+            return [(name, field, field_role(field)) for name in sorted(users) for field in users[name]]
+
+    def _recipes_with_role(self, item_name, roles, enabled_only):
+        found = []
+        for name, field, role in self.references(item_name):
+            if role in roles and name not in found and (not enabled_only or self.enabled(name)):
+                found.append(name)
+        return found
+
+    def recipes_for_item(self, item_name, enabled_only=True):
+        """Recipes that process an item, like DynamicRecipeLoader.GetRecipesForItem"""
+        return self._recipes_with_role(item_name, ("processes",), enabled_only)
+
+    def recipes_using_tool(self, tool_name, enabled_only=False):
+        return self._recipes_with_role(tool_name, ("tool",), enabled_only)
+
+    def conflicts(self):
+        """(item name, recipe names) for items processed by more than one enabled recipe
+
+        The bot hands such an item to whichever recipe it finds first, so all
+        but one of them never see it.
+        """
+        with self._lock:
+            found = []
+            for key, users in self._by_item.items():
+                claimants = sorted(name for name, fields in users.items()
+                                   if is_enabled(self._recipes[name][1])
+                                   and any(field_role(field) == "processes" for field in fields))
+                if len(claimants) > 1:
+                    found.append((self._names[key], claimants))
+        return sorted(found, key=lambda conflict: conflict[0].casefold())
+
+    def step_chain(self, name):
+        """The steps of a recipe with the recipes feeding and consuming each step's items
+
+        Returns one dict per step with its number, tool, alternative tools,
+        input and output, plus "input_from" (recipe, field) pairs for other
+        recipes' steps that output the input, and "output_to" pairs for
+        recipes that take the output as an input or processable item.
+        """
+        with self._lock:
+            entry = self._recipes.get(name)
+        recipe = entry[1] if entry is not None else None
+        steps = recipe.get("Steps") if isinstance(recipe, dict) else None
+        if not isinstance(steps, list):
+            return []
+
+        chain = []
+        for i, step in enumerate(steps):
+            if not isinstance(step, dict):
+                continue
+            input_item = step.get("InputItem") if isinstance(step.get("InputItem"), str) else ""
+            output_item = step.get("OutputItem") if isinstance(step.get("OutputItem"), str) else ""
+            alternatives = step.get("AlternativeTools")
+            own = f"Steps[{i}]."
+            chain.append({
+                "number": step.get("StepNumber", i + 1),
+                "tool": step.get("Tool") if isinstance(step.get("Tool"), str) else "",
+                "alternatives": [tool for tool in alternatives if isinstance(tool, str)]
+                                if isinstance(alternatives, list) else [],
+                "input": input_item,
+                "output": output_item,
+                "input_from": [(recipe_name, field) for recipe_name, field, role in self.references(input_item)
+                               if role == "output" and not (recipe_name == name and field.startswith(own))]
+                              if input_item.strip() else [],
+                "output_to": [(recipe_name, field) for recipe_name, field, role in self.references(output_item)
+                              if role in ("input", "processes") and not (recipe_name == name and field.startswith(own))]
+                             if output_item.strip() else [],
+            })
+        return chain
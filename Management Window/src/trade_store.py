@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Craftbot Trade Store
+Streams trade_logs.txt and its archived segments into a local SQLite
+database that can be queried by player, item/recipe, date range and failures
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+from instrumentation import tracer
+from log_archive import FINGERPRINT_SIZE, is_archive, log_fingerprint, open_log
+
+# Name of the database kept next to trade_logs.txt
+DATABASE_NAME = "trade_logs.db"
+# Trades inserted per transaction while ingesting
+INGEST_BATCH_SIZE = 500
+
+BLOCK_START = "=== DETAILED TRADE LOG ==="
+SEPARATOR_PREFIX = "=========="
+
+_PLAYER_PATTERN = re.compile(r"^Player: (.*) \(ID: (-?\d+)\)$")
+_DURATION_PATTERN = re.compile(r"^Duration: ([\d.,]+) seconds$")
+_COUNT_PATTERN = re.compile(r"^(Bags Received|Bags Returned|Loose Items Received|Loose Items Returned|"
+                            r"Items Processed|Failed Items)(?: \((\d+)\):|: (None|\d+))$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    date TEXT,
+    player TEXT,
+    player_id INTEGER,
+    duration REAL,
+    status TEXT,
+    bags_received INTEGER NOT NULL DEFAULT 0,
+    bags_returned INTEGER NOT NULL DEFAULT 0,
+    items_processed INTEGER NOT NULL DEFAULT 0,
+    items_failed INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (source, offset)
+);
+CREATE INDEX IF NOT EXISTS trades_player ON trades (player COLLATE NOCASE, date);
+CREATE INDEX IF NOT EXISTS trades_date ON trades (date);
+CREATE TABLE IF NOT EXISTS trade_items (
+    trade_id INTEGER NOT NULL REFERENCES trades (id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    bag TEXT,
+    item TEXT NOT NULL,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS trade_items_trade ON trade_items (trade_id);
+CREATE TABLE IF NOT EXISTS ingest_state (
+    source TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    fingerprint_size INTEGER NOT NULL,
+    fingerprint BLOB NOT NULL
+);
+"""
+
+
+def new_trade():
+    return {
+        "date": None, "player": None, "player_id": None, "duration": None, "status": None,
+        "bags_received": 0, "bags_returned": 0, "items_processed": 0, "items_failed": 0,
+        # (kind, bag, item, result) rows; kind is received, returned, processed or failed
+        "items": [],
+    }
+
+
+def parse_trade_block(lines):
+    """Turn the lines of one DETAILED TRADE LOG block into a trade dict"""
+    trade = new_trade()
+    section = None     # received, returned or processing
+    listing = None     # bags, loose, processed or failed
+    bag = None
+
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped.startswith("--- ITEMS RECEIVED"):
+            section, listing, bag = "received", None, None
+        elif stripped.startswith("--- ITEMS RETURNED"):
+            section, listing, bag = "returned", None, None
+        elif stripped.startswith("--- PROCESSING DETAILS"):
+            section, listing, bag = "processing", None, None
+        elif stripped.startswith("Date: "):
+            trade["date"] = stripped[6:]
+        elif stripped.startswith("Player: "):
+            match = _PLAYER_PATTERN.match(stripped)
+            if match:
+                trade["player"], trade["player_id"] = match.group(1), int(match.group(2))
+            else:
+                trade["player"] = stripped[8:]
+        elif stripped.startswith("Duration: "):
+            match = _DURATION_PATTERN.match(stripped)
+            if match:
+                trade["duration"] = float(match.group(1).replace(",", "."))
+        elif stripped.startswith("Status: "):
+            trade["status"] = stripped[8:]
+        elif _COUNT_PATTERN.match(stripped):
+            label, listed, plain = _COUNT_PATTERN.match(stripped).groups()
+            count = int(listed) if listed else (0 if plain == "None" else int(plain))
+            listing, bag = {
+                "Bags Received": "bags", "Bags Returned": "bags",
+                "Loose Items Received": "loose", "Loose Items Returned": "loose",
+                "Items Processed": "processed", "Failed Items": "failed",
+            }[label], None
+            if label == "Bags Received":
+                trade["bags_received"] = count
+            elif label == "Bags Returned":
+                trade["bags_returned"] = count
+            elif label == "Items Processed":
+                trade["items_processed"] = count
+            elif label == "Failed Items":
+                trade["items_failed"] = count
+        elif stripped.startswith("\U0001F4E6"):
+            # "  📦 Bag name" starts a bag; its contents follow as indented "- item" lines
+            bag = stripped[1:].strip()
+        elif stripped.startswith("- "):
+            item = stripped[2:]
+            if listing == "processed":
+                name, _, result = item.partition(" -> ")
+                trade["items"].append(("processed", None, name, result))
+            elif listing == "failed":
+                trade["items"].append(("failed", None, item, None))
+            elif section in ("received", "returned"):
+                trade["items"].append((section, bag if listing == "bags" else None, item, None))
+    return trade
+
+
+def iter_trade_blocks(log_file, offset=0):
+    """Yield (start offset, end offset, trade) for each complete block from offset
+
+    log_file must be opened in binary mode. A block still being written at the
+    end of the file is not yielded, so the last end offset is always a safe
+    place to resume from.
+    """
+    log_file.seek(offset)
+    position = offset
+    block_start = None
+    lines = []
+    for raw in log_file:
+        line_start = position
+        position += len(raw)
+        if not raw.endswith(b"\n"):
+            # Incomplete last line - the bot is still writing it
+            break
+        line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+        if line.strip() == BLOCK_START:
+            block_start = line_start
+            lines = []
+        elif block_start is not None and line.startswith(SEPARATOR_PREFIX):
+            yield block_start, position, parse_trade_block(lines)
+            block_start = None
+            lines = []
+        elif block_start is not None:
+            lines.append(line)
+
+
+def parse_date_filter(text, end_of_range=False):
+    """Turn "yyyy-MM-dd[ HH:MM[:SS]]" into a comparable date string, or None if empty
+
+    A bare date used as the end of a range covers the whole day.
+    """
+    text = text.strip()
+    if not text:
+        return None
+    match = re.match(r"^(\d{4}-\d\d-\d\d)(?:\s+(\d{1,2}):(\d\d)(?::(\d\d))?)?$", text)
+    if not match:
+        raise ValueError(f"Could not read date '{text}' - use yyyy-MM-dd or yyyy-MM-dd HH:MM")
+    date, hour, minute, second = match.groups()
+    if hour is None:
+        return f"{date} 23:59:59" if end_of_range else f"{date} 00:00:00"
+    return f"{date} {int(hour):02d}:{minute}:{second or ('59' if end_of_range else '00')}"
+
+
+class TradeStore:
+    """SQLite database of trade sessions parsed from trade log files"""
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        # Ingesting is serialised so two workers never parse the same new blocks
+        self._ingest_lock = threading.Lock()
+        connection = self._connect()
+        try:
+            connection.executescript(SCHEMA)
+        finally:
+            connection.close()
+
+    def _connect(self):
+        # A connection per call keeps the store usable from any worker thread
+        connection = sqlite3.connect(str(self.db_path))
+        connection.execute("PRAGMA foreign_keys = ON")
+        return connection
+
+    def ingest(self, log_path, source=None):
+        """Add trades appended to a log since the last call; returns the number added
+
+        If the log was truncated or replaced, its trades are dropped and it is
+        read again from the start. An archived segment never changes, so it is
+        read once and then recorded as done at its compressed size.
+        """
+        with self._ingest_lock:
+            return self._ingest(Path(log_path), source or Path(log_path).name)
+
+    def _ingest(self, log_path, source):
+        connection = self._connect()
+        try:
+            if not log_path.exists():
+                # Rotated into segments (or deleted) - its trades are read from the segments instead
+                with connection:
+                    connection.execute("DELETE FROM trades WHERE source = ?", (source,))
+                    connection.execute("DELETE FROM ingest_state WHERE source = ?", (source,))
+                return 0
+            size = log_path.stat().st_size
+            archived = is_archive(log_path)
+
+            state = connection.execute(
+                "SELECT offset, fingerprint_size, fingerprint FROM ingest_state WHERE source = ?",
+                (source,)).fetchone()
+            offset = 0
+            if state is not None:
+                offset, fingerprint_size, fingerprint = state
+                if offset > size or log_fingerprint(log_path, fingerprint_size) != fingerprint:
+                    with connection:
+                        connection.execute("DELETE FROM trades WHERE source = ?", (source,))
+                    offset = 0
+            if offset == size:
+                return 0
+            if archived:
+                # An interrupted read starts over; the trades it stored are skipped as duplicates
+                offset = 0
+
+            added = 0
+            batch = []
+            # Reading and parsing the blocks is counted as parsing, the inserts as I/O
+            with open_log(log_path) as log_file, tracer.phase("parse", f"parse {log_path.name}"):
+                for start, end, trade in iter_trade_blocks(log_file, offset):
+                    batch.append((start, trade))
+                    offset = end
+                    if len(batch) >= INGEST_BATCH_SIZE:
+                        added += self._insert(connection, source, batch, 0 if archived else offset, log_path)
+                        batch = []
+            added += self._insert(connection, source, batch, size if archived else offset, log_path)
+            return added
+        finally:
+            connection.close()
+
+    def _insert(self, connection, source, batch, offset, log_path):
+        """Insert a batch of trades and move the resume offset in one transaction"""
+        fingerprint_size = min(FINGERPRINT_SIZE, offset)
+        with tracer.phase("io", f"insert {len(batch)} trades"), connection:
+            for start, trade in batch:
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO trades (source, offset, date, player, player_id, duration, status,"
+                    " bags_received, bags_returned, items_processed, items_failed)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (source, start, trade["date"], trade["player"], trade["player_id"], trade["duration"],
+                     trade["status"], trade["bags_received"], trade["bags_returned"],
+                     trade["items_processed"], trade["items_failed"]))
+                if cursor.rowcount:
+                    connection.executemany(
+                        "INSERT INTO trade_items (trade_id, kind, bag, item, result) VALUES (?, ?, ?, ?, ?)",
+                        [(cursor.lastrowid,) + row for row in trade["items"]])
+            connection.execute(
+                "INSERT OR REPLACE INTO ingest_state (source, offset, fingerprint_size, fingerprint)"
+                " VALUES (?, ?, ?, ?)",
+                (source, offset, fingerprint_size, log_fingerprint(log_path, fingerprint_size)))
+        return len(batch)
+
+    def _where(self, player, item, date_from, date_to, failed_only):
+        clauses, params = [], []
+        if player:
+            clauses.append("t.player LIKE ?")
+            params.append(f"%{player}%")
+        if item:
+            # Trade logs do not name the recipe, so match it against item names and results
+            clauses.append("EXISTS (SELECT 1 FROM trade_items i WHERE i.trade_id = t.id"
+                           " AND (i.item LIKE ? OR i.result LIKE ?))")
+            params.extend([f"%{item}%", f"%{item}%"])
+        if date_from:
+            clauses.append("t.date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("t.date <= ?")
+            params.append(date_to)
+        if failed_only:
+            clauses.append("(t.items_failed > 0 OR t.status != 'Completed')")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, player=None, item=None, date_from=None, date_to=None, failed_only=False, limit=1000):
+        """Matching trades, newest first, as dicts"""
+        where, params = self._where(player, item, date_from, date_to, failed_only)
+        connection = self._connect()
+        try:
+            connection.row_factory = sqlite3.Row
+            rows = connection.execute(
+                "SELECT t.* FROM trades t" + where + " ORDER BY t.date DESC, t.id DESC LIMIT ?",
+                params + [limit]).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            connection.close()
+
+    def summary(self, player=None, item=None, date_from=None, date_to=None, failed_only=False):
+        """(trades, items processed, items failed) totals for the same filters as query"""
+        where, params = self._where(player, item, date_from, date_to, failed_only)
+        connection = self._connect()
+        try:
+            trades, processed, failed = connection.execute(
+                "SELECT COUNT(*), TOTAL(t.items_processed), TOTAL(t.items_failed) FROM trades t" + where,
+                params).fetchone()
+            return trades, int(processed), int(failed)
+        finally:
+            connection.close()
+
+    def state_key(self):
+        """Hash of the ingest state; it changes whenever trades are added or dropped"""
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                "SELECT source, offset, fingerprint FROM ingest_state ORDER BY source").fetchall()
+        finally:
+            connection.close()
+        digest = hashlib.sha1()
+        for source, offset, fingerprint in rows:
+            digest.update(f"{source}\0{offset}\0".encode("utf-8") + fingerprint)
+        return digest.hexdigest()
+
+    def item_names(self):
+        """Every distinct item and result text recorded in trades
+
+        Failed items are left out since their text includes the failure reason.
+        """
+        connection = self._connect()
+        try:
+            return [row[0] for row in connection.execute(
+                "SELECT item FROM trade_items WHERE kind != 'failed'"
+                " UNION SELECT result FROM trade_items WHERE result IS NOT NULL")]
+        finally:
+            connection.close()
+
+    def trade_items(self, trade_id):
+        """(kind, bag, item, result) rows recorded for one trade"""
+        connection = self._connect()
+        try:
+            return connection.execute(
+                "SELECT kind, bag, item, result FROM trade_items WHERE trade_id = ? ORDER BY rowid",
+                (trade_id,)).fetchall()
+        finally:
+            connection.close()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Craftbot Virtual List
+Sorted list widget that only creates rows for the visible part of the list
+"""
+
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+from bisect import bisect_left, insort
+
+# Extra rows rendered below the visible area
+BUFFER_ROWS = 1
+
+
+def sort_key(item):
+    return item.casefold(), item
+
+
+class VirtualList(ttk.Frame):
+    """Case-insensitively sorted list with filter-as-you-type
+
+    Items are kept in a sorted key list plus a set, so adding, removing and
+    membership checks stay cheap with thousands of entries, and the filter
+    (a name prefix) is a bisect into the sorted keys. The Listbox underneath
+    only ever holds the rows that are on screen.
+    """
+
+    def __init__(self, parent, height=20, on_select=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.on_select = on_select
+        # Sorted (casefolded item, item) keys, and the same items as a set
+        self._keys = []
+        self._members = set()
+        # Range of _keys matching the filter
+        self.first = 0
+        self.last = 0
+        self.filter_text = ""
+        # Index into the filtered range of the first visible row
+        self.top = 0
+        self.selected = None
+
+        filter_frame = ttk.Frame(self)
+        filter_frame.pack(fill=tk.X, pady=(0, 2))
+        ttk.Label(filter_frame, text="Filter:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *args: self.set_filter(self.filter_var.get()))
+        ttk.Entry(filter_frame, textvariable=self.filter_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=2)
+        self.count_label = ttk.Label(filter_frame, text="")
+        self.count_label.pack(side=tk.LEFT, padx=2)
+
+        list_frame = ttk.Frame(self)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        self.listbox = tk.Listbox(list_frame, height=height, exportselection=False)
+        self.scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        # We own scrolling, so every way of scrolling goes through scroll_rows
+        self.listbox.bind("<<ListboxSelect>>", self.on_listbox_select)
+        self.listbox.bind("<MouseWheel>", self.on_mousewheel)
+        self.listbox.bind("<Button-4>", lambda e: self.scroll_rows(-3) or "break")
+        self.listbox.bind("<Button-5>", lambda e: self.scroll_rows(3) or "break")
+        self.listbox.bind("<Up>", lambda e: self.move_selection(-1) or "break")
+        self.listbox.bind("<Down>", lambda e: self.move_selection(1) or "break")
+        self.listbox.bind("<Prior>", lambda e: self.scroll_rows(-self.visible_rows()) or "break")
+        self.listbox.bind("<Next>", lambda e: self.scroll_rows(self.visible_rows()) or "break")
+        self.listbox.bind("<Configure>", lambda e: self.render())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, item):
+        return item in self._members
+
+    @property
+    def items(self):
+        return [item for _, item in self._keys]
+
+    def set_items(self, items):
+        """Replace the whole list"""
+        self._members = set(items)
+        self._keys = sorted(sort_key(item) for item in self._members)
+        if self.selected not in self._members:
+            self.selected = None
+        self.set_filter(self.filter_text, keep_position=True)
+
+    def add(self, item):
+        if item in self._members:
+            return
+        self._members.add(item)
+        insort(self._keys, sort_key(item))
+        self.set_filter(self.filter_text, keep_position=True)
+
+    def remove(self, item):
+        if item not in self._members:
+            return
+        self._members.discard(item)
+        del self._keys[bisect_left(self._keys, sort_key(item))]
+        if self.selected == item:
+            self.selected = None
+        self.set_filter(self.filter_text, keep_position=True)
+
+    def set_filter(self, text, keep_position=False):
+        """Show only items starting with text (case-insensitive)"""
+        prefix = text.strip().casefold()
+        self.filter_text = text
+        self.first = bisect_left(self._keys, (prefix,))
+        # Every key starting with prefix sorts below prefix followed by the highest character
+        self.last = bisect_left(self._keys, (prefix + "\U0010ffff",)) if prefix else len(self._keys)
+        if not keep_position:
+            self.top = 0
+        self.render()
+
+    def visible_rows(self):
+        linespace = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace")
+        height = self.listbox.winfo_height()
+        if height <= 1:
+            return int(self.listbox.cget("height"))
+        return max(1, height // (linespace + 1))
+
+    def render(self):
+        """Fill the Listbox with the rows starting at top"""
+        visible = self.visible_rows()
+        total = self.last - self.first
+        self.top = max(0, min(self.top, total - visible))
+        start = self.first + self.top
+        rows = [item for _, item in self._keys[start:min(start + visible + BUFFER_ROWS, self.last)]]
+
+        self.listbox.delete(0, tk.END)
+        if rows:
+            self.listbox.insert(tk.END, *rows)
+        if self.selected is not None and self.selected in rows:
+            self.listbox.selection_set(rows.index(self.selected))
+
+        if total > 0:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        shown = f"{total:,} of {len(self._keys):,}" if total != len(self._keys) else f"{total:,}"
+        self.count_label.config(text=shown)
+
+    def scroll_rows(self, delta):
+        self.top += delta
+        self.render()
+
+    def see(self, item):
+        """Scroll so item is visible, if it passes the filter"""
+        position = bisect_left(self._keys, sort_key(item)) - self.first
+        if 0 <= position < self.last - self.first:
+            visible = self.visible_rows()
+            if not self.top <= position < self.top + visible:
+                self.top = position - visible // 2
+        self.render()
+
+    def move_selection(self, delta):
+        """Select the next or previous row, scrolling to keep it visible"""
+        total = self.last - self.first
+        if total == 0:
+            return
+        if self.selected is None:
+            position = self.top
+        else:
+            position = bisect_left(self._keys, sort_key(self.selected)) - self.first + delta
+        position = max(0, min(position, total - 1))
+        self.select(self._keys[self.first + position][1])
+
+    def select(self, item):
+        self.selected = item
+        self.see(item)
+        if self.on_select is not None:
+            self.on_select(item)
+
+    def on_listbox_select(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            self.select(self.listbox.get(selection[0]))
+
+    def on_scrollbar(self, *args):
+        """Handle the scrollbar's moveto/scroll commands"""
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * (self.last - self.first))
+            self.render()
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.visible_rows()
+            self.scroll_rows(amount)
+
+    def on_mousewheel(self, event):
+        # Windows reports multiples of 120 per notch
+        self.scroll_rows(-3 * int(event.delta / 120) if abs(event.delta) >= 120 else -event.delta)
+        return "break"
@@ -0,0 +1,129 @@
+import json
+import os
+
+import pytest
+
+import config_files
+import craftbot_cli
+from config_cache import ConfigCache
+from config_files import apply_player_changes, atomic_write_text, format_player_names, parse_player_names
+
+
+def test_parse_player_names_deduplicates_in_order():
+    assert parse_player_names("Bob\nAnn\nBob\nCid, Ann\n") == ["Bob", "Ann", "Cid"]
+
+
+def test_parse_player_names_ignores_case_for_duplicates():
+    assert parse_player_names("Bob\nbob\nBOB\nAnn") == ["Bob", "Ann"]
+
+
+def test_parse_player_names_skips_blank_and_comment_lines():
+    text = "# leavers, March\n\nBob\n   \n#Ann\n  # indented comment\nCid\n"
+    assert parse_player_names(text) == ["Bob", "Cid"]
+
+
+def test_parse_player_names_uses_the_player_column_of_a_header():
+    text = "rank,Player Name,joined\nVIP,Bob,2025\nVIP,Ann,2025\nVIP,,2025\nshort\n"
+    assert parse_player_names(text) == ["Bob", "Ann"]
+
+
+def test_format_player_names_round_trips_through_parse():
+    names = ["Bob", "Ann", "Cid"]
+    assert parse_player_names(format_player_names(names)) == names
+    assert parse_player_names(format_player_names(names, as_csv=True)) == names
+
+
+def test_apply_player_changes_keeps_order_and_skips_present_players():
+    players, added, removed = apply_player_changes(["Bob", "Ann"], add=["Cid", "Ann", "Cid"])
+    assert players == ["Bob", "Ann", "Cid"]
+    assert added == ["Cid"]
+    assert removed == []
+
+
+def test_apply_player_changes_matches_names_ignoring_case():
+    players, added, removed = apply_player_changes(["Bob", "Ann"], add=["bob", "ANN", "Cid"], remove=["ann"])
+    assert players == ["Bob", "Cid"]
+    assert added == ["Cid"]
+    assert removed == ["Ann"]
+
+
+def test_apply_player_changes_removal_wins_over_addition():
+    players, added, removed = apply_player_changes(["Bob", "Bob", "Ann"], add=["Dee"], remove=["Bob", "Dee"])
+    assert players == ["Ann"]
+    assert added == []
+    assert removed == ["Bob"]
+
+
+def test_atomic_write_text_replaces_the_file(tmp_path):
+    path = tmp_path / "VIP.json"
+    path.write_text('{"rank": "VIP", "players": []}', encoding="utf-8")
+    atomic_write_text(path, json.dumps({"rank": "VIP", "players": ["Bob"]}))
+    assert json.loads(path.read_text(encoding="utf-8"))["players"] == ["Bob"]
+    assert os.listdir(tmp_path) == ["VIP.json"]
+
+
+def test_atomic_write_text_failure_during_replace_leaves_the_original(tmp_path, monkeypatch):
+    path = tmp_path / "VIP.json"
+    original = '{"rank": "VIP", "players": ["Bob", "Ann"]}'
+    path.write_text(original, encoding="utf-8")
+
+    def failing_replace(source, target):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(config_files.os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        atomic_write_text(path, '{"rank": "VIP", "players": []}')
+    assert path.read_text(encoding="utf-8") == original
+    # The temporary file is cleaned up
+    assert os.listdir(tmp_path) == ["VIP.json"]
+
+
+def test_atomic_write_text_retries_while_the_file_is_locked(tmp_path, monkeypatch):
+    path = tmp_path / "VIP.json"
+    path.write_text("old", encoding="utf-8")
+    real_replace = os.replace
+    calls = []
+
+    def locked_twice(source, target):
+        calls.append(target)
+        if len(calls) <= 2:
+            raise PermissionError("in use")
+        real_replace(source, target)
+
+    monkeypatch.setattr(config_files, "REPLACE_RETRY_DELAY", 0)
+    monkeypatch.setattr(config_files.os, "replace", locked_twice)
+    atomic_write_text(path, "new")
+    assert len(calls) == 3
+    assert path.read_text(encoding="utf-8") == "new"
+
+
+def test_atomic_write_text_gives_up_on_a_file_that_stays_locked(tmp_path, monkeypatch):
+    path = tmp_path / "VIP.json"
+    path.write_text("old", encoding="utf-8")
+
+    def always_locked(source, target):
+        raise PermissionError("in use")
+
+    monkeypatch.setattr(config_files, "REPLACE_RETRY_DELAY", 0)
+    monkeypatch.setattr(config_files.os, "replace", always_locked)
+    with pytest.raises(PermissionError):
+        atomic_write_text(path, "new")
+    assert path.read_text(encoding="utf-8") == "old"
+    assert os.listdir(tmp_path) == ["VIP.json"]
+
+
+def test_rank_add_counts_players_given_twice_in_different_case_once(tmp_path, capsys):
+    rank_path = tmp_path / "config" / "ranks" / "VIP.json"
+    rank_path.parent.mkdir(parents=True)
+    rank_path.write_text(json.dumps({"rank": "VIP", "players": ["Bob"]}), encoding="utf-8")
+    (tmp_path / "logs").mkdir()
+
+    assert craftbot_cli.main(["--control-panel", str(tmp_path), "rank", "add", "VIP", "bob", "Alice", "alice"]) == 0
+    assert capsys.readouterr().out == "Added 1 players to VIP (1 already present)\n"
+    assert json.loads(rank_path.read_text(encoding="utf-8"))["players"] == ["Bob", "Alice"]
+
+
+def test_file_listings_skip_temporary_files_of_a_save_in_progress(tmp_path):
+    (tmp_path / "welcome.txt").write_text("Hi", encoding="utf-8")
+    (tmp_path / ".rules.txt.x1y2.tmp").write_text("partial", encoding="utf-8")
+    assert ConfigCache().list_files(tmp_path) == [tmp_path / "welcome.txt"]
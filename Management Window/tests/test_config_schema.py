@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+from config_schema import COMMAND_FILE_SCHEMA, RECIPE_SCHEMA, DocumentValidator, check_document
+
+
+def recipe_text(steps=20):
+    return json.dumps({
+        "Name": "Pearl Cutting",
+        "Description": "Cuts pearls",
+        "Enabled": True,
+        "Steps": [{"StepNumber": number, "Tool": "Jensen Gem Cutter", "InputItem": f"Item {number}",
+                   "OutputItem": f"Item {number + 1}", "ProcessingTime": 100} for number in range(steps)],
+        "ProcessableItems": ["Pearl"],
+        "CustomProperties": {"Source": "test"},
+    }, indent=2)
+
+
+def commands_text(count=30):
+    return json.dumps({
+        "Commands": [{"Name": f"cmd{number}", "Aliases": [f"c{number}"], "Enabled": True, "Cooldown": 5}
+                     for number in range(count)],
+        "Settings": {"CommandPrefix": "!", "GlobalCooldown": 1},
+    }, indent=2)
+
+
+def replace_at(text, anchor, old, new, occurrence=0):
+    """text with old replaced by new at the occurrence-th place anchor appears"""
+    position = -1
+    for _ in range(occurrence + 1):
+        position = text.index(anchor, position + 1)
+    start = text.index(old, position)
+    return text[:start] + new + text[start + len(old):]
+
+
+def check_edits(schema, text, edits):
+    """Apply edits one after another, checking that the incremental result always equals a full check"""
+    validator = DocumentValidator(schema)
+    validator.check(text)
+    for edit in edits:
+        text = edit(text)
+        assert validator.check(text) == check_document(text, schema)
+    return validator.check(text)
+
+
+RECIPE_EDITS = {
+    # Near the start: a top-level field
+    "start": [
+        lambda text: replace_at(text, '"Enabled"', "true", '"maybe"'),
+        lambda text: replace_at(text, '"Enabled"', '"maybe"', "true"),
+        lambda text: replace_at(text, '"Name"', '"Pearl Cutting"', '""'),
+        lambda text: replace_at(text, '"Description"', '"Description"', '"Descripton"'),
+    ],
+    # The middle: inside one step, growing and shrinking it
+    "middle": [
+        lambda text: replace_at(text, '"StepNumber": 10', '"Tool": "Jensen Gem Cutter"', '"Tool": ""'),
+        lambda text: replace_at(text, '"StepNumber": 10', '100', '"a lot of time"'),
+        lambda text: replace_at(text, '"StepNumber": 10', '"a lot of time"', '7'),
+        lambda text: replace_at(text, '"StepNumber": 11', '"InputItem"', '"Inputitem"'),
+        lambda text: replace_at(text, '"StepNumber": 12', '"Tool": "Jensen Gem Cutter",', ''),
+    ],
+    # The end: the last fields of the document
+    "end": [
+        lambda text: replace_at(text, '"ProcessableItems"', '"Pearl"', '{"Name": "Pearl"}'),
+        lambda text: replace_at(text, '"CustomProperties"', '{', '3, "OldProperties": {'),
+        lambda text: replace_at(text, '"CustomProperties"', '3, "OldProperties": {', '{'),
+        lambda text: text.rstrip()[:-1] + ',\n  "Extra": 1\n}',
+    ],
+}
+
+
+@pytest.mark.parametrize("where", sorted(RECIPE_EDITS))
+def test_incremental_recipe_check_matches_a_full_check(where):
+    problems = check_edits(RECIPE_SCHEMA, recipe_text(), RECIPE_EDITS[where])
+    assert problems
+
+
+def test_edits_everywhere_in_one_session_match_a_full_check():
+    check_edits(RECIPE_SCHEMA, recipe_text(), RECIPE_EDITS["end"] + RECIPE_EDITS["middle"] + RECIPE_EDITS["start"])
+
+
+def test_problems_after_an_edit_move_with_the_text():
+    text = recipe_text()
+    text = replace_at(text, '"StepNumber": 15', '"Tool": "Jensen Gem Cutter"', '"Tool": []')
+    validator = DocumentValidator(RECIPE_SCHEMA)
+    ((start, end, severity, path, message),) = validator.check(text)
+    assert path == "Steps[15].Tool"
+    # Lengthen an earlier step: the problem in step 15 is reported at its new position
+    edited = replace_at(text, '"StepNumber": 2', '"Item 2"', '"A much longer item name"')
+    ((new_start, new_end, _, new_path, _),) = validator.check(edited)
+    assert new_path == path
+    assert edited[new_start:new_end] == text[start:end] == "[]"
+
+
+def test_broken_and_repaired_json_matches_a_full_check():
+    edits = [
+        lambda text: replace_at(text, '"StepNumber": 5', '"Tool"', '"Tool'),
+        lambda text: replace_at(text, '"StepNumber": 5', '"Tool', '"Tool"'),
+        lambda text: text[1:],
+        lambda text: "{" + text,
+    ]
+    check_edits(RECIPE_SCHEMA, recipe_text(), edits)
+
+
+def test_invalid_json_is_reported_with_its_position():
+    ((start, end, severity, path, message),) = check_document('{"Name": "x",\n "Steps": [}', RECIPE_SCHEMA)
+    assert (severity, path) == ("error", "JSON")
+    assert start == 25
+
+
+@pytest.mark.parametrize("edits", [
+    # Start, middle and end of commands.json
+    [lambda text: replace_at(text, '"cmd0"', '"cmd0"', '""')],
+    [lambda text: replace_at(text, '"cmd15"', '"Cooldown": 5', '"Cooldown": "soon"'),
+     lambda text: replace_at(text, '"cmd15"', '"c15"', '{"Alias": "c15"}')],
+    [lambda text: replace_at(text, '"GlobalCooldown"', '1', '99999999999'),
+     lambda text: replace_at(text, '"CommandPrefix"', '"CommandPrefix"', '"Prefix"')],
+])
+def test_incremental_command_check_matches_a_full_check(edits):
+    assert check_edits(COMMAND_FILE_SCHEMA, commands_text(), edits)
@@ -0,0 +1,164 @@
+import json
+import zlib
+
+import pytest
+
+from config_snapshots import SnapshotStore
+from craftbot_core import CraftbotCore
+
+
+def write_tree(root, files):
+    for path, text in files.items():
+        file_path = root / path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(text, encoding="utf-8")
+
+
+def read_tree(root):
+    return {path.relative_to(root).as_posix(): path.read_text(encoding="utf-8")
+            for path in root.rglob("*") if path.is_file()}
+
+
+@pytest.fixture
+def config(tmp_path):
+    root = tmp_path / "config"
+    write_tree(root, {
+        "commands.json": '{"Commands": []}',
+        "recipes/pearl.json": '{"Name": "Pearl"}',
+        "recipes/plasma.json": '{"Name": "Plasma"}',
+        # As CraftbotCore writes rank files
+        "ranks/VIP.json": json.dumps({"rank": "VIP", "players": []}, indent=2),
+    })
+    return root
+
+
+@pytest.fixture
+def store(tmp_path, config):
+    return SnapshotStore(tmp_path / "config_snapshots", config)
+
+
+def test_returning_to_an_earlier_tree_gets_a_new_numbered_entry(tmp_path, config):
+    write_tree(tmp_path / "logs", {})
+    core = CraftbotCore(tmp_path)
+    core.set_snapshot_before_write(True)
+    core.write_rank_players("VIP", add=["Alice"])
+    core.write_rank_players("VIP", remove=["Alice"])
+    core.write_rank_players("VIP", add=["Alice"])
+    core.create_snapshot("after")
+
+    snapshots = core.snapshot_store.snapshots()
+    ids = [entry["id"] for entry in snapshots]
+    assert ids[0] == ids[2] and ids[1] == ids[3] and ids[0] != ids[1]
+    assert [entry["number"] for entry in snapshots] == [1, 2, 3, 4]
+    # A prefix of the repeated id still finds one snapshot, the newest of that tree
+    assert core.snapshot_store.find(ids[0][:8])["number"] == 3
+
+
+def test_listed_numbers_find_and_restore_that_snapshot(tmp_path, config):
+    write_tree(tmp_path / "logs", {})
+    core = CraftbotCore(tmp_path)
+    trees = {}
+    for number in range(1, 41):
+        write_tree(config, {"recipes/pearl.json": f'{{"Name": "Pearl", "Version": {number}}}'})
+        entry, created = core.create_snapshot(f"version {number}")
+        assert created and entry["number"] == number
+        trees[number] = read_tree(config)
+
+    for entry in core.list_snapshots():
+        assert core.snapshot_store.find(str(entry["number"])) == entry
+    # A number that no snapshot has is not read as an id prefix
+    with pytest.raises(KeyError):
+        core.snapshot_store.find("41")
+
+    entry, written, deleted = core.restore_snapshot("4")
+    assert entry["number"] == 4 and written == ["recipes/pearl.json"]
+    assert read_tree(config) == trees[4]
+
+
+def test_create_skips_a_tree_that_matches_the_newest_snapshot(store):
+    first, created = store.create("first")
+    assert created
+    again, created = store.create("again")
+    assert not created and again == first
+    assert store.create("forced", only_if_changed=False)[1]
+    assert len(store.snapshots()) == 2
+
+
+def test_diff_between_snapshots_and_with_the_config_now(store, config):
+    old, _ = store.create()
+    (config / "recipes/pearl.json").write_text('{"Name": "Pearl", "Enabled": false}', encoding="utf-8")
+    (config / "recipes/plasma.json").unlink()
+    write_tree(config, {"recipes/gem.json": '{"Name": "Gem"}'})
+    assert store.diff(old["id"]) == (["recipes/gem.json"], ["recipes/plasma.json"], ["recipes/pearl.json"])
+    new, _ = store.create()
+    assert store.diff(old["id"], new["id"]) == store.diff(old["id"])
+    assert store.diff(new["id"], old["id"]) == (["recipes/plasma.json"], ["recipes/gem.json"], ["recipes/pearl.json"])
+
+
+def test_restore_round_trips_the_tree_writing_only_changed_files(store, config):
+    original = read_tree(config)
+    snapshot, _ = store.create()
+    untouched_mtime = (config / "commands.json").stat().st_mtime_ns
+
+    (config / "recipes/pearl.json").write_text("broken", encoding="utf-8")
+    (config / "ranks/VIP.json").unlink()
+    write_tree(config, {"recipes/extra.json": "{}"})
+
+    written, deleted = store.restore(snapshot["id"])
+    assert sorted(written) == ["ranks/VIP.json", "recipes/pearl.json"]
+    assert deleted == ["recipes/extra.json"]
+    assert read_tree(config) == original
+    assert (config / "commands.json").stat().st_mtime_ns == untouched_mtime
+    assert store.diff(snapshot["id"]) == ([], [], [])
+
+
+def test_restore_can_keep_extra_files(store, config):
+    snapshot, _ = store.create()
+    write_tree(config, {"recipes/extra.json": "{}"})
+    assert store.restore(snapshot["id"], delete_extra=False) == ([], [])
+    assert (config / "recipes/extra.json").exists()
+
+
+def test_restore_writes_nothing_if_a_stored_file_is_corrupt(store, config):
+    snapshot, _ = store.create()
+    digest = store.manifest(snapshot["id"])["recipes/pearl.json"]
+    (config / "recipes/pearl.json").write_text("changed", encoding="utf-8")
+    (config / "recipes/plasma.json").write_text("changed too", encoding="utf-8")
+    object_path = store.objects_path / digest[:2] / digest[2:]
+    object_path.write_bytes(zlib.compress(b"tampered"))
+
+    with pytest.raises(ValueError):
+        store.restore(snapshot["id"])
+    assert (config / "recipes/plasma.json").read_text(encoding="utf-8") == "changed too"
+
+
+def test_prune_keeps_the_objects_kept_snapshots_use(store, config):
+    pearl = config / "recipes/pearl.json"
+    versions = []
+    for number in range(4):
+        pearl.write_text(json.dumps({"Name": "Pearl", "Version": number}), encoding="utf-8")
+        versions.append(store.create(f"v{number}")[0])
+
+    assert store.prune(2) == (2, 2)
+    assert [entry["label"] for entry in store.snapshots()] == ["v2", "v3"]
+    # Every file of the kept snapshots can still be read back
+    for entry in store.snapshots():
+        for digest in store.manifest(entry["id"]).values():
+            store.read_object(digest)
+    # So an older kept snapshot still restores
+    store.restore(versions[2]["id"])
+    assert json.loads(pearl.read_text(encoding="utf-8"))["Version"] == 2
+    with pytest.raises(KeyError):
+        store.find(versions[0]["id"])
+
+
+def test_prune_keeps_the_objects_of_the_config_now(store, config):
+    store.create("only")
+    (config / "recipes/gem.json").write_text('{"Name": "Gem"}', encoding="utf-8")
+    store.current()
+    assert store.prune(0) == (1, 0)
+    # The next snapshot reuses the stored files without reading the config again
+    entry, created = store.create("after prune")
+    assert created
+    for digest in store.manifest(entry["id"]).values():
+        store.read_object(digest)
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+import log_archive
+from log_archive import archive_size, list_segments, read_archive, rotate_log
+
+
+def debug_log(count, first=0):
+    return b"".join(b"2026-03-14 12:%02d:%02d.000 [Info] entry %d padded to a realistic length\r\n"
+                    % (number // 60 % 60, number % 60, number) for number in range(first, first + count))
+
+
+@pytest.fixture
+def log_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_archive, "SETTLE_DELAY", 0)
+    path = tmp_path / "craftbot_debug.log"
+    path.write_bytes(debug_log(1000))
+    return path
+
+
+def archived(log_path):
+    return b"".join(read_archive(segment) for segment in list_segments(log_path.parent, log_path.name))
+
+
+def leftovers(log_path):
+    return sorted(name for name in os.listdir(log_path.parent) if name.startswith("."))
+
+
+def test_rotation_splits_the_log_into_segments_at_line_ends(log_path):
+    data = log_path.read_bytes()
+    segments = rotate_log(log_path, max_bytes=16 * 1024)
+    assert len(segments) > 2
+    assert segments == list_segments(log_path.parent, log_path.name)
+    assert archived(log_path) == data
+    assert all(read_archive(segment).endswith(b"\r\n") for segment in segments)
+    assert all(archive_size(segment) == len(read_archive(segment)) for segment in segments)
+    assert not log_path.exists() and leftovers(log_path) == []
+
+
+def test_small_logs_are_left_alone(log_path):
+    assert rotate_log(log_path, min_bytes=log_path.stat().st_size + 1) == []
+    assert log_path.exists() and leftovers(log_path) == []
+
+
+def test_resumed_rotation_does_not_archive_published_segments_again(log_path, monkeypatch):
+    data = log_path.read_bytes()
+    replace = os.replace
+    published = []
+
+    def interrupt_after_two_segments(source, target):
+        if str(target).endswith(".gz"):
+            if len(published) == 2:
+                raise KeyboardInterrupt
+            published.append(target)
+        replace(source, target)
+
+    monkeypatch.setattr(log_archive.os, "replace", interrupt_after_two_segments)
+    with pytest.raises(KeyboardInterrupt):
+        rotate_log(log_path, max_bytes=16 * 1024)
+    monkeypatch.setattr(log_archive.os, "replace", replace)
+    assert list_segments(log_path.parent, log_path.name) == published
+    # The bot has started a new live log in the meantime; resuming only finishes the moved one
+    log_path.write_bytes(debug_log(10, first=1000))
+
+    segments = rotate_log(log_path, max_bytes=16 * 1024)
+    assert segments[:2] == published
+    assert segments == list_segments(log_path.parent, log_path.name)
+    assert archived(log_path) == data
+    assert [segment.name[-len(".log.gz") - 3:-len(".log.gz")] for segment in segments] == [
+        f"{number:03d}" for number in range(1, len(segments) + 1)]
+    assert leftovers(log_path) == []
+    assert log_path.read_bytes() == debug_log(10, first=1000)
+
+
+def test_rotation_interrupted_before_publishing_writes_everything_once(log_path, monkeypatch):
+    data = log_path.read_bytes()
+    finish = log_archive.SegmentWriter.finish
+
+    def disk_full(writer):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(log_archive.SegmentWriter, "finish", disk_full)
+    with pytest.raises(OSError):
+        rotate_log(log_path, max_bytes=16 * 1024)
+    monkeypatch.setattr(log_archive.SegmentWriter, "finish", finish)
+    assert list_segments(log_path.parent, log_path.name) == []
+
+    rotate_log(log_path, max_bytes=16 * 1024)
+    assert archived(log_path) == data
+    assert leftovers(log_path) == []
@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from log_file import LINES_PER_CHECKPOINT, LogFile, index_path_for, parse_time_query
+
+START = datetime(2024, 5, 1, 12, 0, 0)
+
+
+def timestamp_key(moment):
+    return int(moment.strftime("%Y%m%d%H%M%S%f")[:-3])
+
+
+def log_lines(count, first=0):
+    """count lines one second apart; every 50th entry carries a continuation line without a timestamp"""
+    lines = []
+    for number in range(first, first + count):
+        moment = START + timedelta(seconds=number)
+        lines.append(f"{moment:%Y-%m-%d %H:%M:%S}.000 [Info] entry {number}")
+        if number % 50 == 49:
+            lines.append(f"    continuation of entry {number}")
+    return lines
+
+
+def write_log(path, lines, mode="w"):
+    with open(path, mode, newline="") as log:
+        log.write("".join(line + "\r\n" for line in lines))
+
+
+def indexed(path):
+    log = LogFile(path).open()
+    log.index_all()
+    return log
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = tmp_path / "craftbot.log"
+    write_log(path, log_lines(1000))
+    return path
+
+
+def test_index_round_trip(log_path):
+    log = indexed(log_path)
+    assert log.save_index()
+    assert index_path_for(log_path).exists()
+
+    resumed = LogFile(log_path).open()
+    assert resumed.load_index()
+    assert list(resumed.checkpoints) == list(log.checkpoints)
+    assert list(resumed.checkpoint_times) == list(log.checkpoint_times)
+    resumed.index_all()
+    assert resumed.line_count == log.line_count == 1020
+    assert resumed.get_lines(resumed.line_count - 3, 3) == log.get_lines(log.line_count - 3, 3)
+    log.close()
+    resumed.close()
+
+
+def test_resumed_index_picks_up_appended_lines(log_path):
+    log = indexed(log_path)
+    log.save_index()
+    log.close()
+    write_log(log_path, log_lines(500, first=1000), mode="a")
+
+    resumed = LogFile(log_path).open()
+    assert resumed.load_index()
+    resumed.index_all()
+    fresh = indexed(log_path)
+    assert resumed.line_count == fresh.line_count
+    assert list(resumed.checkpoints) == list(fresh.checkpoints)
+
+    # Only the new checkpoints are appended to the sidecar, the result must match a full write
+    assert resumed.save_index()
+    reloaded = LogFile(log_path).open()
+    assert reloaded.load_index()
+    assert list(reloaded.checkpoints) == list(fresh.checkpoints)
+    assert list(reloaded.checkpoint_times) == list(fresh.checkpoint_times)
+    for log in (resumed, fresh, reloaded):
+        log.close()
+
+
+def test_replaced_log_invalidates_index(log_path):
+    log = indexed(log_path)
+    log.save_index()
+    log.close()
+    # Same size, different leading bytes - a new log written over the old one
+    lines = log_lines(1000)
+    lines[0] = lines[0].replace("entry 0", "entry X")
+    write_log(log_path, lines)
+
+    replaced = LogFile(log_path).open()
+    assert not replaced.load_index()
+    assert list(replaced.checkpoints) == [0]
+    replaced.close()
+
+
+def test_truncated_log_invalidates_index(log_path):
+    log = indexed(log_path)
+    log.save_index()
+    log.close()
+    write_log(log_path, log_lines(100))
+
+    truncated = LogFile(log_path).open()
+    assert not truncated.load_index()
+    truncated.index_all()
+    assert truncated.line_count == 102
+    truncated.close()
+
+
+def test_damaged_index_is_ignored(log_path):
+    log = indexed(log_path)
+    log.save_index()
+    log.close()
+    index_path = index_path_for(log_path)
+    index_path.write_bytes(index_path.read_bytes()[:10])
+
+    damaged = LogFile(log_path).open()
+    assert not damaged.load_index()
+    damaged.close()
+
+
+def test_refresh_after_shrinking_resets_the_index(log_path):
+    log = indexed(log_path)
+    write_log(log_path, log_lines(10))
+    assert not log.refresh()
+    log.index_all()
+    assert log.line_count == 10
+    log.close()
+
+
+def test_find_time(log_path):
+    with LogFile(log_path) as log:
+        log.index_all()
+        assert log.has_timestamps
+        line_count = log.line_count
+        lines = log.get_lines(0, line_count)
+        assert len(lines) > 2 * LINES_PER_CHECKPOINT
+
+        def line_of(entry):
+            return lines.index(next(line for line in lines if line.endswith(f"] entry {entry}")))
+
+        # Exact second, and every checkpoint boundary
+        for entry in (0, 1, 63, 64, 500, 999):
+            assert log.find_time(timestamp_key(START + timedelta(seconds=entry))) == line_of(entry)
+        for group in range(1, len(log.checkpoints)):
+            line = group * LINES_PER_CHECKPOINT
+            key = log.line_time(line)
+            found = log.find_time(key)
+            assert found <= line and log.line_time(found) == key
+        # Between two entries, and right after an entry with a continuation line
+        assert log.find_time(timestamp_key(START + timedelta(seconds=10, milliseconds=500))) == line_of(11)
+        assert log.find_time(timestamp_key(START + timedelta(seconds=49, milliseconds=1))) == line_of(50)
+        # Before the log starts and after it ends
+        assert log.find_time(timestamp_key(START - timedelta(days=1))) == 0
+        assert log.find_time(timestamp_key(START + timedelta(seconds=1000))) == line_count
+
+
+def test_find_time_after_resuming_from_index(log_path):
+    log = indexed(log_path)
+    log.save_index()
+    expected = log.find_time(timestamp_key(START + timedelta(seconds=700)))
+    log.close()
+
+    resumed = LogFile(log_path).open()
+    assert resumed.load_index()
+    resumed.index_all()
+    assert resumed.find_time(timestamp_key(START + timedelta(seconds=700))) == expected
+    resumed.close()
+
+
+def test_parse_time_query_precision():
+    date_key = timestamp_key(START)
+    assert parse_time_query("2024-05-01 12:30", None) == (20240501123000000, 60000)
+    assert parse_time_query("12:30:15", date_key) == (20240501123015000, 1000)
+    assert parse_time_query("9:05", date_key) == (20240501090500000, 60000)
+    assert parse_time_query("12:30", None) is None
+    assert parse_time_query("24:00", date_key) is None
+    assert parse_time_query("noon", date_key) is None
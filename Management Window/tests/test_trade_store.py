@@ -0,0 +1,163 @@
+import io
+
+import log_archive
+from log_archive import list_segments, rotate_log
+from trade_store import TradeStore, iter_trade_blocks, parse_trade_block
+
+# One block exactly as PrivateMessageModule.WriteTradeLogToFile appends it
+# (File.AppendAllLines, so CRLF line ends on Windows)
+BOT_BLOCK = [
+    "===============================================",
+    "=== DETAILED TRADE LOG ===",
+    "Date: 2026-03-14 18:02:45",
+    "Player: Bobthebuilder (ID: 1234567)",
+    "Duration: 42.5 seconds",
+    "Status: Completed",
+    "",
+    "--- ITEMS RECEIVED FROM PLAYER ---",
+    "Bags Received (1):",
+    "  \U0001F4E6 Backpack",
+    "     Contents (2 items):",
+    "       - Pearl",
+    "       - Blood Plasma",
+    "",
+    "Loose Items Received (1):",
+    "  - Kyr'Ozch Bio-Material - Type 76",
+    "",
+    "--- ITEMS RETURNED TO PLAYER ---",
+    "Bags Returned (1):",
+    "  \U0001F4E6 Backpack",
+    "     Contents (2 items):",
+    "       - Perfectly Cut Pearl",
+    "       - Blood Plasma",
+    "",
+    "Loose Items Returned: None",
+    "",
+    "--- PROCESSING DETAILS ---",
+    "Items Processed (2):",
+    "  - Pearl -> Perfectly Cut Pearl",
+    "  - Kyr'Ozch Bio-Material - Type 76 -> Failed: no recipe",
+    "Failed Items (1):",
+    "  - Kyr'Ozch Bio-Material - Type 76",
+    "",
+    "===============================================",
+    "",
+]
+
+
+def bot_block(player="Bobthebuilder", date="2026-03-14 18:02:45", status="Completed"):
+    lines = list(BOT_BLOCK)
+    lines[2] = f"Date: {date}"
+    lines[3] = f"Player: {player} (ID: 1234567)"
+    lines[5] = f"Status: {status}"
+    return "".join(line + "\r\n" for line in lines).encode("utf-8")
+
+
+def blocks(data):
+    return list(iter_trade_blocks(io.BytesIO(data)))
+
+
+def test_parse_trade_block_reads_the_bot_layout():
+    ((start, end, trade),) = blocks(bot_block())
+    assert (start, end) == (len(BOT_BLOCK[0]) + 2, len(bot_block()) - 2)
+    assert trade["date"] == "2026-03-14 18:02:45"
+    assert (trade["player"], trade["player_id"]) == ("Bobthebuilder", 1234567)
+    assert trade["duration"] == 42.5
+    assert trade["status"] == "Completed"
+    assert (trade["bags_received"], trade["bags_returned"]) == (1, 1)
+    assert (trade["items_processed"], trade["items_failed"]) == (2, 1)
+    assert trade["items"] == [
+        ("received", "Backpack", "Pearl", None),
+        ("received", "Backpack", "Blood Plasma", None),
+        ("received", None, "Kyr'Ozch Bio-Material - Type 76", None),
+        ("returned", "Backpack", "Perfectly Cut Pearl", None),
+        ("returned", "Backpack", "Blood Plasma", None),
+        ("processed", None, "Pearl", "Perfectly Cut Pearl"),
+        ("processed", None, "Kyr'Ozch Bio-Material - Type 76", "Failed: no recipe"),
+        ("failed", None, "Kyr'Ozch Bio-Material - Type 76", None),
+    ]
+
+
+def test_parse_trade_block_without_detailed_tracking():
+    trade = parse_trade_block([
+        "Date: 2026-03-14 18:02:45", "Player: Ann (ID: 7)", "Duration: 3,0 seconds", "Status: Incomplete", "",
+        "--- ITEMS RECEIVED FROM PLAYER ---", "Bags Received: 2", "Bags Returned: 1",
+        "(Detailed item tracking not available)",
+    ])
+    assert trade["duration"] == 3.0
+    assert trade["status"] == "Incomplete"
+    assert (trade["bags_received"], trade["bags_returned"]) == (2, 1)
+    assert trade["items"] == []
+
+
+def test_truncated_trailing_block_is_not_yielded():
+    complete = bot_block("Ann")
+    partial = bot_block("Bob")
+    # Cut inside the processing details, then mid-line
+    for cut in (partial.index(b"Items Processed"), partial.index(b"Items Processed") + 5):
+        found = blocks(complete + partial[:cut])
+        assert [trade["player"] for _, _, trade in found] == ["Ann"]
+        # The last end offset is where the next read resumes
+        assert found[-1][1] == len(complete) - 2
+
+
+def test_resuming_from_the_last_end_offset_reads_only_new_blocks():
+    data = bot_block("Ann") + bot_block("Bob")
+    end = blocks(data)[0][1]
+    assert [trade["player"] for _, _, trade in iter_trade_blocks(io.BytesIO(data), end)] == ["Bob"]
+
+
+def test_ingest_is_incremental(tmp_path):
+    log_path = tmp_path / "trade_logs.txt"
+    store = TradeStore(tmp_path / "trade_logs.db")
+    log_path.write_bytes(bot_block("Ann"))
+    assert store.ingest(log_path) == 1
+    assert store.ingest(log_path) == 0
+
+    # A block the bot is still writing is picked up once it is complete
+    partial = bot_block("Bob")
+    with open(log_path, "ab") as log_file:
+        log_file.write(partial[:200])
+    assert store.ingest(log_path) == 0
+    with open(log_path, "ab") as log_file:
+        log_file.write(partial[200:])
+    assert store.ingest(log_path) == 1
+    assert store.summary() == (2, 4, 2)
+    assert [trade["player"] for trade in store.query()] == ["Bob", "Ann"]
+
+
+def test_ingest_rereads_a_replaced_or_truncated_log(tmp_path):
+    log_path = tmp_path / "trade_logs.txt"
+    store = TradeStore(tmp_path / "trade_logs.db")
+    log_path.write_bytes(bot_block("Ann") + bot_block("Bob"))
+    assert store.ingest(log_path) == 2
+
+    # Replaced by a longer log with different contents
+    log_path.write_bytes(bot_block("Cid") + bot_block("Dee") + bot_block("Eve"))
+    assert store.ingest(log_path) == 3
+    assert sorted(trade["player"] for trade in store.query()) == ["Cid", "Dee", "Eve"]
+
+    # Truncated below what was read
+    log_path.write_bytes(bot_block("Fay"))
+    assert store.ingest(log_path) == 1
+    assert [trade["player"] for trade in store.query()] == ["Fay"]
+
+
+def test_ingest_after_rotation_counts_each_trade_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_archive, "SETTLE_DELAY", 0)
+    log_path = tmp_path / "trade_logs.txt"
+    store = TradeStore(tmp_path / "trade_logs.db")
+
+    def ingest_all():
+        for segment in list_segments(tmp_path, log_path.name):
+            store.ingest(segment)
+        store.ingest(log_path)
+
+    log_path.write_bytes(bot_block("Ann", "2026-03-14 10:00:00") + bot_block("Bob", "2026-03-14 11:00:00"))
+    ingest_all()
+    assert rotate_log(log_path)
+    # The bot starts a new live log with its next trade
+    log_path.write_bytes(bot_block("Cid", "2026-03-14 12:00:00"))
+    ingest_all()
+    ingest_all()
+    assert [trade["player"] for trade in store.query()] == ["Cid", "Bob", "Ann"]